@@ -0,0 +1,79 @@
+import json
+import platform
+import subprocess
+import sys
+from argparse import ArgumentParser
+
+from benchmarks.suite import BENCHMARKS, compare, run_case, run_ui_case
+from benchmarks.worlds import GENE_MIXES, WORLD_SHAPES
+
+# The sizes every shape of world is benchmarked at by default
+DEFAULT_SIZES: dict[str, list[int]] = {
+    "flat": [1_000, 10_000, 100_000],
+    "chain": [1_000, 10_000, 100_000],
+    "fan_out": [1_000, 10_000, 100_000]
+}
+
+# Run the benchmarks without a window with `python -m benchmarks`, and save the results as JSON to compare commits
+# with `--output` and `--compare`
+parser = ArgumentParser(prog="benchmarks")
+parser.add_argument("--benchmark", choices=sorted(BENCHMARKS), action="append", help="only run these benchmarks")
+parser.add_argument("--world", choices=sorted(WORLD_SHAPES), action="append", help="only run on these shapes of world")
+parser.add_argument("--genes", choices=sorted(GENE_MIXES), action="append", help="the gene mixes to run with, defaults to shape and all")
+parser.add_argument("--sizes", type=int, nargs="+", help="the organ counts to run at, e.g. 1000 1000000, instead of the defaults")
+parser.add_argument("--min-time", type=float, default=1.0, help="the minimum number of seconds to time every case for")
+parser.add_argument("--ui", action="store_true", help="also benchmark the OrganDetailsUI layout, this opens a hidden window")
+parser.add_argument("--output", metavar="PATH", help="save the results to this JSON file")
+parser.add_argument("--compare", metavar="PATH", help="compare the results to a JSON file saved by an earlier run")
+arguments = parser.parse_args()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def format_bytes(count: int) -> str:
+    return "{:.1f} MiB".format(count / (1024 * 1024))
+
+
+results = []
+print("{:<10} {:<8} {:>9} {:<7} {:>14} {:>12} {:>12}".format("benchmark", "world", "size", "genes", "ticks/s", "ns/organ", "peak memory"))
+for benchmark in arguments.benchmark or sorted(BENCHMARKS):
+    for world_shape in arguments.world or sorted(WORLD_SHAPES):
+        for genes in arguments.genes or ["shape", "all"]:
+            for size in arguments.sizes or DEFAULT_SIZES[world_shape]:
+                result = run_case(benchmark, world_shape, size, genes, arguments.min_time)
+                results.append(result)
+                print("{:<10} {:<8} {:>9} {:<7} {:>14.2f} {:>12.1f} {:>12}".format(
+                    benchmark, world_shape, size, genes,
+                    result["ticks_per_second"], result["ns_per_organ"], format_bytes(result["peak_memory_bytes"])
+                ))
+
+if arguments.ui:
+    for children in (10, 100, 1000):
+        result = run_ui_case(children, arguments.min_time)
+        results.append(result)
+        print("{:<10} {:<8} {:>9} {:<7} {:>14.2f} {:>12.1f}".format("ui_layout", "fan_out", children + 1, "all", result["ticks_per_second"], result["ns_per_organ"]))
+
+if arguments.compare is not None:
+    with open(arguments.compare) as file:
+        baseline = json.load(file)["results"]
+    print()
+    print("Compared to {} (above 1 is faster)".format(arguments.compare))
+    for result, ratio in compare(results, baseline):
+        if ratio is not None:
+            print("{:<10} {:<8} {:>9} {:<7} {:>8.2f}x".format(result["benchmark"], result["world"], result["size"], result["genes"], ratio))
+
+if arguments.output is not None:
+    with open(arguments.output, "w") as file:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results
+        }, file, indent=2)
+
+sys.exit()
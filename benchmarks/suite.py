@@ -0,0 +1,141 @@
+import time
+import tracemalloc
+from typing import Any, Callable, Optional
+
+from genesis.simulation import Simulation
+from genesis.utils.shape_batch import ShapeBatch
+from benchmarks.worlds import WORLD_SHAPES, organ_count
+
+
+# Run the function repeatedly for at least the given amount of time, at least once, and get the number of runs per
+# second
+def runs_per_second(function: Callable[[], Any], min_time: float) -> tuple[int, float]:
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while runs == 0 or elapsed < min_time:
+        function()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return runs, runs / elapsed
+
+
+# Step the whole world one tick at a time
+def bench_update(simulation: Simulation) -> Callable[[], Any]:
+    return simulation.step
+
+
+# Move the root of every organism, then resolve the world positions of everything that moved
+def bench_move(simulation: Simulation) -> Callable[[], Any]:
+    world = simulation.world
+    offset = [1]
+
+    def move() -> None:
+        offset[0] = -offset[0]
+        for organism in world.organisms:
+            organism.move_pos_local_space(organism.local_x + offset[0], organism.local_y)
+        world.resolve_transforms()
+    return move
+
+
+# Collect the shapes of every organism into a batch and turn them into triangles, everything a frame does before
+# handing them to the GPU
+def bench_draw_prep(simulation: Simulation) -> Callable[[], Any]:
+    world = simulation.world
+    batch = ShapeBatch()
+
+    def draw_prep() -> None:
+        world.resolve_transforms()
+        for organism in world.organisms:
+            organism.draw(batch)
+        batch.build()
+        batch.clear()
+    return draw_prep
+
+
+# Every benchmark that runs without a window, by name
+BENCHMARKS: dict[str, Callable[[Simulation], Callable[[], Any]]] = {
+    "update": bench_update,
+    "move": bench_move,
+    "draw_prep": bench_draw_prep
+}
+
+
+# Build the world and run the benchmark on it, get its result. The peak memory is measured while building the world
+# and running the benchmark once, separately from the timed runs so tracing does not slow them down
+def run_case(benchmark: str, world_shape: str, size: int, genes: str, min_time: float, seed: int = 0) -> dict[str, Any]:
+    result: dict[str, Any] = {"benchmark": benchmark, "world": world_shape, "size": size, "genes": genes}
+    tracemalloc.start()
+    simulation = WORLD_SHAPES[world_shape](size, genes, seed)
+    BENCHMARKS[benchmark](simulation)()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Build the world again so the timed runs do not pay for the memory tracing
+    simulation = WORLD_SHAPES[world_shape](size, genes, seed)
+    organs = organ_count(simulation.world)
+    runs, per_second = runs_per_second(BENCHMARKS[benchmark](simulation), min_time)
+
+    result.update({
+        "organs": organs,
+        "runs": runs,
+        "ticks_per_second": per_second,
+        "ns_per_organ": 1e9 / per_second / max(organs, 1),
+        "peak_memory_bytes": peak_memory
+    })
+    return result
+
+
+# Measure how long laying out and drawing the OrganDetailsUI takes for an organ with the given number of children
+# and genes. This needs a window, so one is opened hidden
+def run_ui_case(children: int, min_time: float) -> dict[str, Any]:
+    from pyray import ConfigFlags, begin_drawing, close_window, end_drawing, init_window, set_config_flags
+    from genesis.input_state import InputState
+    from genesis.recording import InputRecorder
+    from genesis.ui.organ_detail_ui import OrganDetailsUI
+    from benchmarks.worlds import fan_out_world
+
+    set_config_flags(ConfigFlags.FLAG_WINDOW_HIDDEN)
+    init_window(1400, 860, "Genesis benchmarks")
+    try:
+        simulation = fan_out_world(children + 1, "all", fan_out=children)
+        ui = OrganDetailsUI(simulation.world, InputRecorder(simulation))
+        ui.organ = next(iter(simulation.world.organisms))
+        ui.children_organ.expanded = True
+        input_state = InputState()
+
+        def render() -> None:
+            begin_drawing()
+            ui.render(input_state)
+            end_drawing()
+        runs, per_second = runs_per_second(render, min_time)
+    finally:
+        close_window()
+
+    return {
+        "benchmark": "ui_layout",
+        "world": "fan_out",
+        "size": children + 1,
+        "genes": "all",
+        "organs": children + 1,
+        "runs": runs,
+        "ticks_per_second": per_second,
+        "ns_per_organ": 1e9 / per_second / (children + 1)
+    }
+
+
+# Compare the results of a run to an earlier one, get the ratio of ticks per second of every case both have. A
+# ratio above 1 means the case got faster
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]]) -> list[tuple[dict[str, Any], Optional[float]]]:
+    def key(result: dict[str, Any]) -> tuple:
+        return result["benchmark"], result["world"], result["size"], result["genes"]
+
+    baseline_by_key = {key(result): result for result in baseline}
+    comparison = []
+    for result in results:
+        before = baseline_by_key.get(key(result))
+        if before is None or "ticks_per_second" not in before or "ticks_per_second" not in result:
+            comparison.append((result, None))
+        else:
+            comparison.append((result, result["ticks_per_second"] / before["ticks_per_second"]))
+    return comparison
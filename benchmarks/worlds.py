@@ -0,0 +1,91 @@
+from typing import Callable
+
+from pyray import Color
+
+from genesis.organisms.genes import ColorGene, EnergyGene, MaturityGene, ShapeGene
+from genesis.organisms.organ import Organ, Gene
+from genesis.simulation import Simulation
+from genesis.utils.shape import CircleShape, PolygonShape, RectangleShape
+from genesis.world import World
+
+# The distance, in world units, between neighbouring organisms and organs of a synthetic world
+SPACING: int = 12
+
+# The genes every organ of a synthetic world gets, by the name of the mix
+GENE_MIXES: dict[str, list[Callable[[Organ], Gene]]] = {
+    "shape": [
+        lambda organ: ShapeGene(organ, RectangleShape(8, 8))
+    ],
+    "all": [
+        lambda organ: ShapeGene(organ, CircleShape(4)),
+        lambda organ: ColorGene(organ, Color(120, 200, 80, 255)),
+        lambda organ: EnergyGene(organ, 100, 0.5),
+        lambda organ: MaturityGene(organ, 100, maturity_rate=2)
+    ],
+    "stored": [
+        lambda organ: ShapeGene(organ, PolygonShape(6, 5)),
+        lambda organ: EnergyGene(organ, 100, 0.5),
+        lambda organ: MaturityGene(organ, 100, maturity_rate=2)
+    ]
+}
+
+
+# Create a world of organisms that are a single organ each, laid out on a square grid
+def flat_world(size: int, genes: str = "shape", seed: int = 0) -> Simulation:
+    simulation = Simulation(World(seed))
+    columns = max(1, int(size ** 0.5))
+    for index in range(size):
+        organ = Organ(GENE_MIXES[genes])
+        simulation.world.spawn(organ, (index % columns) * SPACING, (index // columns) * SPACING)
+    return settle(simulation)
+
+
+# Create a world of one organism that is a chain of organs, each organ the only child of the previous one
+def chain_world(size: int, genes: str = "shape", seed: int = 0) -> Simulation:
+    simulation = Simulation(World(seed))
+    root = organ = Organ(GENE_MIXES[genes])
+    for _ in range(size - 1):
+        child = Organ(GENE_MIXES[genes])
+        child.move_pos_local_space(SPACING, 0)
+        organ.add_child_organ(child)
+        organ = child
+    simulation.world.spawn(root, 0, 0)
+    return settle(simulation)
+
+
+# Create a world of one organism that is a tree in which every organ has the given number of children, filled
+# breadth first until it has the given number of organs
+def fan_out_world(size: int, genes: str = "shape", seed: int = 0, fan_out: int = 8) -> Simulation:
+    simulation = Simulation(World(seed))
+    root = Organ(GENE_MIXES[genes])
+    parents = [root]
+    count = 1
+    while count < size:
+        parent = parents.pop(0)
+        for child_index in range(min(fan_out, size - count)):
+            child = Organ(GENE_MIXES[genes])
+            child.move_pos_local_space(child_index * SPACING - fan_out * SPACING // 2, SPACING)
+            parent.add_child_organ(child)
+            parents.append(child)
+        count += min(fan_out, size - count)
+    simulation.world.spawn(root, 0, 0)
+    return settle(simulation)
+
+
+# Every shape of world a benchmark can run on, by name
+WORLD_SHAPES: dict[str, Callable[..., Simulation]] = {
+    "flat": flat_world,
+    "chain": chain_world,
+    "fan_out": fan_out_world
+}
+
+
+# Run the two ticks it takes for spawned organisms to be added to the world and have their genes initialized
+def settle(simulation: Simulation) -> Simulation:
+    simulation.run(2)
+    return simulation
+
+
+# Count every organ in the world
+def organ_count(world: World) -> int:
+    return len(world.organs)
@@ -0,0 +1,74 @@
+import sys
+import time
+from argparse import ArgumentParser
+
+# Start the windowed game, run with `python -m genesis`. A session can be recorded with `--record <path>` and
+# played back without a window, as fast as possible, with `--replay <path>`. The world a replay ends with can be saved
+# with `--save-snapshot <path>`, and a saved world inspected without a window with `--snapshot <path>`, adding
+# `--at <x> <y>` to show the organism at that position
+parser = ArgumentParser(prog="genesis")
+parser.add_argument("--record", metavar="PATH", help="save the inputs of the session to this file when it ends")
+parser.add_argument("--replay", metavar="PATH", help="replay a recorded session without a window and exit")
+parser.add_argument("--save-snapshot", metavar="PATH", help="save the world a replay ends with to this snapshot file")
+parser.add_argument("--snapshot", metavar="PATH", help="show what a world snapshot holds without a window and exit")
+parser.add_argument("--at", metavar=("X", "Y"), nargs=2, type=float, help="show the organism at this position of the snapshot")
+arguments = parser.parse_args()
+
+if arguments.snapshot is not None:
+    from genesis.snapshot import WorldSnapshot
+    from genesis.utils.shape import Shape
+
+    # Get a readable form of a value of a gene's snapshot state
+    def describe(value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return repr(value)
+        if isinstance(value, Shape):
+            return type(value).__name__
+        if callable(value):
+            return value.__qualname__
+        return "({}, {}, {}, {})".format(value.r, value.g, value.b, value.a)
+
+    snapshot = WorldSnapshot.open(arguments.snapshot)
+    print("{} organisms, {} organs".format(len(snapshot.root_indices()), len(snapshot)))
+    if arguments.at is not None:
+        index = snapshot.find_organ_at(*arguments.at)
+        if index is None:
+            print("No organ at ({:g}, {:g})".format(*arguments.at))
+            sys.exit(1)
+
+        # Print the organs of the organism depth first, each indented under its parent and followed by its genes
+        picked = snapshot.materialize_organ(index)
+        organs = snapshot.materialize_organism(snapshot.root_of(index))
+        stack = [(organs[0], 0)]
+        while stack:
+            organ, depth = stack.pop()
+            print("{}{} at ({:g}, {:g}){}".format("  " * depth, type(organ).__name__, organ.world_x, organ.world_y, " <-" if organ is picked else ""))
+            for gene_type, gene in organ.genes.items():
+                state = ", ".join("{}={}".format(name, describe(value)) for name, value in gene.get_snapshot_state().items())
+                print("{}  {}: {}".format("  " * depth, gene_type.__name__, state))
+            stack.extend((child, depth + 1) for child in reversed(organ.children_organs))
+    sys.exit()
+
+if arguments.replay is not None:
+    from genesis.recording import Recording, replay, world_digest
+
+    recording = Recording.load(arguments.replay)
+    start = time.perf_counter()
+    simulation = replay(recording)
+    elapsed = time.perf_counter() - start
+
+    digest = world_digest(simulation.world)
+    print("Replayed {} ticks in {:.3f}s ({:.0f} ticks/s)".format(simulation.tick, elapsed, simulation.tick / max(elapsed, 1e-9)))
+    if arguments.save_snapshot is not None:
+        from genesis.snapshot import save_world
+
+        save_world(simulation.world, arguments.save_snapshot)
+    if recording.digest is not None and digest != recording.digest:
+        print("World state differs from the recorded session")
+        sys.exit(1)
+    sys.exit()
+
+from genesis.game import run
+
+run(arguments.record)
+sys.exit()
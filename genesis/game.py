@@ -0,0 +1,137 @@
+import os
+from typing import Optional
+
+from pyray import *
+
+from genesis.input_state import InputState
+from genesis.recording import InputRecorder
+from genesis.simulation import Simulation
+from genesis.ui.create_gene_ui import CreateGeneWindow
+from genesis.ui.organ_detail_ui import OrganDetailsUI
+from genesis.ui.profiler_overlay import ProfilerOverlay
+from genesis.utils.colors import BACKGROUND_COLOR, BACKGROUND_SCROLL_COLOR, COLOR_RAY_WHITE
+from genesis.utils.profiler import PROFILER
+from genesis.world import World
+
+# Camera zoom values
+MAXIMUM_ZOOM = 5
+MINIMUM_ZOOM = 0.02
+# How much one step of the mouse wheel zooms the camera in or out by
+ZOOM_STEP = 1.25
+
+# Path to the resources folder, resolved relative to this file so the game can be started from anywhere
+RESOURCES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources")
+
+# Camera panning
+prev_mouse_position = vector2_zero()
+
+# Create a World object, the Simulation that steps it, the recorder every user input goes through and a Camera2D object
+WORLD: World = World()
+SIMULATION: Simulation = Simulation(WORLD)
+RECORDER: InputRecorder = InputRecorder(SIMULATION)
+CAMERA: Camera2D = Camera2D(vector2_zero(), vector2_zero(), 0, 1)
+ORGAN_DETAIL_UI: OrganDetailsUI = OrganDetailsUI(WORLD, RECORDER)
+CREATE_GENE_WINDOW: CreateGeneWindow = CreateGeneWindow(WORLD, RECORDER)
+# Press F3 to show the time spent in every part of the frame
+PROFILER_OVERLAY: ProfilerOverlay = ProfilerOverlay(PROFILER)
+
+# Import handle_input here as it references the WORLD and CAMERA object
+from genesis.input import handle_input
+
+
+def render_ui(input_state: InputState):
+    # Draw the FPS (frames per second) in the top left corner of the screen
+    draw_fps(5, 5)
+    # Draw how many organs were drawn and how many were culled below it
+    draw_text("Drawn: {} Culled: {}".format(WORLD.drawn_organs, WORLD.culled_organs), 5, 25, 10, COLOR_RAY_WHITE)
+    with PROFILER.scope("organ details ui"):
+        ORGAN_DETAIL_UI.render(input_state)
+    with PROFILER.scope("create gene ui"):
+        CREATE_GENE_WINDOW.render()
+    PROFILER_OVERLAY.render()
+
+
+def render_world(input_state: InputState):
+    # Draw the game world, culling everything the camera cannot see and drawing less detail the further out it is
+    with PROFILER.scope("draw"):
+        WORLD.draw(ORGAN_DETAIL_UI, input_state, get_camera_view(), CAMERA.zoom)
+
+
+# Get the rectangle (min x, min y, max x, max y) of the world that is visible through the camera
+def get_camera_view() -> tuple[float, float, float, float]:
+    top_left = get_screen_to_world_2d(vector2_zero(), CAMERA)
+    bottom_right = get_screen_to_world_2d(Vector2(get_screen_width(), get_screen_height()), CAMERA)
+    return top_left.x, top_left.y, bottom_right.x, bottom_right.y
+
+
+# Open the window and run the game loop until it is closed. If a path is given, the inputs of the session are saved
+# there so it can be replayed
+def run(recording_path: Optional[str] = None) -> None:
+    global prev_mouse_position
+
+    # Set the window to be resizable
+    set_config_flags(ConfigFlags.FLAG_WINDOW_RESIZABLE)
+
+    # Initialize the window with a size of 1400x860 and a title of "Genesis"
+    init_window(1400, 860, "Genesis")
+
+    # Disable escape quitting the window
+    set_exit_key(KeyboardKey.KEY_NULL)
+
+    # Center the camera and panning now that the window exists
+    CAMERA.offset = Vector2(get_screen_width() * 0.5, get_screen_height() * 0.5)
+    prev_mouse_position = get_mouse_position()
+
+    scrolling_bg_x: float = 0.0
+    scrolling_bg_y: float = 0.0
+    bg_tex = load_texture(os.path.join(RESOURCES_PATH, "noise.png"))
+
+    # Run the game loop
+    while not window_should_close():
+        # Step the simulation by however many fixed ticks fit in the time this frame took
+        with PROFILER.scope("update"):
+            SIMULATION.advance(get_frame_time())
+
+        # Start drawing to the window
+        begin_drawing()
+
+        # Clear the background to white
+        clear_background(BACKGROUND_COLOR)
+
+        # Renders the background
+        scrolling_bg_x -= 0.008
+        scrolling_bg_y -= 0.005
+        if scrolling_bg_x <= -bg_tex.width*2:
+            scrolling_bg_x = 0
+
+        if scrolling_bg_y <= -bg_tex.height*2:
+            scrolling_bg_y = 0
+
+        draw_texture_ex(bg_tex, Vector2(scrolling_bg_x, scrolling_bg_y), 0.0, 4, BACKGROUND_SCROLL_COLOR)
+        draw_texture_ex(bg_tex, Vector2(bg_tex.width * 4 + scrolling_bg_x, scrolling_bg_y), 0.0, 4, BACKGROUND_SCROLL_COLOR)
+
+        # Handle user input, taking the one snapshot of it the rest of the frame reads from
+        with PROFILER.scope("input"):
+            input_state = handle_input()
+
+        # Set the camera for 2D rendering
+        begin_mode_2d(CAMERA)
+
+        # Renders in world elements
+        render_world(input_state)
+
+        # Reset the camera and stop drawing to the window
+        end_mode_2d()
+
+        # Renders the UI after world so ui elements won't be affected by camera and will be on top of the world elements movement
+        render_ui(input_state)
+
+        end_drawing()
+        PROFILER.end_frame()
+
+    # Close the window when the game loop ends
+    unload_texture(bg_tex)
+    close_window()
+
+    if recording_path is not None:
+        RECORDER.finish().save(recording_path)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pyray import *
+
+# The mouse buttons whose state is captured every frame
+TRACKED_MOUSE_BUTTONS: tuple[int, ...] = (
+    MouseButton.MOUSE_BUTTON_LEFT,
+    MouseButton.MOUSE_BUTTON_RIGHT,
+    MouseButton.MOUSE_BUTTON_MIDDLE
+)
+# The keys whose presses are captured every frame
+TRACKED_KEYS: tuple[int, ...] = (
+    KeyboardKey.KEY_ESCAPE,
+    KeyboardKey.KEY_DELETE,
+    KeyboardKey.KEY_F3
+)
+
+
+# InputState is a snapshot of the mouse and keyboard taken once per frame. World and UI code read the snapshot
+# instead of querying raylib themselves, so the cost of input does not grow with the number of organs, and it
+# can be constructed by hand to fake input without a window
+class InputState:
+    # The position of the mouse on the screen
+    mouse_position: Vector2
+    # The position of the mouse in the world, as seen through the camera
+    mouse_world_position: Vector2
+    # How far the mouse wheel moved this frame
+    mouse_wheel: float
+    # Mouse buttons that went down this frame
+    buttons_pressed: frozenset[int]
+    # Mouse buttons that are held down
+    buttons_down: frozenset[int]
+    # Mouse buttons that went up this frame
+    buttons_released: frozenset[int]
+    # Keys that went down this frame
+    keys_pressed: frozenset[int]
+    # Whether the mouse is over an open UI panel, in which case the world underneath should ignore it
+    over_ui: bool
+
+    def __init__(
+            self,
+            mouse_position: Vector2 = None,
+            mouse_world_position: Vector2 = None,
+            mouse_wheel: float = 0,
+            buttons_pressed: frozenset[int] = frozenset(),
+            buttons_down: frozenset[int] = frozenset(),
+            buttons_released: frozenset[int] = frozenset(),
+            keys_pressed: frozenset[int] = frozenset(),
+            over_ui: bool = False
+    ):
+        self.mouse_position = vector2_zero() if mouse_position is None else mouse_position
+        self.mouse_world_position = vector2_zero() if mouse_world_position is None else mouse_world_position
+        self.mouse_wheel = mouse_wheel
+        self.buttons_pressed = buttons_pressed
+        self.buttons_down = buttons_down
+        self.buttons_released = buttons_released
+        self.keys_pressed = keys_pressed
+        self.over_ui = over_ui
+
+    # Take a snapshot of the current input, looking at the world through the given camera
+    @staticmethod
+    def capture(camera: Camera2D) -> InputState:
+        mouse_position = get_mouse_position()
+        return InputState(
+            mouse_position,
+            get_screen_to_world_2d(mouse_position, camera),
+            get_mouse_wheel_move(),
+            frozenset(button for button in TRACKED_MOUSE_BUTTONS if is_mouse_button_pressed(button)),
+            frozenset(button for button in TRACKED_MOUSE_BUTTONS if is_mouse_button_down(button)),
+            frozenset(button for button in TRACKED_MOUSE_BUTTONS if is_mouse_button_released(button)),
+            frozenset(key for key in TRACKED_KEYS if is_key_pressed(key))
+        )
+
+    def is_button_pressed(self, button: int) -> bool:
+        return button in self.buttons_pressed
+
+    def is_button_down(self, button: int) -> bool:
+        return button in self.buttons_down
+
+    def is_button_released(self, button: int) -> bool:
+        return button in self.buttons_released
+
+    def is_key_pressed(self, key: int) -> bool:
+        return key in self.keys_pressed
+
+    # Check if mouse is over an area in world space
+    def is_mouse_over_world_space(self, x, y, width, height) -> bool:
+        return x < self.mouse_world_position.x < x + width and y < self.mouse_world_position.y < y + height
+
+    # Check if mouse is over an area in screen space
+    def is_mouse_over_screen_space(self, x, y, width, height) -> bool:
+        return x < self.mouse_position.x < x + width and y < self.mouse_position.y < y + height
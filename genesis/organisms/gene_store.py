@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from heapq import heapify, heappop, heappush
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+# The number of slots a new GeneStore starts with, it doubles whenever it runs out
+INITIAL_CAPACITY: int = 64
+# The columns every GeneStore keeps besides its own: the time the linear columns of a slot were last anchored at, and
+# the id of the events currently scheduled for a slot, events with any other id are out of date
+ANCHOR_TIME: str = "anchor_time"
+EVENT_ID: str = "event_id"
+HIDDEN_COLUMN_TYPES: dict[str, Any] = {ANCHOR_TIME: np.float64, EVENT_ID: np.int64}
+# How far, in seconds, past the time a store has been updated to an event can be and still fire. Time is added up one
+# tick at a time, so an event predicted for exactly the end of a tick can come out a rounding error later
+EVENT_TOLERANCE: float = 1e-9
+
+
+# LinearColumn describes a column whose value changes at a fixed rate over time. The column holds the value at the
+# slot's anchor time, and the current value is worked out from it when it is read, so nothing has to be done for it
+# every tick
+class LinearColumn(NamedTuple):
+    # The column holding how much the value changes per second
+    rate: str
+    # 1 if the value grows at its rate, -1 if it shrinks
+    direction: int = 1
+    # The value stops changing once it reaches this, None if it never stops
+    limit: Optional[float] = None
+
+
+# GeneStore holds the scalar state of every gene of one type in a world as NumPy columns indexed by gene slot,
+# so all the genes of that type can be updated with one vectorized operation per tick. Columns that change linearly
+# with time are not updated at all, they are worked out when read, and the moments they cross a threshold are kept
+# in a priority queue so update only has to do the work that is due
+class GeneStore:
+    # The name and dtype of every column in this store, defined by subclasses
+    column_types: dict[str, Any] = {}
+    # The columns that change linearly with time, keyed by name, defined by subclasses
+    linear_columns: dict[str, LinearColumn] = {}
+
+    # The columns of this store, each one a NumPy array indexed by gene slot
+    columns: dict[str, np.ndarray]
+    # Whether each slot is currently occupied by a gene
+    active: np.ndarray
+    # The gene object occupying each slot, or None if the slot has been released
+    genes: list[Optional[Any]]
+    # Released slots that can be reused by the next allocation
+    free_slots: list[int]
+    # The time, in seconds, this store has been updated up to
+    time: float
+    # The predicted events, a heap of (time, event id, slot, kind) ordered by time then by when they were scheduled
+    events: list[tuple[float, int, int, str]]
+    # The id the next scheduled events get
+    next_event_id: int
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        column_types = {**self.column_types, **HIDDEN_COLUMN_TYPES}
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in column_types.items()}
+        self.active = np.zeros(capacity, bool)
+        self.genes = []
+        self.free_slots = []
+        self.time = 0.0
+        self.events = []
+        self.next_event_id = 1
+
+    def __len__(self) -> int:
+        return len(self.genes) - len(self.free_slots)
+
+    # The number of slots the columns currently have room for
+    def capacity(self) -> int:
+        return len(self.active)
+
+    # Give the gene a slot in this store, filling its columns with the given values. Returns the slot
+    def allocate(self, gene, values: dict[str, Any]) -> int:
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.genes[slot] = gene
+        else:
+            slot = len(self.genes)
+            self.genes.append(gene)
+            if slot >= self.capacity():
+                self.__grow(self.capacity() * 2)
+
+        for name, value in values.items():
+            self.columns[name][slot] = value
+        self.columns[ANCHOR_TIME][slot] = self.time
+        self.active[slot] = True
+        self.schedule(slot)
+        return slot
+
+    # Free the given slot and return the values it held, so the gene can keep them while detached
+    def release(self, slot: int) -> dict[str, Any]:
+        values = {name: self.get(name, slot) for name in self.column_types}
+
+        # Zero the slot so vectorized updates leave it untouched, and its events are out of date
+        for column in self.columns.values():
+            column[slot] = 0
+        self.active[slot] = False
+        self.genes[slot] = None
+        self.free_slots.append(slot)
+        return values
+
+    # Get the current value of a column for the given slot
+    def get(self, name: str, slot: int) -> Any:
+        linear = self.linear_columns.get(name)
+        if linear is None:
+            return self.columns[name][slot].item()
+
+        value = self.columns[name][slot] + linear.direction * self.columns[linear.rate][slot] * (self.time - self.columns[ANCHOR_TIME][slot])
+        if linear.limit is not None:
+            value = max(value, linear.limit) if linear.direction < 0 else min(value, linear.limit)
+        return float(value)
+
+    # Set the value of a column for the given slot. Setting a linear column or its rate starts the slot's linear
+    # columns over from their current values, and the events predicted for the slot are scheduled again
+    def set(self, name: str, slot: int, value: Any) -> None:
+        if name not in self.linear_columns and not any(linear.rate == name for linear in self.linear_columns.values()):
+            self.columns[name][slot] = value
+            self.schedule(slot)
+            return
+
+        for linear_name in self.linear_columns:
+            self.columns[linear_name][slot] = self.get(linear_name, slot)
+        self.columns[ANCHOR_TIME][slot] = self.time
+        self.columns[name][slot] = value
+        self.schedule(slot)
+
+    # Get the current value of a column for every slot handed out so far
+    def current(self, name: str) -> np.ndarray:
+        linear = self.linear_columns.get(name)
+        if linear is None:
+            return self.column(name)
+
+        values = self.column(name) + linear.direction * self.column(linear.rate) * (self.time - self.column(ANCHOR_TIME))
+        if linear.limit is not None:
+            values = np.maximum(values, linear.limit) if linear.direction < 0 else np.minimum(values, linear.limit)
+        return values
+
+    # Get the events the given slot is headed for, as (time, kind) pairs, from its values at its anchor time.
+    # Defined by subclasses that react to their linear columns crossing a threshold
+    def predict(self, slot: int) -> list[tuple[float, str]]:
+        return []
+
+    # React to an event predicted for the given slot happening, defined by subclasses
+    def fire(self, slot: int, kind: str) -> None:
+        pass
+
+    # Throw away the events predicted for the slot and predict them again from its current values
+    def schedule(self, slot: int) -> None:
+        event_id = self.next_event_id
+        self.next_event_id += 1
+        self.columns[EVENT_ID][slot] = event_id
+        for time, kind in self.predict(slot):
+            heappush(self.events, (time, event_id, slot, kind))
+
+        # Events that went out of date stay in the heap until they come up, drop them once they outnumber the rest
+        if len(self.events) > 2 * len(self) + INITIAL_CAPACITY:
+            event_ids = self.columns[EVENT_ID]
+            self.events = [event for event in self.events if event_ids[event[2]] == event[1]]
+            heapify(self.events)
+
+    # Advance this store by the given amount of time, in seconds, firing every event that happens on the way. Work
+    # is only done for the events that are due, however many genes the store holds
+    def update(self, dt: float) -> None:
+        self.time += dt
+        events = self.events
+        event_ids = self.columns[EVENT_ID]
+        while events and events[0][0] <= self.time + EVENT_TOLERANCE:
+            _, event_id, slot, kind = heappop(events)
+            if event_ids[slot] == event_id:
+                self.fire(slot, kind)
+
+    # The slice of a column that covers every slot handed out so far. Linear columns hold their value at the slot's
+    # anchor time, use current to get their value now
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][:len(self.genes)]
+
+    def __grow(self, capacity: int) -> None:
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+        grown_active = np.zeros(capacity, bool)
+        grown_active[:len(self.active)] = self.active
+        self.active = grown_active
+
+
+# GeneField is an attribute of a StoredGene that reads and writes the gene's slot in its GeneStore, or a plain
+# value kept on the gene while it is not part of a world
+class GeneField:
+    # The name of the column this field maps to
+    name: str
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.name = name
+
+    def __get__(self, gene, owner=None):
+        if gene is None:
+            return self
+        if gene.store is None:
+            return gene.detached_values[self.name]
+        return gene.store.get(self.name, gene.slot)
+
+    def __set__(self, gene, value) -> None:
+        if gene.store is None:
+            gene.detached_values[self.name] = value
+        else:
+            gene.store.set(self.name, gene.slot, value)
+
+
+# StoredGene is a mixin for genes whose scalar state lives in a world's GeneStore. It must be listed before Gene
+# in the bases of a gene class so its attach and detach take precedence
+class StoredGene:
+    # The type of GeneStore that holds genes of this type
+    store_type: type[GeneStore]
+
+    # The store this gene currently lives in, None while its organ is not in a world
+    store: Optional[GeneStore]
+    # The slot of this gene in its store
+    slot: Optional[int]
+    # The values of this gene's fields while it is not in a store
+    detached_values: dict[str, Any]
+
+    def __init__(self, *args, **kwargs):
+        self.store = None
+        self.slot = None
+        self.detached_values = {}
+        super().__init__(*args, **kwargs)
+
+    # Every field of a stored gene is saved in world snapshots
+    def get_snapshot_state(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.store_type.column_types}
+
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        for name in self.store_type.column_types:
+            setattr(self, name, state[name])
+
+    # Move this gene's state into the store of the given world
+    def attach(self, world) -> None:
+        if self.store is not None:
+            return
+        store = world.gene_store(self.store_type)
+        self.slot = store.allocate(self, self.detached_values)
+        self.store = store
+        self.detached_values = {}
+
+    # Move this gene's state out of its store and back onto the gene
+    def detach(self) -> None:
+        if self.store is None:
+            return
+        self.detached_values = self.store.release(self.slot)
+        self.store = None
+        self.slot = None
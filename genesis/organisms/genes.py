@@ -1,23 +1,61 @@
-from typing import Callable
-from pyray import get_frame_time, Color, gui_label, Rectangle, gui_color_picker, gui_slider_bar, gui_dropdown_box
+from typing import Any, Callable
+
+import numpy as np
+from pyray import Color, gui_label, Rectangle, gui_color_picker, gui_slider_bar, gui_dropdown_box
 from raylib._raylib_cffi import ffi
 
+from genesis.organisms.gene_store import GeneStore, GeneField, StoredGene, LinearColumn, ANCHOR_TIME
 from genesis.organisms.organ import Gene, Organ
 from genesis.utils.colors import COLOR_WHITE
-from genesis.utils.shape import Shape
-from genesis.utils.utilities import color_str, color_compare, color_cpy
+from genesis.utils.shape import Shape, SHAPE_TYPES
+from genesis.utils.utilities import color_str, color_compare, color_cpy, float_changed
+
+
+# MaturityGeneStore holds the maturity of every MaturityGene in a world. Maturity grows at a fixed rate, so it is
+# worked out when read, and every gene is matured at the tick its maturity is predicted to reach max_maturity
+class MaturityGeneStore(GeneStore):
+    column_types = {
+        "max_maturity": np.float64,
+        "current_maturity": np.float64,
+        "maturity_rate": np.float64,
+        "reached_max_maturity": np.bool_,
+    }
+    linear_columns = {
+        "current_maturity": LinearColumn("maturity_rate")
+    }
+
+    def predict(self, slot: int) -> list[tuple[float, str]]:
+        columns = self.columns
+        if columns["reached_max_maturity"][slot]:
+            return []
+        remaining = columns["max_maturity"][slot] - columns["current_maturity"][slot]
+        if remaining <= 0:
+            return [(self.time, "mature")]
+        rate = columns["maturity_rate"][slot]
+        if rate <= 0:
+            return []
+        return [(columns[ANCHOR_TIME][slot] + remaining / rate, "mature")]
+
+    # Mark the gene as mature and call its on_mature callback
+    def fire(self, slot: int, kind: str) -> None:
+        self.columns["reached_max_maturity"][slot] = True
+        gene = self.genes[slot]
+        if gene is not None and gene.on_mature is not None:
+            gene.on_mature(gene.organ)
 
 
 # MaturityGene is a Gene that tracks the maturity of an Organ
-class MaturityGene(Gene):
+class MaturityGene(StoredGene, Gene):
+    store_type = MaturityGeneStore
+
     # The maximum maturity level that this Organ can reach
-    max_maturity: int
+    max_maturity = GeneField()
     # The current maturity level of this Organ
-    current_maturity: float
+    current_maturity = GeneField()
     # Speed modifier of how fast this Organ will mature
-    maturity_rate: float
+    maturity_rate = GeneField()
     # Whether this Organ has reached its maximum maturity
-    reached_max_maturity: bool
+    reached_max_maturity = GeneField()
     # A callback function that is called when the Organ reaches its maximum maturity
     on_mature: Callable[[Organ], None]
 
@@ -31,24 +69,31 @@ class MaturityGene(Gene):
         self.reached_max_maturity = False
         self.on_mature = on_mature
 
-    # Update the current_maturity attribute every frame
-    def update(self) -> None:
-        self.current_maturity += get_frame_time() * self.maturity_rate
+    def get_snapshot_state(self) -> dict[str, Any]:
+        state = super().get_snapshot_state()
+        state["on_mature"] = self.on_mature
+        return state
 
-        # If the current_maturity has reached the max_maturity, set reached_max_maturity to True and call the
-        # on_mature callback
-        if self.current_maturity >= self.max_maturity:
-            self.reached_max_maturity = True
-            if self.on_mature is not None:
-                self.on_mature(self.organ)
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        super().set_snapshot_state(state)
+        self.on_mature = state["on_mature"]
 
     def draw_gene_details(self, ui) -> None:
-        self.current_maturity = gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.current_maturity, 0, self.max_maturity)
-        gui_label(ui.full_rect_in_panel(20), "  Maturity: {:.2f}/{:.2f}".format(self.current_maturity, self.max_maturity))
+        # Only set what was changed, setting maturity or its rate starts the maturity over from its current value
+        current_maturity = self.current_maturity
+        changed_maturity = gui_slider_bar(ui.full_rect_in_panel(20), "", "", current_maturity, 0, self.max_maturity)
+        if float_changed(current_maturity, changed_maturity):
+            ui.recorder.set_gene_field(self.organ, MaturityGene, "current_maturity", changed_maturity)
+            current_maturity = changed_maturity
+        gui_label(ui.full_rect_in_panel(20), "  Maturity: {:.2f}/{:.2f}".format(current_maturity, self.max_maturity))
         ui.add_spacing(20)
 
-        self.maturity_rate = gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.maturity_rate, 0,self.max_maturity)
-        gui_label(ui.full_rect_in_panel(20), "  Maturity Rate: {:.2f}".format(self.maturity_rate))
+        maturity_rate = self.maturity_rate
+        changed_rate = gui_slider_bar(ui.full_rect_in_panel(20), "", "", maturity_rate, 0, self.max_maturity)
+        if float_changed(maturity_rate, changed_rate):
+            ui.recorder.set_gene_field(self.organ, MaturityGene, "maturity_rate", changed_rate)
+            maturity_rate = changed_rate
+        gui_label(ui.full_rect_in_panel(20), "  Maturity Rate: {:.2f}".format(maturity_rate))
         ui.add_spacing(20)
 
 
@@ -70,26 +115,41 @@ class ColorGene(Gene):
             return
         self.old_color = self.organ.shape.color
         self.organ.shape.color = self.color
+        self.organ.invalidate_appearance()
 
     def uninitialize(self) -> None:
         if self.organ.shape is None:
             return
         self.organ.shape.color = self.old_color
+        self.organ.invalidate_appearance()
+
+    def get_snapshot_state(self) -> dict[str, Any]:
+        return {"color": self.color, "old_color": getattr(self, "old_color", self.color)}
+
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        self.color = state["color"]
+        self.old_color = state["old_color"]
+
+    # Setting the color also colors the Organ's Shape
+    def set_field(self, name: str, value: Any) -> None:
+        super().set_field(name, value)
+        if name == "color" and self.organ.shape is not None:
+            self.organ.shape.color = self.color
+            self.organ.invalidate_appearance()
 
     def draw_gene_details(self, ui) -> None:
         # Display the color of the organ
         gui_label(ui.full_rect_in_panel(10), "Color: {}".format(color_str(self.color)))
         ui.add_spacing(10)
-        color_last_frame = color_cpy(self.color)
-        self.color = gui_color_picker(
+        picked_color = gui_color_picker(
             Rectangle(ui.relative_to_panel_x(0), ui.relative_to_panel_y(ui.y_level), 60, 60),
             "Color",
-            self.color
+            color_cpy(self.color)
         )
         ui.add_spacing(60)
 
-        if not color_compare(self.color, color_last_frame):
-            self.organ.shape.color = self.color
+        if not color_compare(picked_color, self.color):
+            ui.recorder.set_gene_field(self.organ, ColorGene, "color", picked_color)
 
 
 # ShapeGene is a Gene that sets the Shape of an Organ
@@ -106,71 +166,128 @@ class ShapeGene(Gene):
         # Initialize the shape attribute
         self.shape = shape
 
-        shape_types = Shape.__subclasses__()
-        try:
-            index = shape_types.index(self.shape.__class__)
-        except ValueError:
-            index = 0
-
-        self.selected_shape = ffi.new("int *", index)
+        self.selected_shape = ffi.new("int *", SHAPE_TYPES.index_of(self.shape.__class__))
         self.selecting_shape = False
 
     # Set the Shape of the Organ when the Gene is initialized
     def initialize(self) -> None:
         self.organ.shape = self.shape
+        self.organ.refresh_bounds()
+        self.organ.invalidate_appearance()
 
     def uninitialize(self) -> None:
         self.organ.shape = None
+        self.organ.refresh_bounds()
+        self.organ.invalidate_appearance()
+
+    def get_snapshot_state(self) -> dict[str, Any]:
+        return {"shape": self.shape}
+
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        self.shape = state["shape"]
+        self.selected_shape[0] = SHAPE_TYPES.index_of(self.shape.__class__)
+
+    # Setting the shape gives it to the Organ, the genes are initialized again so they apply to the new shape
+    def set_field(self, name: str, value: Any) -> None:
+        super().set_field(name, value)
+        if name == "shape":
+            self.selected_shape[0] = SHAPE_TYPES.index_of(self.shape.__class__)
+            self.organ.initialize_genes()
 
     def draw_gene_details(self, ui) -> None:
         # Display the shape of the organ
         last_selected = self.selected_shape[0]
 
-        shape_types = Shape.__subclasses__()
-        options = ""
-        for shape_type in shape_types:
-            options += shape_type.__name__ + ";"
-
-        if gui_dropdown_box(ui.full_rect_in_panel(20), options[:-1], self.selected_shape, self.selecting_shape):
+        if gui_dropdown_box(ui.full_rect_in_panel(20), SHAPE_TYPES.options(), self.selected_shape, self.selecting_shape):
             self.selecting_shape = not self.selecting_shape
         ui.add_spacing(20)
 
         if self.selecting_shape:
-            ui.add_spacing(len(shape_types) * 22)
+            ui.add_spacing(len(SHAPE_TYPES) * 22)
 
         if self.selected_shape[0] != last_selected:
-            self.shape = shape_types[self.selected_shape[0]]()
-            self.organ.initialize_genes()
-
-        self.shape.draw_shape_detail_in_ui(ui)
+            ui.recorder.set_gene_field(self.organ, ShapeGene, "shape", SHAPE_TYPES[self.selected_shape[0]]())
+
+        # The shape's parameters can be changed from its details, e.g. the side count of a polygon, which gives the
+        # organ a new shape with the changed parameters
+        params = self.shape.get_snapshot_params()
+        changed_params = self.shape.draw_shape_detail_in_ui(ui)
+        if changed_params != params:
+            shape = self.shape.from_snapshot_params(changed_params, self.shape.rotation, self.shape.color)
+            ui.recorder.set_gene_field(self.organ, ShapeGene, "shape", shape)
+
+
+# EnergyGeneStore holds the energy of every EnergyGene in a world. Energy depletes at a fixed rate until it runs out,
+# so it is worked out when read, and every gene starves at the tick its energy is predicted to reach zero
+class EnergyGeneStore(GeneStore):
+    column_types = {
+        "energy_level": np.float64,
+        "energy_depletion_rate": np.float64,
+    }
+    linear_columns = {
+        "energy_level": LinearColumn("energy_depletion_rate", -1, 0)
+    }
+
+    def predict(self, slot: int) -> list[tuple[float, str]]:
+        columns = self.columns
+        energy_level = columns["energy_level"][slot]
+        rate = columns["energy_depletion_rate"][slot]
+        if energy_level <= 0 or rate <= 0:
+            return []
+        return [(columns[ANCHOR_TIME][slot] + energy_level / rate, "starve")]
+
+    # Call the on_starve callback of the gene
+    def fire(self, slot: int, kind: str) -> None:
+        gene = self.genes[slot]
+        if gene is not None and gene.on_starve is not None:
+            gene.on_starve(gene.organ)
 
 
 # HungerGene restricts the organ with energy
-class EnergyGene(Gene):
+class EnergyGene(StoredGene, Gene):
+    store_type = EnergyGeneStore
+
     max_energy_level: int
-    energy_level: float
-    energy_depletion_rate: float
+    energy_level = GeneField()
+    energy_depletion_rate = GeneField()
+    # A callback function that is called when the Organ runs out of energy
+    on_starve: Callable[[Organ], None]
 
-    def __init__(self, organ: Organ, max_energy_level: int = 100, energy_depletion_rate: float = 1):
+    def __init__(self, organ: Organ, max_energy_level: int = 100, energy_depletion_rate: float = 1, on_starve: Callable[[Organ], None] = None):
         super().__init__(organ, True)
         self.max_energy_level = max_energy_level
         self.energy_level = max_energy_level
         self.energy_depletion_rate = energy_depletion_rate
+        self.on_starve = on_starve
 
-    def update(self) -> None:
-        if self.energy_level <= 0:
-            return
+    def get_snapshot_state(self) -> dict[str, Any]:
+        state = super().get_snapshot_state()
+        state["max_energy_level"] = self.max_energy_level
+        state["on_starve"] = self.on_starve
+        return state
 
-        self.energy_level -= get_frame_time() * self.energy_depletion_rate
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        super().set_snapshot_state(state)
+        self.max_energy_level = state["max_energy_level"]
+        self.on_starve = state["on_starve"]
 
     def replenish(self) -> None:
         self.energy_level = self.max_energy_level
 
     def draw_gene_details(self, ui) -> None:
-        self.energy_level = gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.energy_level, 0,self.max_energy_level)
-        gui_label(ui.full_rect_in_panel(20), "  Energy: {:.2f}/{:.2f}".format(self.energy_level, self.max_energy_level))
+        # Only set what was changed, setting energy or its depletion rate starts the energy over from its current value
+        energy_level = self.energy_level
+        changed_energy = gui_slider_bar(ui.full_rect_in_panel(20), "", "", energy_level, 0, self.max_energy_level)
+        if float_changed(energy_level, changed_energy):
+            ui.recorder.set_gene_field(self.organ, EnergyGene, "energy_level", changed_energy)
+            energy_level = changed_energy
+        gui_label(ui.full_rect_in_panel(20), "  Energy: {:.2f}/{:.2f}".format(energy_level, self.max_energy_level))
         ui.add_spacing(20)
 
-        self.energy_depletion_rate = gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.energy_depletion_rate, 0, self.max_energy_level)
-        gui_label(ui.full_rect_in_panel(20), "  Depletion Rate: {:.2f}".format(self.energy_depletion_rate))
+        energy_depletion_rate = self.energy_depletion_rate
+        changed_rate = gui_slider_bar(ui.full_rect_in_panel(20), "", "", energy_depletion_rate, 0, self.max_energy_level)
+        if float_changed(energy_depletion_rate, changed_rate):
+            ui.recorder.set_gene_field(self.organ, EnergyGene, "energy_depletion_rate", changed_rate)
+            energy_depletion_rate = changed_rate
+        gui_label(ui.full_rect_in_panel(20), "  Depletion Rate: {:.2f}".format(energy_depletion_rate))
         ui.add_spacing(20)
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 from abc import ABC
-from typing import Optional, Callable
-from events import Events
-from pyray import is_mouse_button_released
+from math import inf
+from typing import Any, Optional, Callable, TYPE_CHECKING, TypeVar
 
 from genesis.utils.shape import Shape, RectangleShape
-from genesis.utils.utilities import darken_color, lighten_color
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.utils.slot_map import Handle
+from genesis.utils.type_registry import TypeRegistry
+from genesis.utils.utilities import darken_color, lighten_color, rect_intersects, rect_union
+
+if TYPE_CHECKING:
+    from genesis.world import World
+
+G = TypeVar("G", bound="Gene")
+
+
+# Every type of gene, each subclass of Gene registers itself when it is defined
+GENE_TYPES: TypeRegistry[Gene] = TypeRegistry()
 
 
 # Gene is an abstract class that represents a genetic trait in an Organ
@@ -15,6 +26,16 @@ class Gene(ABC):
     organ: Organ
     # Whether this Gene is dominant or recessive
     dominant: bool
+    # Whether genes of this type do anything in update, only those are updated by the world
+    overrides_update: bool = False
+    # The time, in seconds, between updates of genes of this type, None to update them every tick. Slow processes
+    # can update less often, they are handed all the time that passed since their last update
+    update_period: Optional[float] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.overrides_update = cls.update is not Gene.update
+        GENE_TYPES.register(cls)
 
     def __init__(self, organ: Organ, dominant: bool):
         # Initialize the organ and dominant attributes
@@ -25,18 +46,42 @@ class Gene(ABC):
     def initialize(self) -> None:
         pass
 
-    # This method is called every frame
-    def update(self) -> None:
+    # This method is called every tick, or every update_period, with the amount of time, in seconds, that passed since
+    # it was last called. The world only calls it for gene types that override it
+    def update(self, dt: float) -> None:
         pass
 
     # This method is called when Gene is about to be removed from an organ
     def uninitialize(self) -> None:
         pass
 
-    # This method is called to draw details about this gene in the OrganDetailsUI
+    # This method is called when the organ carrying this Gene enters a world
+    def attach(self, world) -> None:
+        pass
+
+    # This method is called when the organ carrying this Gene leaves its world, or the Gene is removed from it
+    def detach(self) -> None:
+        pass
+
+    # This method is called to draw details about this gene in the OrganDetailsUI. Changes made in it go through
+    # the ui's recorder, so the session can be replayed
     def draw_gene_details(self, ui) -> None:
         pass
 
+    # Set a field of this gene to a value picked in the OrganDetailsUI, called when the recorder applies the change.
+    # Genes whose fields take more than being assigned to take effect override it
+    def set_field(self, name: str, value: Any) -> None:
+        setattr(self, name, value)
+
+    # Get the state of this gene that is saved in world snapshots. Values can be bools, ints, floats, Colors, Shapes
+    # or callbacks, which are saved by name and must be defined at the top level of a module
+    def get_snapshot_state(self) -> dict[str, Any]:
+        return {}
+
+    # Restore the state of this gene from a world snapshot
+    def set_snapshot_state(self, state: dict[str, Any]) -> None:
+        pass
+
 
 # Organ is a class that represents a functional unit in an organism. It has DNA and child organs,
 # and it can update itself, draw itself, and remove itself.
@@ -54,26 +99,46 @@ class Organ:
     dna: list[Gene]
     # The list of dominant genes that belong to this organ
     dominant_dna: list[Gene]
+    # Every gene of this organ keyed by its class, an organ carries at most one gene of each class
+    genes: dict[type[Gene], Gene]
 
     # The list of child organs belonging to this organ
     children_organs: list[Organ]
     # The parent organ of this organ, if it has one
     parent_organ: Optional[Organ]
+    # The world this organ lives in, None until it has been spawned
+    world: Optional[World]
+    # The position of this organ in its parent's children_organs
+    child_index: int
+    # The handle of this organ in its world's organs, None while it is not in a world
+    handle: Optional[Handle]
+    # The handle of this organ in its world's organisms, only root organs have one
+    organism_handle: Optional[Handle]
 
     # The shape of this organ
     shape: Shape
 
-    # The x-coordinate of this organ in the world
-    world_x: int
-    # The y-coordinate of this organ in the world
-    world_y: int
-    # The x-coordinate of this organ in the local space relative to its parent
+    # Cached world space bounds (min x, min y, max x, max y) of the shapes of this organ and all of its descendants
+    subtree_bounds: Optional[tuple[float, float, float, float]]
+    # Cached number of organs in the subtree of this organ, including itself
+    subtree_size: int
+    # Whether the cached subtree bounds and size are out of date
+    subtree_bounds_dirty: bool
+    # Whether the look of this organ or one of its descendants changed since the organism was last drawn into its
+    # cached texture. A dirty organ always has dirty ancestors, so the root tells if the whole organism changed
+    appearance_dirty: bool
+
+    # The x-coordinate of this organ in the local space relative to its parent, or in the world for root organs.
+    # Local positions are the source of truth, world positions are derived from them
     local_x: int
-    # The y-coordinate of this organ in the local space relative to its parent
+    # The y-coordinate of this organ in the local space relative to its parent, or in the world for root organs
     local_y: int
-
-    # Things this organism wants to do but only if there is organs to receive it will it have an effect
-    urges: Events
+    # The world position of this organ as of the last time its transform was resolved
+    resolved_world_x: float
+    resolved_world_y: float
+    # Whether this organ or one of its ancestors moved since its world position was last resolved. A dirty organ
+    # always has dirty descendants
+    transform_dirty: bool
 
     def __init__(self, dna: list[Callable[[Organ], Gene]]):
         self.to_remove = False
@@ -83,77 +148,183 @@ class Organ:
 
         self.dna = []
         self.dominant_dna = []
+        self.genes = {}
 
         self.children_organs = []
         self.parent_organ = None
+        self.world = None
+        self.child_index = 0
+        self.handle = None
+        self.organism_handle = None
 
         self.shape = Shape.empty()
-        self.move_pos_local_space(0, 0)
 
-        self.urges = Events((
-            "on_walk",
-            "on_ingest",
-            "on_digest"
-        ))
+        self.subtree_bounds = None
+        self.subtree_size = 1
+        self.subtree_bounds_dirty = True
+        self.appearance_dirty = True
+
+        self.resolved_world_x = 0
+        self.resolved_world_y = 0
+        self.transform_dirty = False
+        self.move_pos_local_space(0, 0)
 
         # Create the genes specified in the dna list and add them to the appropriate list
         for gene_constructor in dna:
             created_gene = gene_constructor(self)
+            if created_gene.__class__ in self.genes:
+                continue
+            self.genes[created_gene.__class__] = created_gene
             if created_gene.dominant:
                 self.dominant_dna.append(created_gene)
             else:
                 self.dna.append(created_gene)
 
-    # Update this organ and all of its children
-    def update(self) -> None:
-        if not self.initialized:
-            self.initialize_genes()
-
-        # Update the genes
-        for gene in self.dna:
-            gene.update()
-
-        for gene in self.dominant_dna:
-            gene.update()
-
-        # Update the child organs
-        for organ in self.children_organs:
-            organ.update()
-
-    # Draw this organ and all of its children
-    def draw(self, organ_detail_ui) -> None:
-        # If genes have not been initialized we do not draw
-        if not self.initialized:
-            return
-
-        # Draw the child organs
-        for organ in self.children_organs:
-            organ.draw(organ_detail_ui)
-
-        # Draw this organ if it has a shape
+    # Add this organ and all of its children to the batch of shapes to draw this frame. Subtrees whose bounds fall
+    # outside the given view rectangle (min x, min y, max x, max y) are skipped. Returns the number of organs that
+    # were culled. The tree is walked with a stack, so organisms of any depth can be drawn
+    def draw(self, batch: ShapeBatch, view: Optional[tuple[float, float, float, float]] = None) -> int:
+        culled = 0
+        # Every organ is drawn after its children, so it is put back on the stack under them
+        stack = [(self, False)]
+        while stack:
+            organ, children_drawn = stack.pop()
+            if children_drawn:
+                # Draw this organ if it has a shape
+                if organ.shape is not None and not organ.shape.is_empty:
+                    organ.shape.add_to_batch(batch, int(organ.world_x), int(organ.world_y))
+                continue
+
+            # If genes have not been initialized we do not draw
+            if not organ.initialized:
+                continue
+
+            # Skip this organ and its whole subtree if none of it can be seen
+            if view is not None:
+                bounds = organ.get_subtree_bounds()
+                if bounds is None or not rect_intersects(bounds, view):
+                    culled += organ.get_subtree_size()
+                    continue
+
+            stack.append((organ, True))
+            stack.extend((child, False) for child in reversed(organ.children_organs))
+        return culled
+
+    # Darken the color of this organ's shape while the mouse hovers over it, and restore it once the mouse leaves
+    def set_hovered(self, hovered: bool) -> None:
         if self.shape is None or self.shape.is_empty:
-            return 
-
-        self.shape.render(int(self.world_x), int(self.world_y))
-
-        from genesis.input import is_mouse_over_world_space, is_mouse_over_ui
-
-        if is_mouse_over_ui():
             return
 
-        # If mouse is hovering over, display options
-        if is_mouse_over_world_space(self.shape.apply_x_offset(self.world_x), self.shape.apply_y_offset(self.world_y), self.shape.get_width(), self.shape.get_height()):
-            if is_mouse_button_released(0):
-                if organ_detail_ui.organ is not self:
-                    organ_detail_ui.organ = self
-            if not self.darkened:
-                self.shape.color = darken_color(self.shape.color)
-                self.darkened = True
-                self.lightened = False
-        elif not self.lightened:
+        if hovered and not self.darkened:
+            self.shape.color = darken_color(self.shape.color)
+            self.darkened = True
+            self.lightened = False
+            self.invalidate_appearance()
+        elif not hovered and not self.lightened:
             self.shape.color = lighten_color(self.shape.color)
             self.lightened = True
             self.darkened = False
+            self.invalidate_appearance()
+
+    # Get the world space bounds (x, y, width, height) of this organ's shape, None if it has no shape
+    def get_bounds(self) -> Optional[tuple[float, float, float, float]]:
+        if self.shape is None or self.shape.is_empty:
+            return None
+        return (
+            self.shape.apply_x_offset(self.world_x),
+            self.shape.apply_y_offset(self.world_y),
+            self.shape.get_width(),
+            self.shape.get_height()
+        )
+
+    # Refresh the cached bounds of this organ and its entry in its world's picking index, called whenever its
+    # position or shape changes
+    def refresh_bounds(self) -> None:
+        self.invalidate_subtree_bounds()
+        if self.world is not None:
+            self.world.refresh_bounds(self)
+
+    # Mark the cached subtree bounds of this organ and all of its ancestors as out of date
+    def invalidate_subtree_bounds(self) -> None:
+        organ = self
+        # An organ that is already dirty always has dirty ancestors, so we can stop there
+        while organ is not None and not organ.subtree_bounds_dirty:
+            organ.subtree_bounds_dirty = True
+            if organ.parent_organ is None and organ.world is not None:
+                organ.world.level_of_detail.mark(organ)
+            organ = organ.parent_organ
+
+    # Mark the cached texture of the organism this organ belongs to as out of date, called whenever the shape, color,
+    # local position or genes of one of its organs change. Moving the root alone does not change how it looks
+    def invalidate_appearance(self) -> None:
+        organ = self
+        while organ.parent_organ is not None:
+            # An organ that is already dirty always has dirty ancestors, so we can stop there
+            if organ.appearance_dirty:
+                return
+            organ.appearance_dirty = True
+            organ = organ.parent_organ
+        organ.appearance_dirty = True
+        if organ.world is not None:
+            organ.world.level_of_detail.mark(organ)
+
+    # Get the bounds (min x, min y, max x, max y) of the shapes of this organ and all of its descendants, None if
+    # none of them has a shape
+    def get_subtree_bounds(self) -> Optional[tuple[float, float, float, float]]:
+        if self.subtree_bounds_dirty:
+            self.__compute_subtree_bounds()
+        return self.subtree_bounds
+
+    # Get the number of organs in the subtree of this organ, including itself
+    def get_subtree_size(self) -> int:
+        if self.subtree_bounds_dirty:
+            self.__compute_subtree_bounds()
+        return self.subtree_size
+
+    # Compute the subtree bounds and size of this organ and of every dirty organ below it, children first. Clean
+    # subtrees are not walked, their cached bounds are used
+    def __compute_subtree_bounds(self) -> None:
+        stack = [(self, False)]
+        while stack:
+            organ, children_computed = stack.pop()
+            if not children_computed:
+                stack.append((organ, True))
+                stack.extend((child, False) for child in organ.children_organs if child.subtree_bounds_dirty)
+                continue
+
+            bounds = organ.get_bounds()
+            if bounds is not None:
+                x, y, width, height = bounds
+                bounds = (x, y, x + width, y + height)
+
+            size = 1
+            for child in organ.children_organs:
+                size += child.subtree_size
+                child_bounds = child.subtree_bounds
+                if child_bounds is not None:
+                    bounds = child_bounds if bounds is None else rect_union(bounds, child_bounds)
+
+            organ.subtree_bounds = bounds
+            organ.subtree_size = size
+            organ.subtree_bounds_dirty = False
+
+    # The position of this organ in the order organs are drawn in, organs with a greater key are drawn on top.
+    # Roots and children are drawn in list order and every organ after all of its children
+    def draw_order(self) -> tuple:
+        path = [inf]
+        organ = self
+        while organ.parent_organ is not None:
+            path.append(organ.child_index)
+            organ = organ.parent_organ
+        path.append(0 if organ.world is None else organ.world.organisms.position(organ.organism_handle))
+        path.reverse()
+        return tuple(path)
+
+    # Raise something this organism wants to do, it is handed to the world's listeners at the end of the tick. Only
+    # if there is organs to receive it will it have an effect
+    def urge(self, urge: str, payload: Any = None) -> None:
+        if self.world is not None:
+            self.world.urges.raise_urge(urge, self, payload)
 
     # Draw custom organ details if there is any
     def draw_organ_details(self, ui):
@@ -163,70 +334,202 @@ class Organ:
 
     # Mark this organ for removal and remove it from its parent's children list
     def remove(self) -> None:
-        self.to_remove = True
+        if self.to_remove:
+            return
+
+        # Root organs are taken out of the world's organisms at the end of the tick
+        if self.parent_organ is None and self.world is not None:
+            self.world.despawn(self)
+
+        self.detach()
         if self.parent_organ is not None:
-            self.parent_organ.children_organs.remove(self)
-        if len(self.children_organs):
-            for child in self.children_organs:
-                child.remove()
+            self.parent_organ.remove_child_organ(self)
+
+        # Mark the whole subtree, it goes away together with this organ
+        stack = [self]
+        while stack:
+            organ = stack.pop()
+            organ.to_remove = True
+            stack.extend(organ.children_organs)
 
     # Add a child organ to this organ
     def add_child_organ(self, organ: Organ) -> None:
+        organ.child_index = len(self.children_organs)
         self.children_organs.append(organ)
         organ.parent_organ = self
-        organ.move_pos_local_space(organ.local_x, organ.local_y)
+        self.invalidate_subtree_bounds()
+        self.invalidate_appearance()
+        # The local position of the organ is now relative to this organ
+        organ.invalidate_transform()
+        if self.world is not None:
+            organ.attach(self.world)
+
+    # Remove a child organ from this organ by moving the last child into its place
+    def remove_child_organ(self, organ: Organ) -> None:
+        last_organ = self.children_organs.pop()
+        if last_organ is not organ:
+            self.children_organs[organ.child_index] = last_organ
+            last_organ.child_index = organ.child_index
+        self.invalidate_subtree_bounds()
+        self.invalidate_appearance()
+
+    # Bind this organ, its genes and all of its children to the given world, parents before their children
+    def attach(self, world: World) -> None:
+        stack = [self]
+        while stack:
+            organ = stack.pop()
+            if organ.world is world:
+                continue
+            organ.world = world
+            organ.handle = world.organs.insert(organ)
+            # The genes of new organs are initialized at the start of the world's next tick
+            if not organ.initialized:
+                world.uninitialized_organs.append(organ)
+            # Organs that moved have their bounds refreshed when their transform is resolved, working out their
+            # world position now would walk up every moved ancestor
+            if organ.transform_dirty:
+                organ.invalidate_subtree_bounds()
+                world.dirty_transforms.append(organ)
+            else:
+                organ.refresh_bounds()
+            for gene in organ.genes.values():
+                organ.__attach_gene(gene)
+            stack.extend(reversed(organ.children_organs))
+
+    # Unbind this organ, its genes and all of its children from their world. The genes of an organ are detached
+    # before its children, and the organ leaves the world after them
+    def detach(self) -> None:
+        stack = [(self, False)]
+        while stack:
+            organ, children_detached = stack.pop()
+            if children_detached:
+                organ.world.forget(organ)
+                organ.world = None
+                organ.handle = None
+                continue
+
+            if organ.world is None:
+                continue
+            for gene in organ.genes.values():
+                organ.__detach_gene(gene)
+            stack.append((organ, True))
+            stack.extend((child, False) for child in reversed(organ.children_organs))
 
-    def move_pos_world_space(self, x: int, y: int) -> None:
-        self.world_x = x
-        self.world_y = y
+    # The x-coordinate of this organ in the world
+    @property
+    def world_x(self) -> float:
+        if not self.transform_dirty:
+            return self.resolved_world_x
+        return self.__compute_world_position()[0]
 
+    # The y-coordinate of this organ in the world
+    @property
+    def world_y(self) -> float:
+        if not self.transform_dirty:
+            return self.resolved_world_y
+        return self.__compute_world_position()[1]
+
+    def move_pos_world_space(self, x: int, y: int) -> None:
         if self.parent_organ is not None:
-            self.local_x = self.world_x - self.parent_organ.world_x
-            self.local_y = self.world_y - self.parent_organ.world_y
+            self.move_pos_local_space(x - self.parent_organ.world_x, y - self.parent_organ.world_y)
         else:
-            self.local_x = 0
-            self.local_y = 0
-
-        for child in self.children_organs:
-            child.world_x = self.world_x + child.local_x
-            child.world_y = self.world_y + child.local_y
+            self.move_pos_local_space(x, y)
 
     def move_pos_local_space(self, x: int, y: int) -> None:
         self.local_x = x
         self.local_y = y
-
+        self.invalidate_transform()
         if self.parent_organ is not None:
-            self.world_x = self.local_x + self.parent_organ.world_x
-            self.world_y = self.local_y + self.parent_organ.world_y
-        else:
-            self.world_x = self.local_x
-            self.world_y = self.local_y
-            self.local_x = 0
-            self.local_y = 0
+            self.invalidate_appearance()
+
+    # Mark the world position of this organ and all of its descendants as out of date. They are resolved together
+    # by the world once per tick, so moving an organ many times only walks its subtree once
+    def invalidate_transform(self) -> None:
+        if self.transform_dirty:
+            return
 
-        for child in self.children_organs:
-            child.world_x = self.world_x + child.local_x
-            child.world_y = self.world_y + child.local_y
+        stack = [self]
+        while stack:
+            organ = stack.pop()
+            organ.transform_dirty = True
+            # Dirty organs already have dirty descendants, so only descend into the clean ones
+            stack.extend(child for child in organ.children_organs if not child.transform_dirty)
+
+        if self.world is not None:
+            self.world.dirty_transforms.append(self)
+
+    # Resolve the world position of this organ and every dirty organ below it
+    def resolve_transform(self) -> None:
+        if not self.transform_dirty:
+            return
+
+        stack = [self]
+        while stack:
+            organ = stack.pop()
+            organ.resolved_world_x, organ.resolved_world_y = organ.__compute_world_position()
+            organ.transform_dirty = False
+            organ.refresh_bounds()
+            stack.extend(child for child in organ.children_organs if child.transform_dirty)
+
+    # Walk up to the closest ancestor with a resolved world position and add up the local positions from there
+    def __compute_world_position(self) -> tuple[float, float]:
+        x = self.local_x
+        y = self.local_y
+        organ = self.parent_organ
+        while organ is not None and organ.transform_dirty:
+            x += organ.local_x
+            y += organ.local_y
+            organ = organ.parent_organ
+
+        if organ is not None:
+            x += organ.resolved_world_x
+            y += organ.resolved_world_y
+        return x, y
 
     def remove_gene(self, gene: Gene) -> None:
-        if gene.dominant and self.dominant_dna.count(gene):
-            gene.uninitialize()
+        if self.genes.get(gene.__class__) is not gene:
+            return
+
+        gene.uninitialize()
+        if self.world is not None:
+            self.__detach_gene(gene)
+        del self.genes[gene.__class__]
+        if gene.dominant:
             self.dominant_dna.remove(gene)
-        elif self.dna.count(gene):
-            gene.uninitialize()
+        else:
             self.dna.remove(gene)
+        self.invalidate_appearance()
 
     def add_gene(self, gene: Gene) -> None:
+        if gene.__class__ in self.genes:
+            return
+
+        self.genes[gene.__class__] = gene
         if gene.dominant:
-            if any(g.__class__ == gene.__class__ for g in self.dominant_dna):
-                return
             self.dominant_dna.append(gene)
         else:
-            if any(g.__class__ == gene.__class__ for g in self.dna):
-                return
             self.dna.append(gene)
 
+        if self.world is not None:
+            self.__attach_gene(gene)
         gene.initialize()
+        self.invalidate_appearance()
+
+    # Get the gene of the given class this organ carries, None if it does not carry one
+    def get_gene(self, gene_type: type[G]) -> Optional[G]:
+        return self.genes.get(gene_type)
+
+    # Check if this organ carries a gene of the given class
+    def has_gene(self, gene_type: type[Gene]) -> bool:
+        return gene_type in self.genes
+
+    def __attach_gene(self, gene: Gene) -> None:
+        gene.attach(self.world)
+        self.world.index_gene(self, gene)
+
+    def __detach_gene(self, gene: Gene) -> None:
+        gene.detach()
+        self.world.unindex_gene(self, gene)
 
     def initialize_genes(self) -> None:
         # Initialize the genes
@@ -237,6 +540,13 @@ class Organ:
             gene.initialize()
 
         self.initialized = True
+        self.invalidate_appearance()
+
+    # Create an organ of this class without genes or children, for a world snapshot to fill in. Subclasses whose
+    # constructor takes other arguments override it
+    @classmethod
+    def from_snapshot(cls) -> Organ:
+        return cls([])
 
     @staticmethod
     def blank_organ() -> Organ:
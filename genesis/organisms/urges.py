@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from genesis.organisms.organ import Organ
+
+# Things an organism can want to do
+URGES: frozenset[str] = frozenset((
+    "on_walk",
+    "on_ingest",
+    "on_digest"
+))
+
+# An urge that has been raised, the organ that raised it and whatever it came with
+Urge = tuple["Organ", Any]
+# A handler receives every urge of one kind that was raised during a tick at once
+UrgeHandler = Callable[[list[Urge]], None]
+
+
+# UrgeBus collects the urges organs raise during a tick and dispatches them together, grouped by kind, once every
+# gene has been updated. Urges only have an effect if something listens to them, so urges nobody listens to are
+# dropped right away
+class UrgeBus:
+    # The handlers listening to each kind of urge, only kinds that have been listened to have an entry
+    handlers: dict[str, list[UrgeHandler]]
+    # The urges raised this tick, grouped by kind
+    queued_urges: dict[str, list[Urge]]
+
+    def __init__(self):
+        self.handlers = {}
+        self.queued_urges = {}
+
+    # Call the handler with every urge of the given kind at the end of each tick
+    def listen(self, urge: str, handler: UrgeHandler) -> None:
+        if urge not in URGES:
+            raise ValueError("Unknown urge: {}".format(urge))
+        self.handlers.setdefault(urge, []).append(handler)
+
+    # Stop calling the handler for the given kind of urge
+    def stop_listening(self, urge: str, handler: UrgeHandler) -> None:
+        handlers = self.handlers.get(urge)
+        if handlers is None or handler not in handlers:
+            return
+        handlers.remove(handler)
+        if not handlers:
+            del self.handlers[urge]
+
+    # Queue an urge raised by the organ for dispatch at the end of the tick
+    def raise_urge(self, urge: str, organ: Organ, payload: Any = None) -> None:
+        if urge not in self.handlers:
+            if urge not in URGES:
+                raise ValueError("Unknown urge: {}".format(urge))
+            return
+
+        urges = self.queued_urges.get(urge)
+        if urges is None:
+            urges = self.queued_urges[urge] = []
+        urges.append((organ, payload))
+
+    # Hand every queued urge to its handlers, one call per handler and kind of urge. Urges raised by the handlers
+    # themselves are dispatched on the next tick
+    def dispatch(self) -> None:
+        if not self.queued_urges:
+            return
+
+        queued_urges = self.queued_urges
+        self.queued_urges = {}
+        for urge, urges in queued_urges.items():
+            for handler in self.handlers.get(urge, ()):
+                handler(urges)
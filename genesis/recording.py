@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, NamedTuple, Optional
+
+from pyray import Color
+
+from genesis.organisms.organ import Organ, Gene, GENE_TYPES
+from genesis.simulation import Simulation
+from genesis.utils.shape import Shape, SHAPE_TYPES
+from genesis.utils.slot_map import Handle
+from genesis.world import World
+
+# The version of the recording file format, bumped whenever the layout changes
+VERSION: int = 1
+
+
+# RecordedInput is one change the user made to the world, applied right before the given tick is simulated
+class RecordedInput(NamedTuple):
+    # The number of ticks that had been simulated when the input was made
+    tick: int
+    # What the input did, the name of the InputRecorder method it was made with
+    action: str
+    # The arguments of the action, organs are referred to by their handle in the world's organs
+    args: tuple
+
+
+# Recording is everything needed to play a session back: the seed and time step of its world and every input the
+# user made, in the order they were made
+class Recording:
+    # The seed of the world's random number generator
+    seed: int
+    # The fixed time step of the simulation, in seconds
+    time_step: float
+    # Every input made during the session, ordered by tick
+    inputs: list[RecordedInput]
+    # The number of ticks the session ran for
+    ticks: int
+    # The digest of the world's state at the end of the session, None if it was not taken
+    digest: Optional[str]
+
+    def __init__(self, seed: int, time_step: float, inputs: Optional[list[RecordedInput]] = None, ticks: int = 0, digest: Optional[str] = None):
+        self.seed = seed
+        self.time_step = time_step
+        self.inputs = [] if inputs is None else inputs
+        self.ticks = ticks
+        self.digest = digest
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as file:
+            json.dump({
+                "version": VERSION,
+                "seed": self.seed,
+                "time_step": self.time_step,
+                "ticks": self.ticks,
+                "digest": self.digest,
+                "inputs": [[recorded.tick, recorded.action, list(recorded.args)] for recorded in self.inputs]
+            }, file)
+
+    @staticmethod
+    def load(path: str) -> Recording:
+        with open(path) as file:
+            data = json.load(file)
+        if data["version"] != VERSION:
+            raise ValueError("Unsupported recording version: {}".format(data["version"]))
+
+        inputs = [RecordedInput(tick, action, tuple(args)) for tick, action, args in data["inputs"]]
+        return Recording(data["seed"], data["time_step"], inputs, data["ticks"], data["digest"])
+
+
+# InputRecorder is the one way the user changes a world. Every input is applied to the world and recorded with the
+# tick it was made at, so the session can be replayed exactly
+class InputRecorder:
+    # The simulation whose world the inputs are applied to
+    simulation: Simulation
+    # The inputs recorded so far
+    recording: Recording
+
+    def __init__(self, simulation: Simulation):
+        self.simulation = simulation
+        self.recording = Recording(simulation.world.seed, simulation.time_step)
+
+    # Spawn a blank organism at the given x-y coordinate in the world
+    def spawn_blank_organ(self, world_x: float, world_y: float) -> None:
+        self.__record("spawn_blank_organ", world_x, world_y)
+
+    # Give the organ a blank child organ
+    def add_blank_child_organ(self, organ: Organ) -> None:
+        self.__record("add_blank_child_organ", handle_args(organ))
+
+    # Remove the organ and everything attached to it from the world
+    def delete_organ(self, organ: Organ) -> None:
+        self.__record("delete_organ", handle_args(organ))
+
+    # Give the organ a gene of the given class, created with its default arguments
+    def add_gene(self, organ: Organ, gene_type: type[Gene]) -> None:
+        self.__record("add_gene", handle_args(organ), gene_type.__name__)
+
+    # Take the gene of the given class away from the organ
+    def remove_gene(self, organ: Organ, gene_type: type[Gene]) -> None:
+        self.__record("remove_gene", handle_args(organ), gene_type.__name__)
+
+    # Set a field of the organ's gene of the given class, e.g. its maturity rate, color or shape, as it is done
+    # from the OrganDetailsUI
+    def set_gene_field(self, organ: Organ, gene_type: type[Gene], field: str, value: Any) -> None:
+        self.__record("set_gene_field", handle_args(organ), gene_type.__name__, field, encode_field_value(value))
+
+    # Finish the recording, taking the digest of the world's state as it is now
+    def finish(self) -> Recording:
+        self.recording.ticks = self.simulation.tick
+        self.recording.digest = world_digest(self.simulation.world)
+        return self.recording
+
+    def __record(self, action: str, *args) -> None:
+        recorded = RecordedInput(self.simulation.tick, action, args)
+        self.recording.inputs.append(recorded)
+        apply_input(self.simulation.world, recorded)
+
+
+# Play the recording back without a window, as fast as possible, and return the simulation it ran on. Runs until
+# the tick the recording finished at unless a number of ticks is given
+def replay(recording: Recording, ticks: Optional[int] = None) -> Simulation:
+    simulation = Simulation(World(recording.seed), recording.time_step)
+    ticks = recording.ticks if ticks is None else ticks
+
+    inputs = iter(recording.inputs)
+    pending = next(inputs, None)
+    while simulation.tick < ticks:
+        while pending is not None and pending.tick <= simulation.tick:
+            apply_input(simulation.world, pending)
+            pending = next(inputs, None)
+        simulation.step()
+
+    # Inputs made after the last tick still change the world
+    while pending is not None and pending.tick <= simulation.tick:
+        apply_input(simulation.world, pending)
+        pending = next(inputs, None)
+    return simulation
+
+
+# Apply a recorded input to the world
+def apply_input(world: World, recorded: RecordedInput) -> None:
+    action, args = recorded.action, recorded.args
+    if action == "spawn_blank_organ":
+        world.spawn(Organ.blank_organ(), *args)
+        return
+
+    organ = world.get_organ(Handle(*args[0]))
+    if organ is None:
+        raise ValueError("Recorded input {} refers to an organ that is not in the world".format(recorded))
+
+    if action == "add_blank_child_organ":
+        organ.add_child_organ(Organ.blank_organ())
+    elif action == "delete_organ":
+        organ.remove()
+    elif action == "add_gene":
+        organ.add_gene(GENE_TYPES.by_name(args[1])(organ))
+    elif action == "remove_gene":
+        gene = organ.get_gene(GENE_TYPES.by_name(args[1]))
+        if gene is not None:
+            organ.remove_gene(gene)
+    elif action == "set_gene_field":
+        gene = organ.get_gene(GENE_TYPES.by_name(args[1]))
+        if gene is None:
+            raise ValueError("Recorded input {} refers to a gene the organ does not carry".format(recorded))
+        gene.set_field(args[2], decode_field_value(args[3]))
+    else:
+        raise ValueError("Unknown recorded action: {}".format(action))
+
+
+# The handle of the organ in the form it is recorded in
+def handle_args(organ: Organ) -> tuple[int, int]:
+    return organ.handle.index, organ.handle.generation
+
+
+# Get a gene field value in the form it is recorded in. Numbers are recorded as they are, colors as their
+# [r, g, b, a] and shapes as the name of their type, their snapshot params, rotation and color
+def encode_field_value(value: Any) -> Any:
+    if isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Shape):
+        return {"shape": [value.__class__.__name__, list(value.get_snapshot_params()), value.rotation, encode_field_value(value.color)]}
+    return {"color": [value.r, value.g, value.b, value.a]}
+
+
+# Get a gene field value back from the form it is recorded in
+def decode_field_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "shape" in value:
+        name, params, rotation, color = value["shape"]
+        return SHAPE_TYPES.by_name(name).from_snapshot_params(tuple(params), rotation, decode_field_value(color))
+    return Color(*value["color"])
+
+
+# Hash the state of the world, two worlds that went through the same ticks and inputs have the same digest
+def world_digest(world: World) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr(world.random.getstate()).encode())
+    digest.update(repr(world.rng.bit_generator.state).encode())
+    for organ in world.organs:
+        digest.update(repr((
+            organ.handle,
+            organ.initialized,
+            # Positions can be ints or floats depending on where they were set from, only their value matters
+            float(organ.local_x),
+            float(organ.local_y),
+            [gene.__class__.__name__ for gene in organ.dna + organ.dominant_dna]
+        )).encode())
+
+    for store_type, store in world.gene_stores.items():
+        digest.update(store_type.__name__.encode())
+        for name in store.column_types:
+            digest.update(store.current(name).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import multiprocessing
+from collections import deque
+from math import floor
+from multiprocessing.connection import Connection
+from typing import Any, Optional
+
+import numpy as np
+
+from genesis.organisms.organ import Organ
+from genesis.recording import world_digest
+from genesis.simulation import Simulation, DEFAULT_TIME_STEP
+from genesis.snapshot import WorldSnapshot, snapshot_organisms
+from genesis.world import World
+
+# A region of a sharded world, its column and row in the grid of regions
+Region = tuple[int, int]
+# Organisms on their way into a region, as the header and columns of a snapshot
+Organisms = tuple[dict[str, Any], dict[str, np.ndarray]]
+
+
+# RegionGrid splits the world into a grid of square regions. Positions outside the grid belong to the nearest
+# region on its edge, so every position has exactly one region
+class RegionGrid:
+    # The number of columns and rows of regions
+    columns: int
+    rows: int
+    # The width and height of every region, in world units
+    region_size: float
+
+    def __init__(self, columns: int, rows: int, region_size: float):
+        if columns <= 0 or rows <= 0:
+            raise ValueError("A region grid needs at least one column and one row")
+        self.columns = columns
+        self.rows = rows
+        self.region_size = region_size
+
+    # Every region of the grid, in the order they are always processed in
+    def regions(self) -> list[Region]:
+        return [(column, row) for row in range(self.rows) for column in range(self.columns)]
+
+    # Get the region the given x-y coordinate in the world belongs to
+    def region_of(self, world_x: float, world_y: float) -> Region:
+        column = min(max(floor(world_x / self.region_size), 0), self.columns - 1)
+        row = min(max(floor(world_y / self.region_size), 0), self.rows - 1)
+        return column, row
+
+
+# RegionGroup holds the worlds of the regions that one worker simulates. Every region is its own World with its own
+# random number generators, seeded from the seed of the sharded world and the region, so what happens in a region
+# does not depend on which worker simulates it or how many workers there are
+class RegionGroup:
+    # The grid the regions belong to
+    grid: RegionGrid
+    # The simulation of every region in this group
+    simulations: dict[Region, Simulation]
+
+    def __init__(self, grid: RegionGrid, seed: int, regions: list[Region], time_step: float):
+        self.grid = grid
+        self.simulations = {
+            region: Simulation(World(region_seed(seed, region)), time_step)
+            for region in regions
+        }
+
+    # Add the organisms to the given region, they join it on its next tick like spawned organisms do
+    def spawn(self, region: Region, organisms: Organisms) -> None:
+        WorldSnapshot(*organisms).load_into(self.simulations[region].world)
+
+    # Add organisms that left another region during the last tick to the given region. They join it right away, so
+    # their genes carry on on its next tick as if they had never left their world
+    def immigrate(self, region: Region, organisms: Organisms) -> None:
+        self.simulations[region].world.admit(WorldSnapshot(*organisms).materialize_organisms())
+
+    # Step every region one tick, then take out the organisms whose root left its region. Returns them as
+    # (from region, to region, organisms) in region order
+    def step(self) -> list[tuple[Region, Region, Organisms]]:
+        emigrants = []
+        for region, simulation in self.simulations.items():
+            simulation.step()
+
+            leaving: dict[Region, list[Organ]] = {}
+            for organism in simulation.world.organisms:
+                destination = self.grid.region_of(organism.world_x, organism.world_y)
+                if destination != region and not organism.to_remove:
+                    leaving.setdefault(destination, []).append(organism)
+
+            for destination, organisms in leaving.items():
+                emigrants.append((region, destination, snapshot_organisms(organisms)))
+                for organism in organisms:
+                    organism.remove()
+        return emigrants
+
+    # Get the number of organisms in every region
+    def populations(self) -> dict[Region, int]:
+        return {region: len(simulation.world.organisms) for region, simulation in self.simulations.items()}
+
+    # Get the digest of the state of every region
+    def digests(self) -> dict[Region, str]:
+        return {region: world_digest(simulation.world) for region, simulation in self.simulations.items()}
+
+
+# LocalRegionGroup runs a RegionGroup in the calling process, behind the same interface as a worker process
+class LocalRegionGroup:
+    # The group that is called directly
+    group: RegionGroup
+    # The results of the calls made so far that have not been collected, oldest first
+    results: deque[Any]
+
+    def __init__(self, group: RegionGroup):
+        self.group = group
+        self.results = deque()
+
+    def call(self, method: str, *args) -> None:
+        self.results.append(getattr(self.group, method)(*args))
+
+    def result(self) -> Any:
+        return self.results.popleft()
+
+    def close(self) -> None:
+        pass
+
+
+# RegionGroupProcess runs a RegionGroup in a worker process. Calls are sent to it through a pipe, so every worker
+# can be sent a call before waiting for any of the results
+class RegionGroupProcess:
+    # The end of the pipe this process talks to the worker through
+    connection: Connection
+    # The worker process
+    process: multiprocessing.Process
+
+    def __init__(self, grid: RegionGrid, seed: int, regions: list[Region], time_step: float):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=run_region_group,
+            args=(worker_connection, grid, seed, regions, time_step),
+            daemon=True
+        )
+        self.process.start()
+        worker_connection.close()
+
+    def call(self, method: str, *args) -> None:
+        self.connection.send((method, args))
+
+    def result(self) -> Any:
+        result = self.connection.recv()
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def close(self) -> None:
+        self.connection.send(None)
+        self.process.join()
+        self.connection.close()
+
+
+# Serve the calls sent to a RegionGroup running in a worker process until it is told to stop
+def run_region_group(connection: Connection, grid: RegionGrid, seed: int, regions: list[Region], time_step: float) -> None:
+    group = RegionGroup(grid, seed, regions, time_step)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        method, args = message
+        try:
+            connection.send(getattr(group, method)(*args))
+        except Exception as exception:
+            connection.send(exception)
+    connection.close()
+
+
+# ShardedSimulation runs one headless world split into regions, spread over a pool of worker processes. Regions are
+# stepped in lockstep, and between ticks the only thing exchanged is the organisms whose root crossed into another
+# region. What is guaranteed:
+# - The result is the same whatever the number of processes, including none at all
+# - Organisms that cross into another region keep their organ classes, their gene state and the callbacks of their
+#   genes, and their genes lose no time on the way
+# - A grid of a single region is the same world as an unsharded Simulation(World(seed)) given the same spawns
+# Every region draws from random number generators of its own, so a grid of several regions is not the same world as
+# an unsharded one. Gene callbacks must be functions defined at the top level of a module to cross between regions
+class ShardedSimulation:
+    # The grid the world is split into
+    grid: RegionGrid
+    # The seed the seed of every region is derived from
+    seed: int
+    # The fixed time step every region advances by every tick
+    time_step: float
+    # The groups of regions, each simulated by one worker
+    groups: list
+    # The group that simulates every region
+    region_groups: dict[Region, Any]
+    # The number of ticks that have been simulated so far
+    tick: int
+
+    def __init__(self, grid: RegionGrid, seed: int = 0, processes: Optional[int] = None, time_step: float = DEFAULT_TIME_STEP):
+        self.grid = grid
+        self.seed = seed
+        self.time_step = time_step
+        self.tick = 0
+
+        regions = grid.regions()
+        processes = min(multiprocessing.cpu_count() if processes is None else processes, len(regions))
+        if processes <= 0:
+            self.groups = [LocalRegionGroup(RegionGroup(grid, seed, regions, time_step))]
+            self.region_groups = {region: self.groups[0] for region in regions}
+            return
+
+        assignments = [regions[index::processes] for index in range(processes)]
+        self.groups = [RegionGroupProcess(grid, seed, group_regions, time_step) for group_regions in assignments]
+        self.region_groups = {region: group for group, group_regions in zip(self.groups, assignments) for region in group_regions}
+
+    def __enter__(self) -> ShardedSimulation:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    # Spawn the organisms at their position in the world, in the region that position belongs to. Organisms are
+    # given as (root organ, x, y) and must not be part of a world
+    def spawn(self, organisms: list[tuple[Organ, float, float]]) -> None:
+        by_region: dict[Region, list[Organ]] = {}
+        for organ, world_x, world_y in organisms:
+            organ.move_pos_world_space(world_x, world_y)
+            by_region.setdefault(self.grid.region_of(world_x, world_y), []).append(organ)
+
+        self.__call_regions([
+            (region, "spawn", (region, snapshot_organisms(by_region[region])))
+            for region in self.grid.regions() if region in by_region
+        ])
+
+    # Step every region by one tick, then move organisms that crossed into another region
+    def step(self) -> None:
+        emigrants = []
+        for group in self.groups:
+            group.call("step")
+        for group in self.groups:
+            emigrants.extend(group.result())
+        self.tick += 1
+
+        # Hand the organisms over in region order, so they arrive in the same order however regions are grouped
+        emigrants.sort(key=lambda emigrant: emigrant[0])
+        self.__call_regions([
+            (destination, "immigrate", (destination, organisms))
+            for _, destination, organisms in emigrants
+        ])
+
+    def run(self, ticks: int) -> None:
+        for _ in range(ticks):
+            self.step()
+
+    # Get the number of organisms in every region
+    def populations(self) -> dict[Region, int]:
+        return self.__gather("populations")
+
+    # Get the digest of the state of every region, two sharded worlds that went through the same ticks have the same
+    # digests
+    def digests(self) -> dict[Region, str]:
+        return self.__gather("digests")
+
+    # Stop the worker processes
+    def close(self) -> None:
+        for group in self.groups:
+            group.close()
+        self.groups = []
+
+    # Make every call on the group of its region, all of them before waiting for any result so the workers run
+    # them in parallel. Calls to the same group are run in the order they are given
+    def __call_regions(self, calls: list[tuple[Region, str, tuple]]) -> list[Any]:
+        for region, method, args in calls:
+            self.region_groups[region].call(method, *args)
+        return [self.region_groups[region].result() for region, _, _ in calls]
+
+    def __gather(self, method: str) -> dict[Region, Any]:
+        for group in self.groups:
+            group.call(method)
+        gathered = {}
+        for group in self.groups:
+            gathered.update(group.result())
+        return {region: gathered[region] for region in self.grid.regions()}
+
+
+# Get the seed of a region's world from the seed of the sharded world. The first region uses the seed itself, so a
+# sharded world of a single region is seeded like an unsharded world
+def region_seed(seed: int, region: Region) -> int:
+    if region == (0, 0):
+        return seed
+    return int(np.random.SeedSequence((seed, *region)).generate_state(1)[0])
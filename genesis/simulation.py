@@ -0,0 +1,69 @@
+from typing import Optional
+
+from genesis.world import World
+
+# The default fixed time step, in seconds, that the simulation advances by every tick
+DEFAULT_TIME_STEP: float = 1 / 60
+# The default maximum number of ticks that will be run to catch up with a single slow frame
+DEFAULT_MAX_TICKS_PER_FRAME: int = 5
+
+
+# Simulation is the headless engine that owns the clock of a World. It steps the world at a fixed time step so
+# the result does not depend on how fast frames are rendered, and can run without a window at all.
+class Simulation:
+    # The world that is being simulated
+    world: World
+    # The fixed amount of simulated time, in seconds, that every tick advances
+    time_step: float
+    # The maximum number of ticks that advance() will run for a single frame, prevents a spiral of death
+    max_ticks_per_frame: int
+    # The number of ticks that have been simulated so far
+    tick: int
+    # The amount of simulated time, in seconds, that has passed so far
+    time: float
+    # Real time that has been accumulated but not yet simulated
+    accumulator: float
+
+    def __init__(self, world: Optional[World] = None, time_step: float = DEFAULT_TIME_STEP, max_ticks_per_frame: int = DEFAULT_MAX_TICKS_PER_FRAME):
+        if time_step <= 0:
+            raise ValueError("Time step must be greater than 0")
+
+        self.world = World() if world is None else world
+        self.world.time_step = time_step
+        self.time_step = time_step
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.tick = 0
+        self.time = 0.0
+        self.accumulator = 0.0
+
+    # Advance the world by exactly one fixed time step
+    def step(self) -> None:
+        self.world.update(self.time_step)
+        self.tick += 1
+        self.time = self.tick * self.time_step
+
+    # Run the given number of ticks as fast as possible, used when running headless
+    def run(self, ticks: int) -> None:
+        for _ in range(ticks):
+            self.step()
+
+    # Feed real elapsed time (e.g. the frame time of the window) into the clock and run every tick that is due.
+    # Returns the number of ticks that were run
+    def advance(self, elapsed: float) -> int:
+        self.accumulator += elapsed
+
+        ticks = 0
+        while self.accumulator >= self.time_step and ticks < self.max_ticks_per_frame:
+            self.step()
+            self.accumulator -= self.time_step
+            ticks += 1
+
+        # Drop the time we could not catch up with instead of carrying it over to the next frames
+        if ticks == self.max_ticks_per_frame:
+            self.accumulator = min(self.accumulator, self.time_step)
+
+        return ticks
+
+    # How far, from 0 to 1, the clock is between the last tick and the next one, useful for interpolating drawing
+    def alpha(self) -> float:
+        return self.accumulator / self.time_step
@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import importlib
+import json
+import struct
+from types import FunctionType
+from typing import Any, Optional
+
+import numpy as np
+from pyray import Color
+
+from genesis.organisms.organ import Organ, Gene
+from genesis.utils.shape import Shape
+from genesis.world import World
+
+# The bytes every snapshot file starts with
+MAGIC: bytes = b"GENESIS\0"
+# The version of the snapshot format, bumped whenever the layout changes
+VERSION: int = 2
+# Every column starts at a multiple of this many bytes, so it can be viewed straight out of the memory map
+COLUMN_ALIGNMENT: int = 64
+
+# The kinds of values a gene's snapshot state can hold and the dtype of the column each kind is stored in. Colors
+# are packed into one RGBA integer, shapes are stored as an index into the shape table and callbacks as an index into
+# the reference table
+STATE_KINDS: dict[str, str] = {
+    "bool": "?",
+    "int": "<i8",
+    "float": "<f8",
+    "color": "<u4",
+    "shape": "<i4",
+    "callback": "<i4"
+}
+
+
+# Save every organism in the world to a snapshot file at the given path. The file holds an organ table with the
+# organs in depth first order and the index of their parent, one table of gene columns per gene class, a table
+# of the shapes the organs use and a table of the classes and callbacks they refer to by name
+def save_world(world: World, path: str) -> None:
+    # The hovered organ has its color darkened, which should not end up in the snapshot
+    hovered_organ = world.hovered_organ
+    if hovered_organ is not None:
+        hovered_organ.set_hovered(False)
+
+    roots = [organ for organ in world.organisms if not organ.to_remove]
+    roots.extend(organ for organ in world.organisms_add_queue if not organ.to_remove)
+    header, columns = snapshot_organisms(roots)
+    write_columns(path, columns, header)
+
+    if hovered_organ is not None:
+        hovered_organ.set_hovered(True)
+
+
+# Turn the organisms with the given root organs into the header and columns of a snapshot, without writing them
+# anywhere. A WorldSnapshot can be made straight from them, e.g. to move organisms to another process
+def snapshot_organisms(roots: list[Organ]) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+    organs = []
+    parents = []
+    for root in roots:
+        stack = [(root, -1)]
+        while stack:
+            organ, parent = stack.pop()
+            index = len(organs)
+            organs.append(organ)
+            parents.append(parent)
+            stack.extend((child, index) for child in reversed(organ.children_organs))
+
+    shapes = ShapeTable()
+    references = ReferenceTable()
+    columns = {
+        "organ/parent": np.array(parents, np.int64),
+        "organ/type": np.array([references.add(organ.__class__) for organ in organs], np.int32),
+        "organ/local_x": np.array([organ.local_x for organ in organs], np.float64),
+        "organ/local_y": np.array([organ.local_y for organ in organs], np.float64),
+        "organ/world_x": np.array([organ.world_x for organ in organs], np.float64),
+        "organ/world_y": np.array([organ.world_y for organ in organs], np.float64),
+        "organ/subtree_size": np.array([organ.get_subtree_size() for organ in organs], np.int64),
+        "organ/initialized": np.array([organ.initialized for organ in organs], bool),
+        "organ/shape": np.array([shapes.add(organ.shape) for organ in organs], np.int32),
+        "organ/bounds": np.array([organ.get_bounds() or (np.nan,) * 4 for organ in organs], np.float64).reshape(-1, 4),
+        "organ/draw_rank": draw_ranks(parents)
+    }
+
+    # Gather the genes of every organ by class, keeping the order the organ holds them in
+    gene_rows: dict[type[Gene], list[tuple[int, int, Gene]]] = {}
+    for index, organ in enumerate(organs):
+        for order, gene in enumerate(organ.dna + organ.dominant_dna):
+            gene_rows.setdefault(gene.__class__, []).append((index, order, gene))
+
+    gene_types = {}
+    for gene_type, rows in gene_rows.items():
+        name = qualified_name(gene_type)
+        prefix = "gene/{}/".format(name)
+        states = [gene.get_snapshot_state() for _, _, gene in rows]
+        kinds = {field: column_kind([state[field] for state in states]) for field in states[0]}
+        gene_types[name] = kinds
+
+        columns[prefix + "organ"] = np.array([row[0] for row in rows], np.int64)
+        columns[prefix + "order"] = np.array([row[1] for row in rows], np.int32)
+        columns[prefix + "dominant"] = np.array([row[2].dominant for row in rows], bool)
+        for field, kind in kinds.items():
+            values = [encode_value(state[field], kind, shapes, references) for state in states]
+            columns[prefix + "state/" + field] = np.array(values, STATE_KINDS[kind])
+
+    columns.update(shapes.columns())
+    return {
+        "organ_count": len(organs),
+        "gene_types": gene_types,
+        "shape_types": [qualified_name(shape_type) for shape_type in shapes.types],
+        "references": references.names
+    }, columns
+
+
+# WorldSnapshot is a snapshot file opened with a memory map. Its columns can be queried without reading the whole
+# file, and Python organs are only built for the organisms that are asked for
+class WorldSnapshot:
+    # The header of the snapshot file
+    header: dict[str, Any]
+    # Every column of the snapshot, viewed straight out of the memory map
+    columns: dict[str, np.ndarray]
+    # The gene classes the snapshot holds genes of, with the kind of every field of their state
+    gene_types: dict[type[Gene], dict[str, str]]
+    # The shape classes the snapshot's shape table refers to
+    shape_types: list[type[Shape]]
+    # The organ classes and gene callbacks the snapshot refers to by name
+    references: list[Any]
+    # The organs built so far for every organism, keyed by the index of its root organ
+    materialized: dict[int, list[Organ]]
+
+    # Shapes built so far, keyed by their index in the shape table, so organs and genes that shared a shape when the
+    # snapshot was saved share it again
+    shapes: dict[int, Shape]
+    # The index of the root organ of every organism, found the first time it is needed
+    __root_indices: Optional[np.ndarray]
+
+    def __init__(self, header: dict[str, Any], columns: dict[str, np.ndarray]):
+        self.header = header
+        self.columns = columns
+        self.gene_types = {resolve_name(name): kinds for name, kinds in header["gene_types"].items()}
+        self.shape_types = [resolve_name(name) for name in header["shape_types"]]
+        self.references = [resolve_name(name) for name in header["references"]]
+        self.materialized = {}
+        self.shapes = {}
+        self.__root_indices = None
+
+    def __len__(self) -> int:
+        return self.header["organ_count"]
+
+    # Open the snapshot file at the given path
+    @staticmethod
+    def open(path: str) -> WorldSnapshot:
+        data = np.memmap(path, np.uint8, "r")
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("{} is not a world snapshot".format(path))
+
+        header_length, = struct.unpack("<Q", bytes(data[len(MAGIC):len(MAGIC) + 8]))
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(data[header_start:header_start + header_length]))
+        if header["version"] != VERSION:
+            raise ValueError("Unsupported world snapshot version: {}".format(header["version"]))
+
+        columns = {}
+        for name, column in header["columns"].items():
+            dtype = np.dtype(column["dtype"])
+            count = int(np.prod(column["shape"]))
+            start = column["offset"]
+            columns[name] = data[start:start + count * dtype.itemsize].view(dtype).reshape(column["shape"])
+        return WorldSnapshot(header, columns)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    # The index of the root organ of every organism in the snapshot
+    def root_indices(self) -> np.ndarray:
+        if self.__root_indices is None:
+            self.__root_indices = np.flatnonzero(self.columns["organ/parent"] < 0)
+        return self.__root_indices
+
+    # Get the index of the root organ of the organism the organ with the given index belongs to
+    def root_of(self, index: int) -> int:
+        roots = self.root_indices()
+        return int(roots[np.searchsorted(roots, index, "right") - 1])
+
+    # Get the index of the topmost organ at the given x-y coordinate in the world, None if there is none
+    def find_organ_at(self, world_x: float, world_y: float) -> Optional[int]:
+        x, y, width, height = self.columns["organ/bounds"].T
+        hits = np.flatnonzero((x < world_x) & (world_x < x + width) & (y < world_y) & (world_y < y + height))
+        if len(hits) == 0:
+            return None
+        return int(hits[np.argmax(self.columns["organ/draw_rank"][hits])])
+
+    # Get the organ with the given index, building the organism it belongs to if that has not been done yet
+    def materialize_organ(self, index: int) -> Organ:
+        root = self.root_of(index)
+        return self.materialize_organism(root)[index - root]
+
+    # Build the organism whose root organ has the given index, and get its organs in depth first order
+    def materialize_organism(self, root: int) -> list[Organ]:
+        organs = self.materialized.get(root)
+        if organs is not None:
+            return organs
+
+        end = root + int(self.columns["organ/subtree_size"][root])
+        parents = self.columns["organ/parent"][root:end]
+        types = self.columns["organ/type"][root:end]
+        local_x = self.columns["organ/local_x"][root:end]
+        local_y = self.columns["organ/local_y"][root:end]
+        initialized = self.columns["organ/initialized"][root:end]
+        shapes = self.columns["organ/shape"][root:end]
+
+        organs = []
+        for offset in range(end - root):
+            organ = self.references[types[offset]].from_snapshot()
+            organ.initialized = bool(initialized[offset])
+            organ.shape = self.get_shape(int(shapes[offset]))
+            organ.move_pos_local_space(local_x[offset].item(), local_y[offset].item())
+            if offset > 0:
+                organs[parents[offset] - root].add_child_organ(organ)
+            organs.append(organ)
+
+        self.__materialize_genes(organs, root, end)
+        self.materialized[root] = organs
+        return organs
+
+    # Build every organism in the snapshot and get their root organs
+    def materialize_organisms(self) -> list[Organ]:
+        return [self.materialize_organism(int(root))[0] for root in self.root_indices()]
+
+    # Build every organism in the snapshot and spawn them into the given world
+    def load_into(self, world: World) -> None:
+        for organ in self.materialize_organisms():
+            world.spawn(organ, organ.local_x, organ.local_y)
+
+    # Get the shape with the given index in the shape table
+    def get_shape(self, index: int) -> Shape:
+        if index < 0:
+            return Shape.empty()
+
+        shape = self.shapes.get(index)
+        if shape is None:
+            shape_type = self.shape_types[self.columns["shape/type"][index]]
+            params = tuple(self.columns["shape/params"][index].tolist())
+            color = decode_color(int(self.columns["shape/color"][index]))
+            shape = self.shapes[index] = shape_type.from_snapshot_params(params, self.columns["shape/rotation"][index].item(), color)
+        return shape
+
+    def __materialize_genes(self, organs: list[Organ], root: int, end: int) -> None:
+        genes: list[list[tuple[int, Gene]]] = [[] for _ in organs]
+        for gene_type, kinds in self.gene_types.items():
+            prefix = "gene/{}/".format(qualified_name(gene_type))
+            gene_organs = self.columns[prefix + "organ"]
+            # Gene rows are stored in organ order, so the rows of the organism are one contiguous range
+            start, stop = np.searchsorted(gene_organs, (root, end))
+            for row in range(start, stop):
+                organ = organs[gene_organs[row] - root]
+                gene = gene_type(organ)
+                gene.dominant = bool(self.columns[prefix + "dominant"][row])
+                gene.set_snapshot_state({
+                    field: self.__decode_value(self.columns[prefix + "state/" + field][row], kind)
+                    for field, kind in kinds.items()
+                })
+                genes[gene_organs[row] - root].append((int(self.columns[prefix + "order"][row]), gene))
+
+        for organ, organ_genes in zip(organs, genes):
+            organ_genes.sort(key=lambda order_gene: order_gene[0])
+            for _, gene in organ_genes:
+                organ.genes[gene.__class__] = gene
+                if gene.dominant:
+                    organ.dominant_dna.append(gene)
+                else:
+                    organ.dna.append(gene)
+
+    def __decode_value(self, value: np.generic, kind: str) -> Any:
+        if kind == "color":
+            return decode_color(int(value))
+        if kind == "shape":
+            return self.get_shape(int(value))
+        if kind == "callback":
+            return None if value < 0 else self.references[value]
+        return value.item()
+
+
+# ShapeTable collects the shapes of a world that is being saved, each shape object is stored once
+class ShapeTable:
+    # The shape classes used so far
+    types: list[type[Shape]]
+    # The index of every stored shape, keyed by the id of the shape object
+    indices: dict[int, int]
+    # One (type index, rotation, color, params) row per stored shape
+    rows: list[tuple[int, float, int, tuple[float, ...]]]
+
+    def __init__(self):
+        self.types = []
+        self.indices = {}
+        self.rows = []
+
+    # Store the shape if it has not been stored yet, and get its index. Empty shapes are stored as -1
+    def add(self, shape: Optional[Shape]) -> int:
+        if shape is None or shape.is_empty:
+            return -1
+
+        index = self.indices.get(id(shape))
+        if index is not None:
+            return index
+
+        if shape.__class__ not in self.types:
+            self.types.append(shape.__class__)
+        index = self.indices[id(shape)] = len(self.rows)
+        self.rows.append((self.types.index(shape.__class__), shape.rotation, encode_color(shape.color), shape.get_snapshot_params()))
+        return index
+
+    def columns(self) -> dict[str, np.ndarray]:
+        param_count = max((len(row[3]) for row in self.rows), default=0)
+        params = np.zeros((len(self.rows), param_count), np.float64)
+        for index, row in enumerate(self.rows):
+            params[index, :len(row[3])] = row[3]
+
+        return {
+            "shape/type": np.array([row[0] for row in self.rows], np.int32),
+            "shape/rotation": np.array([row[1] for row in self.rows], np.float64),
+            "shape/color": np.array([row[2] for row in self.rows], np.uint32),
+            "shape/params": params
+        }
+
+
+# ReferenceTable collects the classes and functions a world that is being saved refers to, e.g. the class of every
+# organ and the callbacks of its genes. They are stored by name and looked up again when the snapshot is loaded, so
+# they must be defined at the top level of a module, lambdas and nested functions cannot be saved
+class ReferenceTable:
+    # The qualified name of every stored class or function
+    names: list[str]
+    # The index of every stored class or function
+    indices: dict[Any, int]
+
+    def __init__(self):
+        self.names = []
+        self.indices = {}
+
+    # Store the class or function if it has not been stored yet, and get its index. None is stored as -1
+    def add(self, value: Any) -> int:
+        if value is None:
+            return -1
+
+        index = self.indices.get(value)
+        if index is not None:
+            return index
+
+        name = qualified_name(value)
+        try:
+            found = resolve_name(name) is value
+        except (AttributeError, ImportError):
+            found = False
+        if not found:
+            raise ValueError("{!r} cannot be saved in a snapshot, only classes and functions defined at the top level of a module can".format(value))
+
+        index = self.indices[value] = len(self.names)
+        self.names.append(name)
+        return index
+
+
+# Get the rank of every organ in the order they are drawn in, given the parent of every organ in depth first order.
+# Organs are drawn after all of their children, so this is their position in a post-order walk
+def draw_ranks(parents: list[int]) -> np.ndarray:
+    children: list[list[int]] = [[] for _ in parents]
+    roots = []
+    for index, parent in enumerate(parents):
+        (roots if parent < 0 else children[parent]).append(index)
+
+    ranks = np.zeros(len(parents), np.int64)
+    rank = 0
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            index, visited = stack.pop()
+            if visited:
+                ranks[index] = rank
+                rank += 1
+                continue
+            stack.append((index, True))
+            stack.extend((child, False) for child in reversed(children[index]))
+    return ranks
+
+
+# Write the columns to a snapshot file, after a header describing where each of them is
+def write_columns(path: str, columns: dict[str, np.ndarray], header: dict[str, Any]) -> None:
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        layout[name] = {"dtype": column.dtype.str, "shape": list(column.shape), "offset": offset}
+        offset = align(offset + column.nbytes)
+
+    # Column offsets are relative to the end of the header until its length is known
+    header = dict(header, version=VERSION, columns=layout)
+    header_length = len(json.dumps(header).encode())
+    data_start = align(len(MAGIC) + 8 + header_length + 64 * len(layout))
+    for column in layout.values():
+        column["offset"] += data_start
+    encoded_header = json.dumps(header).encode()
+    if len(MAGIC) + 8 + len(encoded_header) > data_start:
+        raise ValueError("The header of {} does not fit before its columns".format(path))
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(encoded_header)))
+        file.write(encoded_header)
+        for name, column in columns.items():
+            file.write(b"\0" * (layout[name]["offset"] - file.tell()))
+            file.write(np.ascontiguousarray(column).tobytes())
+
+
+# Round the offset up to the next column boundary
+def align(offset: int) -> int:
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+
+# Get the kind of column a value of a gene's snapshot state is stored in
+def value_kind(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, Shape):
+        return "shape"
+    if value is None or isinstance(value, (type, FunctionType)):
+        return "callback"
+    return "color"
+
+
+# Get the kind of column the values of one field of every gene's snapshot state are stored in. Numbers of different
+# kinds share the widest one, so a float rate after an int one is not truncated
+def column_kind(values: list[Any]) -> str:
+    kinds = {value_kind(value) for value in values}
+    if len(kinds) == 1:
+        return kinds.pop()
+    for kind in ("float", "int"):
+        if kind in kinds and kinds <= {"bool", "int", "float"}:
+            return kind
+    raise ValueError("Snapshot state values of different kinds cannot share a column: {}".format(sorted(kinds)))
+
+
+def encode_value(value: Any, kind: str, shapes: ShapeTable, references: ReferenceTable) -> Any:
+    if kind == "color":
+        return encode_color(value)
+    if kind == "shape":
+        return shapes.add(value)
+    if kind == "callback":
+        return references.add(value)
+    return value
+
+
+def encode_color(color: Color) -> int:
+    return (color.r << 24) | (color.g << 16) | (color.b << 8) | color.a
+
+
+def decode_color(value: int) -> Color:
+    return Color((value >> 24) & 0xFF, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+# Get the name a class is stored under in a snapshot
+def qualified_name(cls: type) -> str:
+    return "{}:{}".format(cls.__module__, cls.__qualname__)
+
+
+# Get the class stored under the given name in a snapshot
+def resolve_name(name: str) -> type:
+    module, qualname = name.split(":")
+    cls = importlib.import_module(module)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+    return cls
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import multiprocessing
+import sys
+import time
+from argparse import ArgumentParser
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+from genesis.organisms.genes import EnergyGene, EnergyGeneStore, MaturityGene, MaturityGeneStore, ShapeGene
+from genesis.organisms.organ import Organ, Gene
+from genesis.simulation import Simulation
+from genesis.utils.shape import CircleShape
+from genesis.world import World
+
+# The world parameters a sweep can vary, with their defaults
+WORLD_PARAMETERS: dict[str, Any] = {
+    "population": 1000,
+    "ticks": 600,
+    "size": 2000
+}
+# The genes every organism of a sweep carries, other parameters name them as <gene>.<argument>
+SWEEP_GENES: dict[str, type[Gene]] = {
+    "MaturityGene": MaturityGene,
+    "EnergyGene": EnergyGene
+}
+
+
+# Get every configuration of the grid, one per combination of parameter values and seed. Parameters are either world
+# parameters, e.g. population, or gene arguments, e.g. MaturityGene.maturity_rate
+def expand_grid(parameters: dict[str, list[Any]], seeds: Iterable[int]) -> list[dict[str, Any]]:
+    for name in parameters:
+        if name not in WORLD_PARAMETERS and name.split(".")[0] not in SWEEP_GENES:
+            raise ValueError("Unknown sweep parameter: {}".format(name))
+
+    names = list(parameters)
+    configurations = []
+    for values in itertools.product(*(parameters[name] for name in names)):
+        for seed in seeds:
+            configuration = dict(WORLD_PARAMETERS)
+            configuration.update(zip(names, values))
+            configuration["seed"] = seed
+            configurations.append(configuration)
+    return configurations
+
+
+# Build the world of a configuration, run it for its tick budget without a window and get its summary metrics
+def run_configuration(configuration: dict[str, Any]) -> dict[str, Any]:
+    start = time.perf_counter()
+    world = World(configuration["seed"])
+    simulation = Simulation(world)
+
+    # Count the organs that reach their max maturity
+    maturity_events = [0]
+
+    def on_mature(_: Organ) -> None:
+        maturity_events[0] += 1
+
+    gene_arguments: dict[str, dict[str, Any]] = {name: {} for name in SWEEP_GENES}
+    for name, value in configuration.items():
+        gene_name, _, argument = name.partition(".")
+        if argument:
+            gene_arguments[gene_name][argument] = value
+
+    dna = [
+        lambda organ: ShapeGene(organ, CircleShape(4)),
+        lambda organ: MaturityGene(organ, on_mature=on_mature, **gene_arguments["MaturityGene"]),
+        lambda organ: EnergyGene(organ, **gene_arguments["EnergyGene"])
+    ]
+    size = configuration["size"]
+    for _ in range(configuration["population"]):
+        world.spawn(Organ(dna), world.random.uniform(0, size), world.random.uniform(0, size))
+    simulation.run(configuration["ticks"])
+
+    energy = world.gene_store(EnergyGeneStore)
+    energy_level = energy.current("energy_level")[energy.active[:len(energy.genes)]]
+    maturity = world.gene_store(MaturityGeneStore)
+    reached_max_maturity = maturity.column("reached_max_maturity")[maturity.active[:len(maturity.genes)]]
+
+    result = dict(configuration)
+    result.update({
+        "final_population": len(world.organisms),
+        "mean_energy": float(energy_level.mean()) if len(energy_level) else 0.0,
+        "starved": int(np.count_nonzero(energy_level <= 0)),
+        "maturity_events": maturity_events[0],
+        "mature_fraction": float(reached_max_maturity.mean()) if len(reached_max_maturity) else 0.0,
+        "seconds": time.perf_counter() - start
+    })
+    return result
+
+
+# Run every configuration in a pool of worker processes, yielding the result of each as soon as it is done. The
+# results come in the order the runs finish, not the order of the configurations
+def run_sweep(configurations: list[dict[str, Any]], processes: Optional[int] = None) -> Iterator[dict[str, Any]]:
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(run_configuration, configurations)
+
+
+# Parse a parameter given as name=value,value,... on the command line
+def parse_parameter(text: str) -> tuple[str, list[Any]]:
+    name, _, values = text.partition("=")
+    if not values:
+        raise ValueError("Sweep parameters are given as name=value,value,...: {}".format(text))
+    return name, [int(value) if value.lstrip("-").isdigit() else float(value) for value in values.split(",")]
+
+
+# Run a sweep from the command line, e.g.
+# python -m genesis.sweep --param MaturityGene.maturity_rate=0.5,1,2 --param EnergyGene.energy_depletion_rate=0.5,1
+#   --seeds 0 1 2 --output results.csv
+def main() -> None:
+    parser = ArgumentParser(prog="genesis.sweep")
+    parser.add_argument("--param", action="append", default=[], help="a parameter and the values to sweep it over, name=value,value,...")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0], help="the seeds to run every combination with")
+    parser.add_argument("--processes", type=int, help="the number of worker processes, defaults to one per core")
+    parser.add_argument("--output", metavar="PATH", help="write the results table to this CSV file instead of the console")
+    arguments = parser.parse_args()
+
+    parameters = dict(parse_parameter(text) for text in arguments.param)
+    configurations = expand_grid(parameters, arguments.seeds)
+    fields = list(configurations[0]) + ["final_population", "mean_energy", "starved", "maturity_events", "mature_fraction", "seconds"]
+
+    file = sys.stdout if arguments.output is None else open(arguments.output, "w", newline="")
+    try:
+        writer = csv.DictWriter(file, fields)
+        writer.writeheader()
+        start = time.perf_counter()
+        for done, result in enumerate(run_sweep(configurations, arguments.processes), 1):
+            writer.writerow(result)
+            file.flush()
+            print("{}/{} runs done in {:.1f}s".format(done, len(configurations), time.perf_counter() - start), file=sys.stderr)
+    finally:
+        if file is not sys.stdout:
+            file.close()
+
+
+if __name__ == "__main__":
+    main()
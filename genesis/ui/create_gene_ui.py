@@ -3,31 +3,57 @@ from typing import Optional
 from pyray import *
 from raylib._raylib_cffi import ffi
 
-from genesis.organisms.organ import Organ, Gene
+from genesis.organisms.organ import Organ, GENE_TYPES
+from genesis.recording import InputRecorder
 from genesis.ui.list_view_ui import ListViewUI
+from genesis.utils.slot_map import Handle
+from genesis.world import World
 
 
 class CreateGeneWindow(ListViewUI):
     enabled: bool
-    organ: Optional[Organ]
+    # The world the organ genes are created for lives in
+    world: World
+    # Handle of the organ genes are created for
+    organ_handle: Optional[Handle]
+    # The recorder every change to the organ goes through, so the session can be replayed
+    recorder: InputRecorder
 
     gene_choice_editing: bool
 
-    def __init__(self):
+    def __init__(self, world: World, recorder: InputRecorder):
         super().__init__()
         self.panel_w = 300
         self.panel_h = 250
 
         self.enabled = False
-        self.organ = None
+        self.world = world
+        self.organ_handle = None
+        self.recorder = recorder
 
         self.gene_choice = ffi.new("int *", 0)
         self.gene_choice_editing = False
 
+    # The organ genes are created for, None if it has left the world
+    @property
+    def organ(self) -> Optional[Organ]:
+        return self.world.get_organ(self.organ_handle)
+
+    @organ.setter
+    def organ(self, organ: Optional[Organ]) -> None:
+        self.organ_handle = None if organ is None else organ.handle
+
     def render(self):
         if not self.enabled:
             return
 
+        # Close the window if the organ it was opened for is gone
+        organ = self.organ
+        if organ is None:
+            self.enabled = False
+            return
+
+        self.begin_layout((get_screen_width(), get_screen_height(), self.gene_choice_editing, len(GENE_TYPES)))
         self.panel_x = int((get_screen_width() - self.panel_w) * 0.5)
         self.panel_y = int(get_screen_height() * 0.25)
         self.y_level = 0
@@ -35,21 +61,15 @@ class CreateGeneWindow(ListViewUI):
         if gui_window_box(Rectangle(self.panel_x, self.panel_y, self.panel_w, self.panel_h), "Create Gene"):
             self.enabled = not self.enabled
 
-        gene_types = Gene.__subclasses__()
-        options = ""
-        for gene_type in gene_types:
-            options += gene_type.__name__ + ";"
-
-        if gui_dropdown_box(self.full_rect_in_panel(20), options[:-1], self.gene_choice, self.gene_choice_editing):
+        if gui_dropdown_box(self.full_rect_in_panel(20), GENE_TYPES.options(), self.gene_choice, self.gene_choice_editing):
             self.gene_choice_editing = not self.gene_choice_editing
         self.add_spacing(20)
 
         if self.gene_choice_editing:
-            self.add_spacing(len(gene_types) * 22)
+            self.add_spacing(len(GENE_TYPES) * 22)
 
         if gui_button(self.full_rect_in_panel(20), "Confirm"):
-            gene = gene_types[self.gene_choice[0]](self.organ)
-            self.organ.add_gene(gene)
+            self.recorder.add_gene(organ, GENE_TYPES[self.gene_choice[0]])
 
         self.add_spacing(20)
         self.panel_h = self.y_level + 40
@@ -1,6 +1,16 @@
-from typing import Callable
-from pyray import Rectangle, gui_draw_icon, GuiIconName, gui_button
-from genesis.utils.colors import COLOR_GRAY
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, Optional
+
+from pyray import Rectangle, gui_draw_icon, GuiIconName, gui_button, begin_scissor_mode, end_scissor_mode, draw_rectangle
+from genesis.utils.colors import COLOR_GRAY, COLOR_LIGHTGRAY
+
+# The height, in pixels, rows are assumed to have before they have been drawn once
+ESTIMATED_ROW_HEIGHT: int = 25
+# How far, in pixels, one step of the mouse wheel scrolls the rows
+SCROLL_SPEED: int = 40
+# The width of the scroll bar, in pixels
+SCROLL_BAR_WIDTH: int = 4
 
 
 class ExpandableList:
@@ -8,22 +18,105 @@ class ExpandableList:
     rect: Rectangle
     render_callback: Callable
     expanded: bool
+    # The text of the button while the list is collapsed and while it is expanded
+    expand_text: str
+    collapse_text: str
+
+    # Draws the row with the given index at the ui's y level and adds its height to it. When set, the list draws its
+    # rows in a scroll view and only the rows that can be seen are drawn, instead of calling render_callback
+    render_item: Optional[Callable[[int], None]]
+    # The number of rows in the list
+    item_count: int
+    # The height of every row including spacing, in pixels, None if rows differ in height and have to be measured
+    item_height: Optional[int]
+    # The height of every row as measured the last time it was drawn, when rows differ in height
+    measured_heights: list[int]
+    # The most height the rows take up in the panel, in pixels, the rest can be scrolled to
+    max_height: int
+    # How far, in pixels, the rows are scrolled down
+    scroll: int
 
-    def __init__(self, list_name: str, rect: Rectangle, render_callback: Callable, ui) -> None:
+    def __init__(self, list_name: str, rect: Rectangle, render_callback: Callable, ui, max_height: int = 300) -> None:
         self.list_name = list_name
         self.rect = rect
         self.render_callback = render_callback
         self.expanded = False
         self.ui = ui
+        self.expand_text = "Expand {}".format(list_name)
+        self.collapse_text = "Collapse {}".format(list_name)
 
-    def render(self):
+        self.render_item = None
+        self.item_count = 0
+        self.item_height = None
+        self.measured_heights = []
+        self.max_height = max_height
+        self.scroll = 0
+
+    def render(self, input_state=None):
         gui_draw_icon(GuiIconName.ICON_ARROW_DOWN_FILL if self.expanded else GuiIconName.ICON_ARROW_RIGHT_FILL, int(self.rect.x - 2), int(self.rect.y), 1, COLOR_GRAY)
-        if gui_button(Rectangle(self.rect.x + 16, self.rect.y, self.rect.width - 16, self.rect.height), "{t} {list}".format(t="Collapse" if self.expanded else "Expand", list=self.list_name)):
+        if gui_button(Rectangle(self.rect.x + 16, self.rect.y, self.rect.width - 16, self.rect.height), self.collapse_text if self.expanded else self.expand_text):
             self.expanded = not self.expanded
 
         self.ui.add_spacing(self.rect.height)
 
         if self.expanded:
             self.ui.margin_left += 30
-            self.render_callback()
+            if self.render_item is None:
+                self.render_callback()
+            else:
+                self.__render_rows(input_state)
             self.ui.margin_left -= 30
+
+    # Get the offset of the top of the row with the given index from the top of the first row
+    def row_offset(self, index: int) -> int:
+        if self.item_height is not None:
+            return index * self.item_height
+        return sum(self.measured_heights[:index])
+
+    def __render_rows(self, input_state) -> None:
+        ui = self.ui
+        if self.item_height is None:
+            # Rows that have not been drawn yet are given an estimated height
+            del self.measured_heights[self.item_count:]
+            self.measured_heights.extend([ESTIMATED_ROW_HEIGHT] * (self.item_count - len(self.measured_heights)))
+            offsets = [0, *accumulate(self.measured_heights)]
+            total_height = offsets[-1]
+        else:
+            offsets = None
+            total_height = self.item_count * self.item_height
+
+        height = min(total_height, self.max_height)
+        top = ui.y_level
+        x = ui.relative_to_panel_x(0)
+        y = ui.relative_to_panel_y(top)
+        width = ui.maximum_width_in_panel()
+
+        if input_state is not None and input_state.mouse_wheel != 0 and input_state.is_mouse_over_screen_space(x, y, width, height):
+            self.scroll -= input_state.mouse_wheel * SCROLL_SPEED
+        self.scroll = int(min(max(self.scroll, 0), total_height - height))
+
+        # Find the first row that reaches into the visible area
+        if offsets is None:
+            index = int(self.scroll // self.item_height) if self.item_height > 0 else 0
+        else:
+            index = max(bisect_right(offsets, self.scroll) - 1, 0)
+
+        begin_scissor_mode(int(x), int(y), int(width), int(height))
+        while index < self.item_count:
+            row_top = self.row_offset(index) if offsets is None else offsets[index]
+            if row_top >= self.scroll + height:
+                break
+            ui.y_level = top + row_top - self.scroll
+            self.render_item(index)
+            if offsets is not None and index < len(self.measured_heights):
+                self.measured_heights[index] = ui.y_level - (top + row_top - self.scroll)
+            index += 1
+        end_scissor_mode()
+
+        # Show where the visible rows are in the whole list
+        if total_height > height:
+            bar_height = max(height * height / total_height, 10)
+            bar_y = y + (height - bar_height) * self.scroll / (total_height - height)
+            draw_rectangle(int(x + width - SCROLL_BAR_WIDTH), int(bar_y), SCROLL_BAR_WIDTH, int(bar_height), COLOR_LIGHTGRAY)
+
+        ui.y_level = top + height
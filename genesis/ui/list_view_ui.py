@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pyray import *
 
 
@@ -28,6 +30,14 @@ class ListViewUI:
     # Captures y level at the moment, used for making box groups
     captured_y_level: int
 
+    # What the layout of the panel was computed for, e.g. the organ it shows and the size of the screen. The cached
+    # rects are dropped whenever it changes
+    layout_key: Optional[tuple]
+    # Rects of the current layout, keyed by everything their position and size are computed from
+    rect_cache: dict[tuple, Rectangle]
+    # The text of every cached label with the values it was formatted from, keyed by the name of the label
+    text_cache: dict[str, tuple[tuple, str]]
+
     def __init__(self):
         self.margin_left = 10
         self.margin_right = 10
@@ -44,6 +54,26 @@ class ListViewUI:
         self.y_level = 0
         self.captured_y_level = 0
 
+        self.layout_key = None
+        self.rect_cache = {}
+        self.text_cache = {}
+
+    # Start laying out the panel for a frame. Rects are reused from earlier frames for as long as the key stays the
+    # same, so the key should hold whatever the layout depends on
+    def begin_layout(self, key: tuple) -> None:
+        if key != self.layout_key:
+            self.layout_key = key
+            self.rect_cache.clear()
+
+    # Get the text of a label, only formatting it again when the values it shows change
+    def cached_text(self, name: str, text_format: str, *values) -> str:
+        cached = self.text_cache.get(name)
+        if cached is not None and cached[0] == values:
+            return cached[1]
+        text = text_format.format(*values)
+        self.text_cache[name] = (values, text)
+        return text
+
     def relative_to_panel_x(self, x, ignore_margin: bool = False) -> int:
         if ignore_margin:
             return self.panel_x + x
@@ -62,9 +92,8 @@ class ListViewUI:
     def maximum_width_in_panel(self) -> int:
         return self.panel_w - self.margin_left - self.margin_right
 
-    def mouse_over(self) -> bool:
-        from genesis.input import is_mouse_over_screen_space
-        return is_mouse_over_screen_space(self.panel_x, self.panel_y, self.panel_w, self.panel_h)
+    def mouse_over(self, input_state) -> bool:
+        return input_state.is_mouse_over_screen_space(self.panel_x, self.panel_y, self.panel_w, self.panel_h)
 
     def start_box_group(self) -> None:
         self.captured_y_level = self.y_level
@@ -90,13 +119,27 @@ class ListViewUI:
         self.y_level += self.margin_down + self.spacing * 2
 
     def full_rect_in_panel(self, height) -> Rectangle:
-        return Rectangle(self.relative_to_panel_x(0), self.relative_to_panel_y(self.y_level), self.maximum_width_in_panel(), height)
+        return self.__cached_rect(0, 1, height)
 
     def half_rect_in_panel_left(self, height) -> Rectangle:
-        return Rectangle(self.relative_to_panel_x(0), self.relative_to_panel_y(self.y_level), self.maximum_width_in_panel() * 0.48, height)
+        return self.__cached_rect(0, 0.48, height)
 
     def half_rect_in_panel_right(self, height) -> Rectangle:
-        return Rectangle(self.relative_to_panel_x(self.maximum_width_in_panel() * 0.52), self.relative_to_panel_y(self.y_level), self.maximum_width_in_panel() * 0.48, height)
+        return self.__cached_rect(0.52, 0.48, height)
+
+    # Get the rect at the current y level that starts and spans the given fractions of the width of the panel
+    def __cached_rect(self, start: float, width: float, height) -> Rectangle:
+        key = (start, width, height, self.y_level, self.margin_left, self.margin_right, self.panel_x, self.panel_y, self.panel_w)
+        rect = self.rect_cache.get(key)
+        if rect is None:
+            maximum_width = self.maximum_width_in_panel()
+            rect = self.rect_cache[key] = Rectangle(
+                self.relative_to_panel_x(maximum_width * start),
+                self.relative_to_panel_y(self.y_level),
+                maximum_width * width,
+                height
+            )
+        return rect
 
     def add_spacing(self, height) -> None:
         self.y_level += height + self.spacing
\ No newline at end of file
@@ -2,13 +2,20 @@ from typing import Optional
 
 from pyray import *
 from genesis.organisms.organ import Organ, Gene
+from genesis.recording import InputRecorder
 from genesis.ui.expandable_list import ExpandableList
 from genesis.ui.list_view_ui import ListViewUI
+from genesis.utils.slot_map import Handle
+from genesis.world import World
 
 
 class OrganDetailsUI(ListViewUI):
-    # The Organ object that is currently being displayed in the panel
-    organ: Optional[Organ]
+    # The world the displayed organ lives in
+    world: World
+    # Handle of the Organ object that is currently being displayed in the panel
+    organ_handle: Optional[Handle]
+    # The recorder every change to the organ goes through, so the session can be replayed
+    recorder: InputRecorder
 
     # Expandable list of child organs
     children_organ: ExpandableList
@@ -17,49 +24,57 @@ class OrganDetailsUI(ListViewUI):
     # Expandable list of dominant genes
     dominant_genes: ExpandableList
 
-    def __init__(self):
+    def __init__(self, world: World, recorder: InputRecorder):
         super().__init__()
-        self.organ = None
+        self.world = world
+        self.organ_handle = None
+        self.recorder = recorder
         self.children_organ = ExpandableList("Children Organs", None, None, self)
+        # Every child organ is one button tall, so the rows do not need to be measured
+        self.children_organ.item_height = 20 + self.spacing
         self.genes = ExpandableList("Genes", None, None, self)
         self.dominant_genes = ExpandableList("Dominant Genes", None, None, self)
 
+    # The Organ object that is currently being displayed in the panel, None if it has left the world
+    @property
+    def organ(self) -> Optional[Organ]:
+        return self.world.get_organ(self.organ_handle)
+
+    @organ.setter
+    def organ(self, organ: Optional[Organ]) -> None:
+        self.organ_handle = None if organ is None else organ.handle
+
     # noinspection DuplicatedCode
-    def render(self):
-        def render_children_organ():
-            # Display the child organs as buttons
-            for child_organ in self.organ.children_organs:
-                child_rect = Rectangle(
-                    self.relative_to_panel_x(0),
-                    self.relative_to_panel_y(self.y_level),
-                    self.maximum_width_in_panel(),
-                    20
-                )
-
-                if gui_button(child_rect, child_organ.__class__.__name__):
-                    # Focus on the selected child organ
-                    self.organ = child_organ
-                    self.children_organ.expanded = False
-
-                self.add_spacing(20)
-
-        def render_genes(genes):
-            for gene in genes:
-                child_rect = Rectangle(
-                    self.relative_to_panel_x(0),
-                    self.relative_to_panel_y(self.y_level),
-                    self.maximum_width_in_panel(),
-                    20
-                )
-
-                if self.gui_gene_button(child_rect, gene):
-                    self.organ.remove_gene(gene)
+    def render(self, input_state):
+        def render_child_organ(children: list[Organ], index: int):
+            # Clicking a child focuses on it while the rest of the rows are drawn, they still show the children the
+            # list was drawn for. A child removed earlier this frame leaves the list shorter than it was
+            if index >= len(children):
+                return
+
+            # Display the child organ as a button
+            child_organ = children[index]
+            if gui_button(self.full_rect_in_panel(20), child_organ.__class__.__name__):
+                # Focus on the selected child organ
+                self.organ = child_organ
+                self.children_organ.expanded = False
+
+            self.add_spacing(20)
+
+        def render_gene(genes, index: int):
+            # A gene removed earlier this frame leaves the list shorter than it was
+            if index >= len(genes):
+                return
+
+            gene = genes[index]
+            if self.gui_gene_button(self.full_rect_in_panel(20), gene):
+                self.recorder.remove_gene(self.organ, gene.__class__)
 
         # Do not render if there is no organ to display details for
         if self.organ is None:
             return
 
-        if is_key_pressed(KeyboardKey.KEY_DELETE):
+        if input_state.is_key_pressed(KeyboardKey.KEY_DELETE):
             self.delete_organ()
             return
 
@@ -67,6 +82,23 @@ class OrganDetailsUI(ListViewUI):
         screen_width = get_screen_width()
         screen_height = get_screen_height()
 
+        # The layout only changes with the screen, the organ, its genes and children and what is expanded
+        organ = self.organ
+        self.begin_layout((
+            screen_width,
+            screen_height,
+            self.organ_handle,
+            len(organ.children_organs),
+            tuple(gene.__class__ for gene in organ.dna),
+            tuple(gene.__class__ for gene in organ.dominant_dna),
+            self.children_organ.expanded,
+            self.genes.expanded,
+            self.dominant_genes.expanded,
+            self.children_organ.scroll,
+            self.genes.scroll,
+            self.dominant_genes.scroll
+        ))
+
         # Set the dimensions and position of the panel
         self.panel_w = int(screen_width / 3)
         self.panel_h = screen_height
@@ -80,20 +112,20 @@ class OrganDetailsUI(ListViewUI):
 
         self.start_box_group()
         # Display the x-coordinate and y-coordinate of the organ
-        gui_label(self.half_rect_in_panel_left(10), "World X: {x:.1f}".format(x=self.organ.world_x))
-        gui_label(self.half_rect_in_panel_right(10),"World Y: {y:.1f}".format(y=self.organ.world_y))
+        gui_label(self.half_rect_in_panel_left(10), self.cached_text("world_x", "World X: {:.1f}", organ.world_x))
+        gui_label(self.half_rect_in_panel_right(10),self.cached_text("world_y", "World Y: {:.1f}", organ.world_y))
         self.add_spacing(10)
 
         # Display the x-coordinate and y-coordinate of the organ
-        gui_label(self.half_rect_in_panel_left(10), "Local X: {x:.1f}".format(x=self.organ.local_x))
-        gui_label(self.half_rect_in_panel_right(10),"Local Y: {y:.1f}".format(y=self.organ.local_y))
+        gui_label(self.half_rect_in_panel_left(10), self.cached_text("local_x", "Local X: {:.1f}", organ.local_x))
+        gui_label(self.half_rect_in_panel_right(10),self.cached_text("local_y", "Local Y: {:.1f}", organ.local_y))
         self.add_spacing(10)
         self.end_box_group("Basic Information")
 
         self.start_box_group()
         # Display a button that is a reference to the parent organ of this organ if present
         if gui_button(self.full_rect_in_panel(20), "Create Child Organ"):
-            self.organ.add_child_organ(Organ.blank_organ())
+            self.recorder.add_blank_child_organ(self.organ)
         self.add_spacing(20)
 
         if self.organ.parent_organ is not None:
@@ -104,24 +136,28 @@ class OrganDetailsUI(ListViewUI):
 
         # Display an expandable list of all the children organs
         self.children_organ.rect = self.full_rect_in_panel(20)
-        self.children_organ.render_callback = render_children_organ
-        self.children_organ.render()
+        children = self.organ.children_organs
+        self.children_organ.render_item = lambda index: render_child_organ(children, index)
+        self.children_organ.item_count = len(children)
+        self.children_organ.render(input_state)
         self.end_box_group("Hierarchical Organs")
 
         self.start_box_group()
-        from genesis import CREATE_GENE_WINDOW
+        from genesis.game import CREATE_GENE_WINDOW
         if gui_button(self.full_rect_in_panel(20), "Add Gene"):
             CREATE_GENE_WINDOW.organ = self.organ
             CREATE_GENE_WINDOW.enabled = True
         self.add_spacing(20)
 
         self.genes.rect = self.full_rect_in_panel(20)
-        self.genes.render_callback = lambda: render_genes(self.organ.dna)
-        self.genes.render()
+        self.genes.render_item = lambda index: render_gene(self.organ.dna, index)
+        self.genes.item_count = len(self.organ.dna)
+        self.genes.render(input_state)
 
         self.dominant_genes.rect = self.full_rect_in_panel(20)
-        self.dominant_genes.render_callback = lambda: render_genes(self.organ.dominant_dna)
-        self.dominant_genes.render()
+        self.dominant_genes.render_item = lambda index: render_gene(self.organ.dominant_dna, index)
+        self.dominant_genes.item_count = len(self.organ.dominant_dna)
+        self.dominant_genes.render(input_state)
         self.end_box_group("Genetics")
 
         self.organ.draw_organ_details(self)
@@ -156,5 +192,6 @@ class OrganDetailsUI(ListViewUI):
         return delete
 
     def delete_organ(self):
-        self.organ.remove()
-        self.organ = None if self.organ.parent_organ is None else self.organ.parent_organ
+        organ = self.organ
+        self.recorder.delete_organ(organ)
+        self.organ = organ.parent_organ
@@ -0,0 +1,74 @@
+from pyray import *
+
+from genesis.utils.colors import COLOR_BLUE, COLOR_GOLD, COLOR_GRAY, COLOR_GREEN, COLOR_PINK, COLOR_PURPLE, COLOR_RAY_WHITE, COLOR_RED, COLOR_SKYBLUE
+from genesis.utils.profiler import FRAME_HISTORY, FRAME_SCOPES, GENE_SCOPES, Profiler
+
+# The colors the frame scopes are stacked in, in the order the scopes were first seen
+SCOPE_COLORS: tuple[Color, ...] = (COLOR_SKYBLUE, COLOR_GREEN, COLOR_GOLD, COLOR_PINK, COLOR_PURPLE, COLOR_BLUE, COLOR_RED)
+# The color of the part of a frame no scope accounts for
+OTHER_COLOR: Color = COLOR_GRAY
+# The frame time, in seconds, that fills the height of the graph
+GRAPH_FRAME_TIME: float = 1 / 30
+# The size of the graph, in pixels, every frame is one pixel wide
+GRAPH_HEIGHT: int = 120
+# The number of gene types listed below the graph
+TOP_GENE_TYPES: int = 5
+
+
+# ProfilerOverlay draws the timings the profiler gathered: a graph of the last frames with the time of every frame
+# scope stacked, and the gene types that take the most time
+class ProfilerOverlay:
+    # The profiler whose timings are drawn
+    profiler: Profiler
+    # The x-y coordinate of the top left corner of the overlay on the screen
+    x: int
+    y: int
+
+    def __init__(self, profiler: Profiler, x: int = 5, y: int = 45):
+        self.profiler = profiler
+        self.x = x
+        self.y = y
+
+    def render(self) -> None:
+        if not self.profiler.enabled:
+            return
+
+        scopes = self.profiler.recent(FRAME_SCOPES)
+        totals = self.profiler.recent_totals()
+        scale = GRAPH_HEIGHT / GRAPH_FRAME_TIME
+        bottom = self.y + GRAPH_HEIGHT
+
+        draw_rectangle(self.x, self.y, FRAME_HISTORY, GRAPH_HEIGHT, Color(0, 0, 0, 160))
+        for frame, total in enumerate(totals):
+            x = self.x + FRAME_HISTORY - len(totals) + frame
+            top = bottom
+            for index, times in enumerate(scopes.values()):
+                scope_top = max(top - int(times[frame] * scale), self.y)
+                if scope_top < top:
+                    draw_rectangle(x, scope_top, 1, top - scope_top, SCOPE_COLORS[index % len(SCOPE_COLORS)])
+                top = scope_top
+
+            # Whatever is left of the frame was spent outside every scope, e.g. waiting for vsync
+            frame_top = max(bottom - int(total * scale), self.y)
+            if frame_top < top:
+                draw_rectangle(x, frame_top, 1, top - frame_top, OTHER_COLOR)
+
+        # A line at 60 frames per second
+        target_y = bottom - int(scale / 60)
+        draw_line(self.x, target_y, self.x + FRAME_HISTORY, target_y, COLOR_RAY_WHITE)
+
+        y = bottom + 5
+        frames = max(len(totals), 1)
+        draw_text("Frame: {:.2f} ms".format(totals.sum() / frames * 1000), self.x, y, 10, COLOR_RAY_WHITE)
+        y += 12
+        for index, (name, times) in enumerate(scopes.items()):
+            draw_rectangle(self.x, y, 8, 8, SCOPE_COLORS[index % len(SCOPE_COLORS)])
+            draw_text("{}: {:.2f} ms".format(name, times.sum() / frames * 1000), self.x + 12, y, 10, COLOR_RAY_WHITE)
+            y += 12
+
+        y += 5
+        draw_text("Most expensive gene types", self.x, y, 10, COLOR_RAY_WHITE)
+        y += 12
+        for name, seconds in self.profiler.top(TOP_GENE_TYPES, GENE_SCOPES):
+            draw_text("{}: {:.3f} ms".format(name, seconds * 1000), self.x, y, 10, COLOR_RAY_WHITE)
+            y += 12
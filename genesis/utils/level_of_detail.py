@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from math import ceil, log2
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from pyray import *
+from raylib._raylib_cffi import ffi
+
+from genesis.utils.colors import COLOR_WHITE
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.utils.slot_map import SlotMap
+
+if TYPE_CHECKING:
+    from genesis.organisms.organ import Organ
+
+# Organisms that cover fewer screen pixels than this, across their widest side, are drawn as a single point
+POINT_PIXELS: float = 2
+# Below this camera zoom the world is drawn as a density heatmap instead of organism by organism
+HEATMAP_ZOOM: float = 0.1
+# The width and height, in screen pixels, the cells of the heatmap are at least drawn at
+HEATMAP_CELL_PIXELS: float = 4
+# The most cells the heatmap has along either axis, cells are made bigger for worlds that would need more
+MAX_HEATMAP_CELLS: int = 2048
+# The number of frames the heatmap is kept after organisms changed before it is built again, so a busy world does not
+# histogram every organism every frame
+HEATMAP_REFRESH_FRAMES: int = 30
+# The color of the densest cells of the heatmap, emptier cells are more transparent
+HEATMAP_COLOR: tuple[int, int, int] = (255, 203, 0)
+# The number of organisms the columns start with room for, they double whenever they run out
+INITIAL_CAPACITY: int = 1024
+
+
+# LevelOfDetail keeps the bounds, color and size of every organism in the world in NumPy columns that follow the
+# order of the world's organisms SlotMap, so what to draw, and how much detail to draw it with, is decided for every
+# organism at once instead of one at a time. Rows are brought up to date lazily, only for the organisms that changed
+class LevelOfDetail:
+    # The bounds of every organism as four columns, min x, min y, max x and max y, NaN for organisms that have nothing
+    # to draw
+    bounds: np.ndarray
+    # The (r, g, b, a) color of the root of every organism, the color it has when it is drawn as a point
+    colors: np.ndarray
+    # The number of organs in every organism
+    sizes: np.ndarray
+    # The number of rows in use
+    count: int
+    # Organisms whose rows are out of date, dicts are used as ordered sets
+    changed: dict[Organ, None]
+    # Incremented every time a row changes, so the heatmap can tell it is out of date
+    version: int
+
+    # The heatmap texture, None until the heatmap is first drawn
+    heatmap: Optional[Texture]
+    # The world position of the top left of the heatmap and the size of its cells, in world units
+    heatmap_x: float
+    heatmap_y: float
+    heatmap_cell_size: float
+    # The version of the rows and the cell size the heatmap was built from
+    heatmap_version: int
+    heatmap_requested_cell_size: float
+    # The number of frames drawn since the heatmap was built
+    heatmap_age: int
+
+    def __init__(self):
+        self.bounds = np.full((4, INITIAL_CAPACITY), np.nan, np.float32)
+        self.colors = np.zeros((INITIAL_CAPACITY, 4), np.uint8)
+        self.sizes = np.zeros(INITIAL_CAPACITY, np.int64)
+        self.count = 0
+        self.changed = {}
+        self.version = 0
+
+        self.heatmap = None
+        self.heatmap_x = 0
+        self.heatmap_y = 0
+        self.heatmap_cell_size = 0
+        self.heatmap_version = -1
+        self.heatmap_requested_cell_size = 0
+        self.heatmap_age = 0
+
+    # Add rows for organisms that were appended to the world's organisms, they are filled in on the next sync
+    def extend(self, organisms: list[Organ]) -> None:
+        if self.count + len(organisms) > len(self.sizes):
+            self.__grow(max(self.count + len(organisms), len(self.sizes) * 2))
+        self.bounds[:, self.count:self.count + len(organisms)] = np.nan
+        self.sizes[self.count:self.count + len(organisms)] = 0
+        self.count += len(organisms)
+        for organism in organisms:
+            self.changed[organism] = None
+        self.version += 1
+
+    # Remove the row of the organism at the given position by moving the last row into its place, like the world's
+    # organisms SlotMap does. Must be called before the organism is removed from it
+    def remove(self, organism: Organ, position: int) -> None:
+        # Rows are only synced while the world is drawn, a headless world must not hold on to organisms that left it
+        self.changed.pop(organism, None)
+        last = self.count - 1
+        if position != last:
+            self.bounds[:, position] = self.bounds[:, last]
+            self.colors[position] = self.colors[last]
+            self.sizes[position] = self.sizes[last]
+        self.count = last
+        self.version += 1
+
+    # Mark the row of an organism as out of date, called whenever its bounds or its look change
+    def mark(self, organism: Organ) -> None:
+        self.changed[organism] = None
+
+    # Bring the rows of the organisms that changed up to date
+    def sync(self, organisms: SlotMap[Organ]) -> None:
+        if not self.changed:
+            return
+        for organism in self.changed:
+            if organism.organism_handle is None or organism.organism_handle not in organisms:
+                continue
+            position = organisms.position(organism.organism_handle)
+            bounds = organism.get_subtree_bounds() if organism.initialized else None
+            self.bounds[:, position] = np.nan if bounds is None else bounds
+            self.sizes[position] = organism.get_subtree_size()
+            color = COLOR_WHITE if organism.shape is None or organism.shape.is_empty else organism.shape.color
+            self.colors[position] = (color.r, color.g, color.b, color.a)
+        self.changed.clear()
+        self.version += 1
+
+    # Decide how every organism is drawn at the given zoom. Returns the positions of the organisms to draw in full
+    # detail, and adds the ones too small to make out to the batch as points. Organisms outside the view rectangle
+    # (min x, min y, max x, max y) are skipped. Also returns the number of organs in the world and the number culled
+    def draw_points(self, batch: ShapeBatch, zoom: float, view: Optional[tuple[float, float, float, float]] = None) -> tuple[np.ndarray, int, int]:
+        min_x, min_y, max_x, max_y = self.bounds[:, :self.count]
+        sizes = self.sizes[:self.count]
+
+        # Comparisons with NaN are false, so organisms with nothing to draw are never visible
+        visible = max_x >= min_x
+        if view is not None:
+            visible &= (max_x >= view[0]) & (min_x <= view[2]) & (max_y >= view[1]) & (min_y <= view[3])
+
+        point = visible & (np.maximum(max_x - min_x, max_y - min_y) * zoom < POINT_PIXELS)
+        points = np.flatnonzero(point)
+        if len(points):
+            # One screen pixel wide squares at the center of every organism
+            pixel = 1 / zoom
+            rectangles = np.empty((len(points), 7), np.float32)
+            rectangles[:, 0] = (min_x[points] + max_x[points]) * 0.5
+            rectangles[:, 1] = (min_y[points] + max_y[points]) * 0.5
+            rectangles[:, 2:4] = pixel
+            rectangles[:, 4:6] = pixel * 0.5
+            rectangles[:, 6] = 0
+            batch.add_rectangles(rectangles, self.colors[points])
+
+        total = int(sizes.sum())
+        culled = int(sizes[~visible & (max_x >= min_x)].sum())
+        return np.flatnonzero(visible & ~point), total, culled
+
+    # Draw the density of organisms as a heatmap, each cell colored by how many organisms have their center in it.
+    # The heatmap covers every organism in the world and is only built again when the zoom level calls for other
+    # cells, or HEATMAP_REFRESH_FRAMES after organisms changed. Must be called inside the camera's 2d mode
+    def draw_heatmap(self, zoom: float) -> None:
+        # Cell sizes are powers of two, so zooming only builds the heatmap again when the cells get twice as big
+        cell_size = 2.0 ** ceil(log2(HEATMAP_CELL_PIXELS / zoom))
+        self.heatmap_age += 1
+        if cell_size != self.heatmap_requested_cell_size or (
+                self.version != self.heatmap_version and self.heatmap_age >= HEATMAP_REFRESH_FRAMES):
+            self.__build_heatmap(cell_size)
+
+        if self.heatmap is None:
+            return
+        draw_texture_pro(
+            self.heatmap,
+            Rectangle(0, 0, self.heatmap.width, self.heatmap.height),
+            Rectangle(self.heatmap_x, self.heatmap_y, self.heatmap.width * self.heatmap_cell_size, self.heatmap.height * self.heatmap_cell_size),
+            Vector2(0, 0),
+            0,
+            COLOR_WHITE
+        )
+
+    def unload(self) -> None:
+        if self.heatmap is not None:
+            unload_texture(self.heatmap)
+            self.heatmap = None
+
+    def __build_heatmap(self, cell_size: float) -> None:
+        self.unload()
+        self.heatmap_version = self.version
+        self.heatmap_requested_cell_size = cell_size
+        self.heatmap_age = 0
+
+        min_x, min_y, max_x, max_y = self.bounds[:, :self.count]
+        drawn = max_x >= min_x
+        if not drawn.any():
+            return
+        center_x = (min_x[drawn] + max_x[drawn]) * 0.5
+        center_y = (min_y[drawn] + max_y[drawn]) * 0.5
+
+        # Line the cells up with multiples of the cell size, so they stay put as organisms come and go
+        extent = max(float(center_x.max() - center_x.min()), float(center_y.max() - center_y.min()))
+        while extent / cell_size >= MAX_HEATMAP_CELLS:
+            cell_size *= 2
+        start_x = np.floor(center_x.min() / cell_size) * cell_size
+        start_y = np.floor(center_y.min() / cell_size) * cell_size
+        columns = int((center_x.max() - start_x) // cell_size) + 1
+        rows = int((center_y.max() - start_y) // cell_size) + 1
+
+        # A 2D histogram of the centers, counted with bincount as it is several times faster than histogram2d
+        cell_x = ((center_x - start_x) // cell_size).astype(np.intp)
+        cell_y = ((center_y - start_y) // cell_size).astype(np.intp)
+        counts = np.bincount(cell_y * columns + cell_x, minlength=rows * columns).reshape(rows, columns)
+
+        # Scale the counts logarithmically, so a few crowded cells do not wash out the rest of the world
+        density = np.log1p(counts) / np.log1p(counts.max())
+        pixels = np.empty((rows, columns, 4), np.uint8)
+        pixels[:, :, :3] = HEATMAP_COLOR
+        pixels[:, :, 3] = np.where(counts > 0, 64 + density * 191, 0).astype(np.uint8)
+
+        image = Image(ffi.from_buffer(pixels), columns, rows, 1, PixelFormat.PIXELFORMAT_UNCOMPRESSED_R8G8B8A8)
+        self.heatmap = load_texture_from_image(image)
+        self.heatmap_x = float(start_x)
+        self.heatmap_y = float(start_y)
+        self.heatmap_cell_size = cell_size
+
+    def __grow(self, capacity: int) -> None:
+        bounds = np.full((4, capacity), np.nan, np.float32)
+        bounds[:, :self.count] = self.bounds[:, :self.count]
+        colors = np.zeros((capacity, 4), np.uint8)
+        colors[:self.count] = self.colors[:self.count]
+        sizes = np.zeros(capacity, np.int64)
+        sizes[:self.count] = self.sizes[:self.count]
+        self.bounds = bounds
+        self.colors = colors
+        self.sizes = sizes
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from math import ceil
+from typing import Optional, TYPE_CHECKING
+
+from pyray import *
+
+from genesis.utils.colors import COLOR_BLANK, COLOR_WHITE
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.utils.utilities import rect_intersects
+
+if TYPE_CHECKING:
+    from genesis.organisms.organ import Organ
+
+# Organisms with at least this many organs are drawn from a cached texture, smaller ones are cheaper to batch
+MIN_CACHED_ORGANS: int = 3
+# Empty space, in world units, kept around the organism in its texture. Organs are drawn at whole coordinates, so
+# their shapes can reach up to one unit past the bounds of the organism
+TEXTURE_PADDING: int = 2
+# The number of frames a texture is kept after its organism was last drawn
+EVICTION_FRAMES: int = 600
+# The widest and tallest a texture is made, in pixels. Organisms that would need a bigger one at the current zoom are
+# drawn organ by organ, GPUs cannot be relied on to support bigger textures
+MAX_TEXTURE_SIZE: int = 4096
+# The most pixels all textures together hold, 128 MiB of VRAM. The least recently drawn textures are freed to make
+# room for new ones
+MAX_CACHED_PIXELS: int = 32 * 1024 * 1024
+
+
+# CachedOrganism is the texture the look of one organism was last drawn into
+class CachedOrganism:
+    # The texture the organism is drawn into
+    texture: RenderTexture
+    # The size of the texture, in pixels
+    width: int
+    height: int
+    # The number of texture pixels per world unit the organism was drawn at
+    scale: int
+    # The frame the texture was last drawn in
+    last_drawn: int
+
+    def __init__(self, width: int, height: int, scale: int):
+        self.texture = load_render_texture(width, height)
+        set_texture_filter(self.texture.texture, TextureFilter.TEXTURE_FILTER_BILINEAR)
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.last_drawn = 0
+
+    def unload(self) -> None:
+        unload_render_texture(self.texture)
+
+
+# OrganismTextureCache draws complex organisms from a RenderTexture holding their look, so the shapes of all of their
+# organs are drawn once and every frame after that the organism is a single textured quad. The texture of an organism
+# is redrawn when its root is marked with appearance_dirty, or when the camera zooms in far enough that it would look
+# blurry. Organisms whose texture would be too big, or would not fit in the cache's pixel budget, are left to be
+# drawn organ by organ
+class OrganismTextureCache:
+    # The texture of every cached organism, keyed by its root organ
+    entries: dict[Organ, CachedOrganism]
+    # The batch the shapes of an organism are collected into while it is drawn into its texture
+    batch: ShapeBatch
+    # The number of frames drawn so far
+    frame: int
+    # The number of textures that were redrawn during the last frame
+    redrawn: int
+    # The number of pixels all textures together hold
+    pixels: int
+
+    def __init__(self):
+        self.entries = {}
+        self.batch = ShapeBatch()
+        self.frame = 0
+        self.redrawn = 0
+        self.pixels = 0
+
+    # Check if the organism is drawn from a cached texture instead of organ by organ
+    @staticmethod
+    def should_cache(organism: Organ) -> bool:
+        return organism.initialized and organism.get_subtree_size() >= MIN_CACHED_ORGANS
+
+    # Start a frame of drawing, called before any organism is drawn in it
+    def begin_frame(self) -> None:
+        self.frame += 1
+        self.redrawn = 0
+        if self.frame % EVICTION_FRAMES == 0:
+            self.evict()
+
+    # Draw the organism from its texture, redrawing the texture first if its look changed. Returns the number of
+    # organs that were culled, like Organ.draw, or None if the organism is not drawn because its texture would be
+    # bigger than MAX_TEXTURE_SIZE or does not fit in the cache. Must be called inside the camera's 2d mode
+    def draw(self, organism: Organ, view: Optional[tuple[float, float, float, float]] = None) -> Optional[int]:
+        bounds = organism.get_subtree_bounds()
+        if bounds is None:
+            return 0
+        if view is not None and not rect_intersects(bounds, view):
+            return organism.get_subtree_size()
+
+        min_x, min_y, max_x, max_y = bounds
+        camera = rl_get_matrix_modelview()
+        # Draw at least as many texture pixels per world unit as there are screen pixels, the camera is never rotated
+        scale = max(1, ceil(abs(camera.m0)))
+        width = ceil((max_x - min_x + TEXTURE_PADDING * 2) * scale)
+        height = ceil((max_y - min_y + TEXTURE_PADDING * 2) * scale)
+        if width > MAX_TEXTURE_SIZE or height > MAX_TEXTURE_SIZE:
+            self.release(organism)
+            return None
+
+        entry = self.entries.get(organism)
+        if entry is None or entry.width != width or entry.height != height or entry.scale != scale:
+            self.release(organism)
+            if not self.__make_room(width * height):
+                return None
+            entry = self.entries[organism] = CachedOrganism(width, height, scale)
+            self.pixels += width * height
+            organism.appearance_dirty = True
+
+        if organism.appearance_dirty:
+            self.__redraw(organism, entry, min_x, min_y, camera)
+
+        entry.last_drawn = self.frame
+        # Render textures are stored upside down, so the source rectangle is flipped
+        draw_texture_pro(
+            entry.texture.texture,
+            Rectangle(0, 0, width, -height),
+            Rectangle(min_x - TEXTURE_PADDING, min_y - TEXTURE_PADDING, width / scale, height / scale),
+            Vector2(0, 0),
+            0,
+            COLOR_WHITE
+        )
+        return 0
+
+    # Free the texture of an organism that left the world
+    def release(self, organism: Organ) -> None:
+        entry = self.entries.pop(organism, None)
+        if entry is not None:
+            self.pixels -= entry.width * entry.height
+            entry.unload()
+
+    # Free the textures of organisms that have not been drawn for EVICTION_FRAMES frames, they are drawn again from
+    # scratch if they come back into view. Called every EVICTION_FRAMES frames
+    def evict(self) -> None:
+        stale = [organism for organism, entry in self.entries.items() if self.frame - entry.last_drawn > EVICTION_FRAMES]
+        for organism in stale:
+            self.release(organism)
+
+    def unload(self) -> None:
+        for entry in self.entries.values():
+            entry.unload()
+        self.entries.clear()
+        self.pixels = 0
+        self.batch.unload()
+
+    # Free the least recently drawn textures until the given number of pixels fits in MAX_CACHED_PIXELS. Textures
+    # drawn this frame are kept, raylib has not drawn their quads yet. Returns whether the pixels fit
+    def __make_room(self, pixels: int) -> bool:
+        if self.pixels + pixels <= MAX_CACHED_PIXELS:
+            return True
+        for organism, entry in sorted(self.entries.items(), key=lambda item: item[1].last_drawn):
+            if entry.last_drawn == self.frame:
+                break
+            self.release(organism)
+            if self.pixels + pixels <= MAX_CACHED_PIXELS:
+                return True
+        return False
+
+    # Draw the shapes of the organism into its texture, with the top left of its bounds at the top left of the
+    # texture. Texture mode resets the camera, so the camera's matrix is put back afterwards
+    def __redraw(self, organism: Organ, entry: CachedOrganism, min_x: float, min_y: float, camera: Matrix) -> None:
+        begin_texture_mode(entry.texture)
+        clear_background(COLOR_BLANK)
+        origin_x = min_x - TEXTURE_PADDING
+        origin_y = min_y - TEXTURE_PADDING
+        rl_set_matrix_modelview(matrix_multiply(matrix_translate(-origin_x, -origin_y, 0), matrix_scale(entry.scale, entry.scale, 1)))
+        organism.draw(self.batch)
+        self.batch.draw()
+        end_texture_mode()
+        rl_set_matrix_modelview(camera)
+
+        # Every organ of the organism is drawn now, its ancestors are only marked again once its look changes
+        stack = [organism]
+        while stack:
+            organ = stack.pop()
+            organ.appearance_dirty = False
+            stack.extend(organ.children_organs)
+        self.redrawn += 1
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Optional
+
+import numpy as np
+
+# The number of frames of timings kept for the overlay
+FRAME_HISTORY: int = 240
+# The group of scopes that together make up a frame, they should not overlap
+FRAME_SCOPES: str = "frame"
+# The group of scopes that time gene types, they happen inside the frame scopes
+GENE_SCOPES: str = "genes"
+# The gene methods that are timed while the profiler is enabled
+INSTRUMENTED_GENE_METHODS: tuple[str, ...] = ("update", "initialize")
+
+
+# Scope times the code run inside a with statement and adds it to its profiler. Scopes are created once per name and
+# reused, and do nothing but check a flag while their profiler is disabled
+class Scope:
+    # The profiler the time is added to
+    profiler: Profiler
+    # The name the time is added under
+    name: str
+    # The group the time is added to
+    group: str
+    # The time the scope was entered at, None if the profiler was disabled at the time
+    start: Optional[float]
+
+    def __init__(self, profiler: Profiler, name: str, group: str):
+        self.profiler = profiler
+        self.name = name
+        self.group = group
+        self.start = None
+
+    def __enter__(self) -> Scope:
+        self.start = perf_counter() if self.profiler.enabled else None
+        return self
+
+    def __exit__(self, *exception) -> None:
+        if self.start is not None:
+            self.profiler.add(self.name, perf_counter() - self.start, self.group)
+            self.start = None
+
+
+# Profiler gathers the time spent in named scopes every frame into ring buffers of the last FRAME_HISTORY frames.
+# While it is disabled nothing is timed, and gene methods are not wrapped at all
+class Profiler:
+    # Whether timings are being gathered
+    enabled: bool
+    # The scope objects handed out so far, keyed by group and name
+    scopes: dict[tuple[str, str], Scope]
+    # The time spent in every scope during the current frame, in seconds, keyed by group and then name
+    frame_times: dict[str, dict[str, float]]
+    # The time spent in every scope during the last FRAME_HISTORY frames, keyed by group and then name
+    history: dict[str, dict[str, np.ndarray]]
+    # The total time of the last FRAME_HISTORY frames
+    frame_totals: np.ndarray
+    # The number of frames ended since the profiler was enabled
+    frame_count: int
+    # The time the last frame ended at
+    last_frame_end: float
+    # The original gene methods that were replaced by timed ones, keyed by class and method name
+    wrapped_methods: dict[tuple[type, str], Callable]
+
+    def __init__(self):
+        self.enabled = False
+        self.scopes = {}
+        self.frame_times = {FRAME_SCOPES: {}, GENE_SCOPES: {}}
+        self.history = {FRAME_SCOPES: {}, GENE_SCOPES: {}}
+        self.frame_totals = np.zeros(FRAME_HISTORY)
+        self.frame_count = 0
+        self.last_frame_end = perf_counter()
+        self.wrapped_methods = {}
+
+    # Get the scope with the given name, to time the code inside a with statement
+    def scope(self, name: str, group: str = FRAME_SCOPES) -> Scope:
+        scope = self.scopes.get((group, name))
+        if scope is None:
+            scope = self.scopes[(group, name)] = Scope(self, name, group)
+        return scope
+
+    # Add time, in seconds, to the scope with the given name in the current frame
+    def add(self, name: str, seconds: float, group: str = FRAME_SCOPES) -> None:
+        times = self.frame_times[group]
+        times[name] = times.get(name, 0.0) + seconds
+
+    # Move the timings of the current frame into the ring buffers, called once at the end of every frame
+    def end_frame(self) -> None:
+        now = perf_counter()
+        if not self.enabled:
+            self.last_frame_end = now
+            return
+
+        index = self.frame_count % FRAME_HISTORY
+        self.frame_totals[index] = now - self.last_frame_end
+        for group, times in self.frame_times.items():
+            history = self.history[group]
+            for name in times.keys() - history.keys():
+                history[name] = np.zeros(FRAME_HISTORY)
+            for name, buffer in history.items():
+                buffer[index] = times.get(name, 0.0)
+            times.clear()
+
+        self.frame_count += 1
+        self.last_frame_end = now
+
+    # Get the timings of a group of scopes in the order the frames happened, oldest first, keyed by name
+    def recent(self, group: str = FRAME_SCOPES) -> dict[str, np.ndarray]:
+        return {name: self.__ordered(buffer) for name, buffer in self.history[group].items()}
+
+    # Get the frame totals in the order the frames happened, oldest first
+    def recent_totals(self) -> np.ndarray:
+        return self.__ordered(self.frame_totals)
+
+    # Get the scopes of a group that took the most time per frame on average, with their average time in seconds
+    def top(self, count: int, group: str = GENE_SCOPES) -> list[tuple[str, float]]:
+        frames = min(self.frame_count, FRAME_HISTORY)
+        if frames == 0:
+            return []
+        averages = [(name, float(buffer.sum()) / frames) for name, buffer in self.history[group].items()]
+        averages.sort(key=lambda average: average[1], reverse=True)
+        return averages[:count]
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        self.frame_count = 0
+        self.frame_totals[:] = 0
+        for group in self.history.values():
+            group.clear()
+        self.__instrument_genes()
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self.enabled = False
+        for times in self.frame_times.values():
+            times.clear()
+        for (gene_type, method_name), method in self.wrapped_methods.items():
+            setattr(gene_type, method_name, method)
+        self.wrapped_methods.clear()
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def __ordered(self, buffer: np.ndarray) -> np.ndarray:
+        if self.frame_count < FRAME_HISTORY:
+            return buffer[:self.frame_count]
+        return np.roll(buffer, -(self.frame_count % FRAME_HISTORY))
+
+    # Replace the methods every gene type defines itself with ones that add their time to the gene type's scope
+    def __instrument_genes(self) -> None:
+        from genesis.organisms.organ import GENE_TYPES
+
+        for gene_type in GENE_TYPES:
+            for method_name in INSTRUMENTED_GENE_METHODS:
+                method = gene_type.__dict__.get(method_name)
+                if method is None:
+                    continue
+                self.wrapped_methods[(gene_type, method_name)] = method
+                setattr(gene_type, method_name, self.__timed(method, gene_type.__name__))
+
+    def __timed(self, method: Callable, name: str) -> Callable:
+        times = self.frame_times[GENE_SCOPES]
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[name] = times.get(name, 0.0) + perf_counter() - start
+        return timed
+
+
+# The profiler the game and the world report their timings to
+PROFILER: Profiler = Profiler()
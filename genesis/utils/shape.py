@@ -5,9 +5,15 @@ from abc import ABC
 from pyray import *
 
 from genesis.utils.colors import COLOR_WHITE
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.utils.type_registry import TypeRegistry
 from genesis.utils.utilities import from_angle_magnitude, vec2_str
 
 
+# Every type of shape, each subclass of Shape registers itself when it is defined
+SHAPE_TYPES: TypeRegistry[Shape] = TypeRegistry()
+
+
 # Shape is a class that represents the visual appearance of an organ. It has a number of sides, a radius,
 # a rotation, and a color. It can be rendered at a given x-y coordinate in the world.
 class Shape(ABC):
@@ -18,6 +24,10 @@ class Shape(ABC):
     # Flag to determine if this is an empty shape
     is_empty: bool
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        SHAPE_TYPES.register(cls)
+
     def __init__(self, rotation: float = 0, color: Color = COLOR_WHITE) -> None:
         self.rotation = rotation
         self.color = color
@@ -27,6 +37,11 @@ class Shape(ABC):
     def render(self, x: int, y: int) -> None:
         pass
 
+    # Add the shape at the given x-y coordinate to a batch of shapes to be drawn together. Shapes that the batch
+    # does not know how to draw are rendered right away
+    def add_to_batch(self, batch: ShapeBatch, x: int, y: int) -> None:
+        self.render(x, y)
+
     # Get width of the shape
     def get_width(self) -> float:
         pass
@@ -47,6 +62,15 @@ class Shape(ABC):
     def get_edge(self, angle: float) -> Vector2:
         pass
 
+    # Get the parameters of this shape, other than its rotation and color, that are saved in world snapshots
+    def get_snapshot_params(self) -> tuple[float, ...]:
+        return ()
+
+    # Create a shape of this type from the parameters saved in a world snapshot
+    @classmethod
+    def from_snapshot_params(cls, params: tuple[float, ...], rotation: float, color: Color) -> Shape:
+        return cls(rotation, color)
+
     # Create an empty shape with rotation 0, and white color
     @staticmethod
     def empty() -> Shape:
@@ -54,8 +78,10 @@ class Shape(ABC):
         s.is_empty = True
         return s
 
-    def draw_shape_detail_in_ui(self, ui) -> None:
-        pass
+    # Draw the details of this shape in the OrganDetailsUI. Returns its snapshot params with the changes made to
+    # them in the ui, the shape itself is left as it is so the change can go through the ui's recorder
+    def draw_shape_detail_in_ui(self, ui) -> tuple[float, ...]:
+        return self.get_snapshot_params()
 
 
 class PolygonShape(Shape):
@@ -70,6 +96,9 @@ class PolygonShape(Shape):
     def render(self, x: int, y: int) -> None:
         draw_poly(Vector2(x, y), self.side_count, self.radius, self.rotation, self.color)
 
+    def add_to_batch(self, batch: ShapeBatch, x: int, y: int) -> None:
+        batch.add_polygon(x, y, self.side_count, self.radius, self.rotation, self.color)
+
     def get_width(self) -> float:
         return self.radius * 2
 
@@ -85,12 +114,20 @@ class PolygonShape(Shape):
     def get_edge(self, angle: float) -> Vector2:
         return from_angle_magnitude(angle, self.radius)
 
-    def draw_shape_detail_in_ui(self, ui) -> None:
-        self.side_count = int(gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.side_count, 3, 12))
-        gui_label(ui.full_rect_in_panel(20), "  Side Count: {}".format(self.side_count))
+    def get_snapshot_params(self) -> tuple[float, ...]:
+        return self.side_count, self.radius
+
+    @classmethod
+    def from_snapshot_params(cls, params: tuple[float, ...], rotation: float, color: Color) -> Shape:
+        return PolygonShape(int(params[0]), params[1], rotation, color)
+
+    def draw_shape_detail_in_ui(self, ui) -> tuple[float, ...]:
+        side_count = int(gui_slider_bar(ui.full_rect_in_panel(20), "", "", self.side_count, 3, 12))
+        gui_label(ui.full_rect_in_panel(20), "  Side Count: {}".format(side_count))
         ui.add_spacing(20)
         gui_label(ui.full_rect_in_panel(10), "Radius: {:.2f}".format(self.radius))
         ui.add_spacing(10)
+        return side_count, self.radius
 
 
 class RectangleShape(Shape):
@@ -107,6 +144,9 @@ class RectangleShape(Shape):
     def render(self, x: int, y: int) -> None:
         draw_rectangle_pro(Rectangle(x, y, self.width, self.height), self.origin, self.rotation, self.color)
 
+    def add_to_batch(self, batch: ShapeBatch, x: int, y: int) -> None:
+        batch.add_rectangle(x, y, self.width, self.height, self.origin.x, self.origin.y, self.rotation, self.color)
+
     def get_width(self) -> float:
         return self.width
 
@@ -127,12 +167,20 @@ class RectangleShape(Shape):
         y = self.origin.y + (self.height / 2) * sin(angle_radians)
         return Vector2(x, y)
 
-    def draw_shape_detail_in_ui(self, ui) -> None:
+    def get_snapshot_params(self) -> tuple[float, ...]:
+        return self.width, self.height, self.origin.x, self.origin.y
+
+    @classmethod
+    def from_snapshot_params(cls, params: tuple[float, ...], rotation: float, color: Color) -> Shape:
+        return RectangleShape(int(params[0]), int(params[1]), Vector2(params[2], params[3]), rotation, color)
+
+    def draw_shape_detail_in_ui(self, ui) -> tuple[float, ...]:
         gui_label(ui.half_rect_in_panel_left(10), "Width: {}".format(self.width))
         gui_label(ui.half_rect_in_panel_right(10), "Height: {}".format(self.height))
         ui.add_spacing(10)
         gui_label(ui.full_rect_in_panel(10), "Origin: {}".format(vec2_str(self.origin)))
         ui.add_spacing(10)
+        return self.get_snapshot_params()
 
 
 class CircleShape(Shape):
@@ -145,6 +193,9 @@ class CircleShape(Shape):
     def render(self, x: int, y: int) -> None:
         draw_circle(x, y, self.radius, self.color)
 
+    def add_to_batch(self, batch: ShapeBatch, x: int, y: int) -> None:
+        batch.add_circle(x, y, self.radius, self.color)
+
     def get_width(self) -> float:
         return self.radius * 2
 
@@ -160,6 +211,14 @@ class CircleShape(Shape):
     def get_edge(self, angle: float) -> Vector2:
         return from_angle_magnitude(angle, self.radius)
 
-    def draw_shape_detail_in_ui(self, ui) -> None:
+    def get_snapshot_params(self) -> tuple[float, ...]:
+        return self.radius,
+
+    @classmethod
+    def from_snapshot_params(cls, params: tuple[float, ...], rotation: float, color: Color) -> Shape:
+        return CircleShape(params[0], rotation, color)
+
+    def draw_shape_detail_in_ui(self, ui) -> tuple[float, ...]:
         gui_label(ui.full_rect_in_panel(10), "Radius: {:.2f}".format(self.radius))
         ui.add_spacing(10)
+        return self.get_snapshot_params()
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from math import tau
+
+import numpy as np
+from pyray import *
+from raylib._raylib_cffi import ffi
+
+# GL data types used to describe the vertex attributes to rlgl
+GL_FLOAT: int = 0x1406
+GL_UNSIGNED_BYTE: int = 0x1401
+# Attribute locations of the raylib default shader
+ATTRIBUTE_LOCATION_POSITION: int = 0
+ATTRIBUTE_LOCATION_COLOR: int = 3
+# The number of triangles a circle is built from
+CIRCLE_SEGMENTS: int = 36
+# The number of vertices the GPU buffers start with room for, they double whenever they run out
+INITIAL_VERTEX_CAPACITY: int = 6 * 1024
+# The kind of run rectangles added one at a time are in, and the kind of run of rectangles added many at a time.
+# Polygons are in runs of their side count
+RECTANGLE_RUN: int = -1
+RECTANGLE_ARRAY_RUN: int = -2
+
+
+# ShapeBatch collects the shapes that are visible this frame into per-type buffers, turns every type into
+# triangles with NumPy, then submits them to the GPU in one draw call instead of one per shape. Shapes are drawn in
+# the order they were added, so children stay under their parents however their shape types are mixed
+class ShapeBatch:
+    # Rectangles to draw, one (x, y, width, height, origin x, origin y, rotation) row per rectangle
+    rectangles: list[tuple[float, float, float, float, float, float, float]]
+    # The (r, g, b, a) color of every rectangle
+    rectangle_colors: list[tuple[int, int, int, int]]
+    # Rectangles added many at a time, as pairs of arrays with one row per rectangle like rectangles and
+    # rectangle_colors
+    rectangle_arrays: list[tuple[np.ndarray, np.ndarray]]
+    # Regular polygons to draw keyed by side count, one (x, y, radius, rotation) row per polygon
+    polygons: dict[int, list[tuple[float, float, float, float]]]
+    # The (r, g, b, a) color of every polygon, keyed by side count
+    polygon_colors: dict[int, list[tuple[int, int, int, int]]]
+    # The order shapes were added in, as [kind, start, stop] runs of consecutive shapes of the same kind. The start
+    # and stop are rows of the buffer of that kind, or of rectangle_arrays for RECTANGLE_ARRAY_RUN
+    runs: list[list[int]]
+
+    # Vertex array and buffers on the GPU, created on the first draw as they need a window
+    vertex_array: int
+    position_buffer: int
+    color_buffer: int
+    # The number of vertices the GPU buffers have room for
+    vertex_capacity: int
+
+    def __init__(self):
+        self.rectangles = []
+        self.rectangle_colors = []
+        self.rectangle_arrays = []
+        self.polygons = {}
+        self.polygon_colors = {}
+        self.runs = []
+
+        self.vertex_array = 0
+        self.position_buffer = 0
+        self.color_buffer = 0
+        self.vertex_capacity = 0
+
+    def __len__(self) -> int:
+        return (
+            len(self.rectangles)
+            + sum(len(rectangles) for rectangles, _ in self.rectangle_arrays)
+            + sum(len(polygons) for polygons in self.polygons.values())
+        )
+
+    def add_rectangle(self, x: float, y: float, width: float, height: float, origin_x: float, origin_y: float, rotation: float, color: Color) -> None:
+        self.rectangles.append((x, y, width, height, origin_x, origin_y, rotation))
+        self.rectangle_colors.append((color.r, color.g, color.b, color.a))
+        self.__add_to_run(RECTANGLE_RUN, len(self.rectangles))
+
+    # Add many rectangles at once, given as an array of (x, y, width, height, origin x, origin y, rotation) rows and
+    # an array of (r, g, b, a) rows. The arrays are used as they are, so they must not change before the next draw
+    def add_rectangles(self, rectangles: np.ndarray, colors: np.ndarray) -> None:
+        if len(rectangles):
+            self.rectangle_arrays.append((rectangles, colors))
+            self.__add_to_run(RECTANGLE_ARRAY_RUN, len(self.rectangle_arrays))
+
+    def add_polygon(self, x: float, y: float, side_count: int, radius: float, rotation: float, color: Color) -> None:
+        polygons = self.polygons.get(side_count)
+        if polygons is None:
+            polygons = self.polygons[side_count] = []
+            self.polygon_colors[side_count] = []
+        polygons.append((x, y, radius, rotation))
+        self.polygon_colors[side_count].append((color.r, color.g, color.b, color.a))
+        self.__add_to_run(side_count, len(polygons))
+
+    def add_circle(self, x: float, y: float, radius: float, color: Color) -> None:
+        self.add_polygon(x, y, CIRCLE_SEGMENTS, radius, 0, color)
+
+    # Forget every shape collected so far
+    def clear(self) -> None:
+        self.rectangles.clear()
+        self.rectangle_colors.clear()
+        self.rectangle_arrays.clear()
+        self.polygons.clear()
+        self.polygon_colors.clear()
+        self.runs.clear()
+
+    # Turn the collected shapes into triangles, one (positions, colors) pair of vertex arrays per run of shapes, in
+    # the order they were added. Every shape type is still triangulated all at once, runs are slices of the result
+    def build(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        # The triangles of every kind of run and the number of vertices each of its shapes has
+        triangles: dict[int, tuple[np.ndarray, np.ndarray, int]] = {}
+        if self.rectangles:
+            triangles[RECTANGLE_RUN] = (
+                triangulate_rectangles(np.array(self.rectangles, np.float32)),
+                np.repeat(np.array(self.rectangle_colors, np.uint8), 6, axis=0),
+                6
+            )
+        for side_count, polygons in self.polygons.items():
+            triangles[side_count] = (
+                triangulate_polygons(np.array(polygons, np.float32), side_count),
+                np.repeat(np.array(self.polygon_colors[side_count], np.uint8), side_count * 3, axis=0),
+                side_count * 3
+            )
+
+        meshes = []
+        for kind, start, stop in self.runs:
+            if kind == RECTANGLE_ARRAY_RUN:
+                for rectangles, colors in self.rectangle_arrays[start:stop]:
+                    meshes.append((
+                        triangulate_rectangles(rectangles.astype(np.float32, copy=False)),
+                        np.repeat(colors.astype(np.uint8, copy=False), 6, axis=0)
+                    ))
+                continue
+            positions, colors, vertices = triangles[kind]
+            meshes.append((positions[start * vertices:stop * vertices], colors[start * vertices:stop * vertices]))
+        return meshes
+
+    # Draw every collected shape and clear the batch, must be called between begin_drawing and end_drawing
+    def draw(self) -> None:
+        meshes = self.build()
+        self.clear()
+        if not meshes:
+            return
+
+        positions = np.concatenate([mesh[0] for mesh in meshes], dtype=np.float32)
+        colors = np.concatenate([mesh[1] for mesh in meshes])
+        vertex_count = len(positions)
+        if vertex_count > self.vertex_capacity:
+            self.__load_buffers(max(vertex_count, self.vertex_capacity * 2, INITIAL_VERTEX_CAPACITY))
+
+        rl_update_vertex_buffer(self.position_buffer, ffi.from_buffer(positions), positions.nbytes, 0)
+        rl_update_vertex_buffer(self.color_buffer, ffi.from_buffer(colors), colors.nbytes, 0)
+
+        # Draw everything raylib has queued so far first, so the shapes end up on top of it
+        rl_draw_render_batch_active()
+
+        shader = rl_get_shader_id_default()
+        locations = rl_get_shader_locs_default()
+        rl_enable_shader(shader)
+        rl_set_uniform_matrix(locations[RL_SHADER_LOC_MATRIX_MVP], matrix_multiply(rl_get_matrix_modelview(), rl_get_matrix_projection()))
+        rl_set_uniform(locations[RL_SHADER_LOC_COLOR_DIFFUSE], ffi.new("float[4]", [1, 1, 1, 1]), ShaderUniformDataType.SHADER_UNIFORM_VEC4, 1)
+        rl_active_texture_slot(0)
+        rl_enable_texture(rl_get_texture_id_default())
+        rl_disable_backface_culling()
+
+        rl_enable_vertex_array(self.vertex_array)
+        rl_draw_vertex_array(0, vertex_count)
+        rl_disable_vertex_array()
+
+        rl_enable_backface_culling()
+        rl_disable_texture()
+        rl_disable_shader()
+
+    # Free the GPU buffers of this batch
+    def unload(self) -> None:
+        if self.vertex_array == 0:
+            return
+        rl_unload_vertex_buffer(self.position_buffer)
+        rl_unload_vertex_buffer(self.color_buffer)
+        rl_unload_vertex_array(self.vertex_array)
+        self.vertex_array = 0
+        self.position_buffer = 0
+        self.color_buffer = 0
+        self.vertex_capacity = 0
+
+    # Record that a shape of the given kind was added as the given row count of its buffer, extending the last run if
+    # it is of the same kind
+    def __add_to_run(self, kind: int, stop: int) -> None:
+        if self.runs and self.runs[-1][0] == kind:
+            self.runs[-1][2] = stop
+        else:
+            self.runs.append([kind, stop - 1, stop])
+
+    def __load_buffers(self, vertex_capacity: int) -> None:
+        self.unload()
+
+        self.vertex_array = rl_load_vertex_array()
+        rl_enable_vertex_array(self.vertex_array)
+
+        self.position_buffer = rl_load_vertex_buffer(ffi.NULL, vertex_capacity * 2 * 4, True)
+        rl_set_vertex_attribute(ATTRIBUTE_LOCATION_POSITION, 2, GL_FLOAT, False, 0, ffi.NULL)
+        rl_enable_vertex_attribute(ATTRIBUTE_LOCATION_POSITION)
+
+        self.color_buffer = rl_load_vertex_buffer(ffi.NULL, vertex_capacity * 4, True)
+        rl_set_vertex_attribute(ATTRIBUTE_LOCATION_COLOR, 4, GL_UNSIGNED_BYTE, True, 0, ffi.NULL)
+        rl_enable_vertex_attribute(ATTRIBUTE_LOCATION_COLOR)
+
+        rl_disable_vertex_array()
+        self.vertex_capacity = vertex_capacity
+
+
+# Turn rows of (x, y, width, height, origin x, origin y, rotation) into two triangles per rectangle, rotated
+# around their origin like draw_rectangle_pro does
+def triangulate_rectangles(rectangles: np.ndarray) -> np.ndarray:
+    x, y, width, height, origin_x, origin_y, rotation = rectangles.T
+
+    # Corners relative to the origin, in the order top left, top right, bottom right, bottom left
+    corners_x = np.stack((-origin_x, width - origin_x, width - origin_x, -origin_x), axis=1)
+    corners_y = np.stack((-origin_y, -origin_y, height - origin_y, height - origin_y), axis=1)
+
+    angle = np.radians(rotation)[:, None]
+    cos, sin = np.cos(angle), np.sin(angle)
+    world_x = x[:, None] + corners_x * cos - corners_y * sin
+    world_y = y[:, None] + corners_x * sin + corners_y * cos
+
+    corners = np.stack((world_x, world_y), axis=2)
+    return corners[:, [0, 3, 2, 0, 2, 1]].reshape(-1, 2)
+
+
+# Turn rows of (x, y, radius, rotation) into a fan of triangles per regular polygon with the given side count,
+# like draw_poly does
+def triangulate_polygons(polygons: np.ndarray, side_count: int) -> np.ndarray:
+    x, y, radius, rotation = polygons.T
+
+    angles = np.radians(rotation)[:, None] + np.arange(side_count + 1) * (tau / side_count)
+    edge_x = x[:, None] + np.cos(angles) * radius[:, None]
+    edge_y = y[:, None] + np.sin(angles) * radius[:, None]
+
+    triangles = np.empty((len(polygons), side_count, 3, 2), np.float32)
+    triangles[:, :, 0, 0] = x[:, None]
+    triangles[:, :, 0, 1] = y[:, None]
+    triangles[:, :, 1, 0] = edge_x[:, :-1]
+    triangles[:, :, 1, 1] = edge_y[:, :-1]
+    triangles[:, :, 2, 0] = edge_x[:, 1:]
+    triangles[:, :, 2, 1] = edge_y[:, 1:]
+    return triangles.reshape(-1, 2)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Generic, Iterable, Iterator, NamedTuple, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+# Handle is a stable reference to an item in a SlotMap. The generation changes every time the slot is reused, so a
+# handle to an item that has been removed can be told apart from a handle to whatever took its place
+class Handle(NamedTuple):
+    # The slot the item lives in
+    index: int
+    # The generation of the slot when the item was inserted
+    generation: int
+
+
+# SlotMap stores items in a packed list that can be iterated quickly, and hands out generational handles to them.
+# Inserting and removing are O(1): removals move the last item into the hole, and released slots are kept in a free
+# list for reuse
+class SlotMap(Generic[T]):
+    # The items, packed together in no particular order
+    items: list[T]
+    # The slot of the item at every position of items
+    item_slots: list[int]
+    # The position in items of the item in every slot
+    slot_positions: list[int]
+    # The current generation of every slot
+    slot_generations: list[int]
+    # Slots that are not holding an item
+    free_slots: list[int]
+
+    def __init__(self):
+        self.items = []
+        self.item_slots = []
+        self.slot_positions = []
+        self.slot_generations = []
+        self.free_slots = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __contains__(self, handle: Handle) -> bool:
+        return handle.index < len(self.slot_generations) and self.slot_generations[handle.index] == handle.generation
+
+    # Insert the item and get a handle to it
+    def insert(self, item: T) -> Handle:
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_positions[slot] = len(self.items)
+        else:
+            slot = len(self.slot_generations)
+            self.slot_generations.append(0)
+            self.slot_positions.append(len(self.items))
+
+        self.items.append(item)
+        self.item_slots.append(slot)
+        return Handle(slot, self.slot_generations[slot])
+
+    # Insert all the items at once and get a handle to each of them, in the same order
+    def extend(self, items: Iterable[T]) -> list[Handle]:
+        items = list(items)
+        start = len(self.items)
+        self.items.extend(items)
+
+        # Reuse free slots first, then add new slots for the rest in one go
+        reused = min(len(items), len(self.free_slots))
+        slots = [self.free_slots.pop() for _ in range(reused)]
+        first_new_slot = len(self.slot_generations)
+        slots.extend(range(first_new_slot, first_new_slot + len(items) - reused))
+        self.slot_generations.extend([0] * (len(items) - reused))
+        self.slot_positions.extend([0] * (len(items) - reused))
+
+        for offset, slot in enumerate(slots):
+            self.slot_positions[slot] = start + offset
+        self.item_slots.extend(slots)
+        return [Handle(slot, self.slot_generations[slot]) for slot in slots]
+
+    # Get the item the handle refers to, None if it has been removed
+    def get(self, handle: Handle) -> Optional[T]:
+        if handle not in self:
+            return None
+        return self.items[self.slot_positions[handle.index]]
+
+    # Get the position of the item in iteration order, which changes as other items are removed
+    def position(self, handle: Handle) -> int:
+        if handle not in self:
+            raise KeyError("Handle {} does not refer to an item in this SlotMap".format(handle))
+        return self.slot_positions[handle.index]
+
+    # Remove the item the handle refers to and return it
+    def remove(self, handle: Handle) -> T:
+        position = self.position(handle)
+        item = self.items[position]
+
+        # Move the last item into the hole left behind
+        last_item = self.items.pop()
+        last_slot = self.item_slots.pop()
+        if position < len(self.items):
+            self.items[position] = last_item
+            self.item_slots[position] = last_slot
+            self.slot_positions[last_slot] = position
+
+        self.slot_generations[handle.index] += 1
+        self.free_slots.append(handle.index)
+        return item
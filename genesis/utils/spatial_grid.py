@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from math import floor
+from typing import Hashable, Iterable
+
+# The default width and height of a grid cell, in world units
+DEFAULT_CELL_SIZE: float = 64
+
+
+# SpatialGrid is a uniform grid that buckets the axis-aligned bounds of items by the cells they overlap, so the
+# items under a point can be found by looking at a single cell instead of testing every item
+class SpatialGrid:
+    # The width and height of a cell, in world units
+    cell_size: float
+    # The items overlapping each cell, keyed by cell coordinate
+    cells: dict[tuple[int, int], set[Hashable]]
+    # The bounds (x, y, width, height) of every item in the grid
+    item_bounds: dict[Hashable, tuple[float, float, float, float]]
+    # The range of cells (min x, min y, max x, max y) every item in the grid overlaps
+    item_cells: dict[Hashable, tuple[int, int, int, int]]
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.item_bounds = {}
+        self.item_cells = {}
+
+    def __len__(self) -> int:
+        return len(self.item_bounds)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self.item_bounds
+
+    # Insert the item with the given bounds, or move it if it is already in the grid
+    def update(self, item: Hashable, x: float, y: float, width: float, height: float) -> None:
+        cell_range = (
+            floor(x / self.cell_size),
+            floor(y / self.cell_size),
+            floor((x + width) / self.cell_size),
+            floor((y + height) / self.cell_size)
+        )
+        self.item_bounds[item] = (x, y, width, height)
+
+        old_range = self.item_cells.get(item)
+        if old_range == cell_range:
+            return
+        if old_range is not None:
+            self.__remove_from_cells(item, old_range)
+
+        self.item_cells[item] = cell_range
+        for cell in self.__cells_in_range(cell_range):
+            self.cells.setdefault(cell, set()).add(item)
+
+    # Remove the item from the grid, does nothing if it is not in it
+    def remove(self, item: Hashable) -> None:
+        cell_range = self.item_cells.pop(item, None)
+        if cell_range is None:
+            return
+        del self.item_bounds[item]
+        self.__remove_from_cells(item, cell_range)
+
+    # Get every item whose bounds contain the given point
+    def query_point(self, x: float, y: float) -> list[Hashable]:
+        cell = self.cells.get((floor(x / self.cell_size), floor(y / self.cell_size)))
+        if not cell:
+            return []
+
+        items = []
+        for item in cell:
+            item_x, item_y, width, height = self.item_bounds[item]
+            if item_x < x < item_x + width and item_y < y < item_y + height:
+                items.append(item)
+        return items
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.item_bounds.clear()
+        self.item_cells.clear()
+
+    def __remove_from_cells(self, item: Hashable, cell_range: tuple[int, int, int, int]) -> None:
+        for cell in self.__cells_in_range(cell_range):
+            items = self.cells[cell]
+            items.discard(item)
+            if not items:
+                del self.cells[cell]
+
+    @staticmethod
+    def __cells_in_range(cell_range: tuple[int, int, int, int]) -> Iterable[tuple[int, int]]:
+        min_x, min_y, max_x, max_y = cell_range
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                yield cell_x, cell_y
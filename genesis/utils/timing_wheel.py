@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+# The number of bits of the tick each level of the wheel covers, every level has 2 ** SLOT_BITS slots
+SLOT_BITS: int = 6
+SLOT_COUNT: int = 1 << SLOT_BITS
+SLOT_MASK: int = SLOT_COUNT - 1
+# The number of levels of the wheel, together they reach SLOT_COUNT ** LEVELS ticks ahead. Items due further ahead
+# than that go round the top level until they are close enough
+LEVELS: int = 4
+
+
+# TimingWheel holds items that are due at a given tick in a hierarchy of wheels of slots. The first level has a slot
+# for each of the next SLOT_COUNT ticks, every level above has slots that are SLOT_COUNT times longer. Items due soon
+# go into the first level and are handed out when their tick comes, items due later go into a higher level and
+# cascade down a level every time the level below comes round to them. Advancing a tick only looks at the slots
+# that are due, so its cost depends on the number of items due and not on the number of items in the wheel
+class TimingWheel(Generic[T]):
+    # The tick the wheel is at
+    tick: int
+    # The slots of every level, each slot a list of (due tick, item) in the order they were scheduled
+    levels: list[list[list[tuple[int, T]]]]
+    # The number of items in the wheel
+    count: int
+
+    def __init__(self):
+        self.tick = 0
+        self.levels = [[[] for _ in range(SLOT_COUNT)] for _ in range(LEVELS)]
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    # Add the item to be handed out when the wheel advances to the given tick, ticks that have already passed are
+    # handed out on the next one
+    def schedule(self, item: T, due_tick: int) -> None:
+        self.__insert(max(due_tick, self.tick + 1), item)
+        self.count += 1
+
+    # Advance the wheel by one tick and get the items that are due at it, in the order they were scheduled
+    def advance(self) -> list[T]:
+        self.tick += 1
+        tick = self.tick
+
+        # Move the slot of every higher level that the tick has come round to down a level, highest level first so
+        # items can fall through several levels in one tick
+        for level in range(LEVELS - 1, 0, -1):
+            if tick & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                slots = self.levels[level]
+                index = (tick >> (SLOT_BITS * level)) & SLOT_MASK
+                entries = slots[index]
+                if entries:
+                    slots[index] = []
+                    for due_tick, item in entries:
+                        self.__insert(due_tick, item)
+
+        slots = self.levels[0]
+        entries = slots[tick & SLOT_MASK]
+        if not entries:
+            return []
+        slots[tick & SLOT_MASK] = []
+        self.count -= len(entries)
+        return [item for _, item in entries]
+
+    def __insert(self, due_tick: int, item: T) -> None:
+        delta = due_tick - self.tick
+        level = 0
+        while level < LEVELS - 1 and delta >= 1 << (SLOT_BITS * (level + 1)):
+            level += 1
+        self.levels[level][(due_tick >> (SLOT_BITS * level)) & SLOT_MASK].append((due_tick, item))
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+# TypeRegistry keeps every subclass of a base class, direct or not, in the order they were defined. Classes register
+# themselves when they are defined, and everything derived from the list of types, like the option string of a
+# dropdown, is cached until another type registers
+class TypeRegistry(Generic[T]):
+    # The registered types, in the order they registered
+    types: list[type[T]]
+
+    # The position of every registered type in types
+    __indices: dict[type[T], int]
+    # Every registered type keyed by its name
+    __by_name: dict[str, type[T]]
+    # The names of the registered types joined with ";", as raygui dropdowns take them, built when first needed
+    __options: Optional[str]
+
+    def __init__(self):
+        self.types = []
+        self.__indices = {}
+        self.__by_name = {}
+        self.__options = None
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def __getitem__(self, index: int) -> type[T]:
+        return self.types[index]
+
+    def __contains__(self, registered_type: type) -> bool:
+        return registered_type in self.__indices
+
+    def register(self, registered_type: type[T]) -> None:
+        if registered_type in self.__indices:
+            return
+        self.__indices[registered_type] = len(self.types)
+        self.__by_name.setdefault(registered_type.__name__, registered_type)
+        self.types.append(registered_type)
+        self.__options = None
+
+    # Get the position of the type in the registry, or the default if it is not registered
+    def index_of(self, registered_type: type, default: int = 0) -> int:
+        return self.__indices.get(registered_type, default)
+
+    # Get the registered type with the given name
+    def by_name(self, name: str) -> type[T]:
+        registered_type = self.__by_name.get(name)
+        if registered_type is None:
+            raise ValueError("Unknown type: {}".format(name))
+        return registered_type
+
+    # Get the names of the registered types joined with ";", to use as the options of a dropdown
+    def options(self) -> str:
+        if self.__options is None:
+            self.__options = ";".join(registered_type.__name__ for registered_type in self.types)
+        return self.__options
@@ -1,8 +1,9 @@
 import random
 from typing import re
 
+import numpy as np
 from pyray import Color, Vector2
-from math import cos, sin, radians
+from math import cos, sin, radians, isclose
 
 
 def from_angle_magnitude(angle: float, magnitude: float) -> Vector2:
@@ -12,15 +13,30 @@ def from_angle_magnitude(angle: float, magnitude: float) -> Vector2:
     return Vector2(x, y)
 
 
-def check_chance(chance: float) -> bool:
+# Check if something with the given chance happens, drawing from the given random number generator. Pass a world's
+# generator so the outcome can be replayed
+def check_chance(chance: float, rng: random.Random = random) -> bool:
     if not 0 <= chance <= 1:
         raise ValueError("Chance must be between 0 and 1, inclusive")
 
-    # Convert the chance to a percentage
-    percentage_chance = int(chance * 100)
+    # A uniform number in [0, 1) is below the chance exactly that often, a chance of 1 always passes and 0 never does
+    return rng.random() < chance
 
-    # Generate a random number between 1 and 100 and check if it is less than or equal to the percentage chance
-    return random.randint(1, 100) <= percentage_chance
+
+# Check, for every chance in the array, if something with that chance happens, drawing them all from the given
+# NumPy generator with one call. Returns an array of booleans, one per chance
+def check_chances(chances: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    chances = np.asarray(chances, np.float64)
+    if chances.size and not (0 <= chances.min() and chances.max() <= 1):
+        raise ValueError("Chances must be between 0 and 1, inclusive")
+
+    return rng.random(chances.shape) < chances
+
+
+# Check if the value a raygui control gave back differs from the value it was given. raygui works with 32 bit floats, so
+# an untouched control does not give back exactly the value it was given
+def float_changed(before: float, after: float) -> bool:
+    return not isclose(before, after, rel_tol=1e-6, abs_tol=1e-6)
 
 
 def darken_color(color: Color) -> Color:
@@ -54,4 +70,12 @@ def is_int(s: str) -> bool:
 
 
 def vec2_str(vector2: Vector2) -> str:
-    return "{x:.2f}, {y:.2f}".format(x=vector2.x, y=vector2.y)
\ No newline at end of file
+    return "{x:.2f}, {y:.2f}".format(x=vector2.x, y=vector2.y)
+
+
+def rect_intersects(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def rect_union(a: tuple[float, float, float, float], b: tuple[float, float, float, float]) -> tuple[float, float, float, float]:
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
@@ -1,42 +1,349 @@
+import random
+from math import inf
+from typing import NamedTuple, Optional, Iterable
+
+import numpy as np
 from pyray import Vector2
-from genesis.organisms.organ import Organ
+from genesis.organisms.gene_store import GeneStore
+from genesis.organisms.organ import Organ, Gene
+from genesis.organisms.urges import UrgeBus
+from genesis.utils.level_of_detail import LevelOfDetail, HEATMAP_ZOOM
+from genesis.utils.organism_texture_cache import OrganismTextureCache
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.utils.profiler import PROFILER, GENE_SCOPES
+from genesis.utils.slot_map import SlotMap, Handle
+from genesis.utils.spatial_grid import SpatialGrid
+from genesis.utils.timing_wheel import TimingWheel
+from genesis.utils.utilities import check_chance, check_chances, rect_intersects, rect_union
+
+# The time, in seconds, one tick of a world advances until the Simulation stepping it says otherwise
+DEFAULT_TICK_LENGTH: float = 1 / 60
+
+
+# ScheduledGene is the place of a gene with an update period in its world's timing wheel
+class ScheduledGene(NamedTuple):
+    # The gene to update
+    gene: Gene
+    # The world time, in seconds, the gene was last updated at, or joined the world at
+    last_time: float
 
 
 # World is a class that represents the environment in which organisms live. It contains a list of organisms
 # and has methods for updating, drawing, and spawning organisms.
 class World:
-    # The list of organisms in the world
-    organisms: list[Organ]
+    # The seed the random number generator of this world was created with
+    seed: int
+    # The random number generator everything in this world draws from, so a world can be replayed from its seed
+    random: random.Random
+    # The NumPy generator of this world, seeded from the same seed, used to draw many random numbers at once
+    rng: np.random.Generator
+    # The root organs of the organisms in the world
+    organisms: SlotMap[Organ]
     # The list of organisms that are waiting to be added to the world
     organisms_add_queue: list[Organ]
+    # The list of organisms that are waiting to be taken out of the world
+    organisms_remove_queue: list[Organ]
+    # Every organ in the world, root or not, the handles to them can be held on to and checked for staleness
+    organs: SlotMap[Organ]
+    # The columnar stores holding the scalar state of stored genes, keyed by the type of store
+    gene_stores: dict[type[GeneStore], GeneStore]
+    # The organs in the world carrying each class of gene, dicts are used as ordered sets
+    gene_index: dict[type[Gene], dict[Organ, None]]
+    # The genes in the world that are updated every tick, keyed by their class. Only classes that override
+    # Gene.update have a list, so genes that do nothing every tick are never called
+    gene_updates: dict[type[Gene], dict[Gene, None]]
+    # Organs that joined the world since the last tick and whose genes have not been initialized yet
+    uninitialized_organs: list[Organ]
+    # The time, in seconds, one tick of this world advances, set by the Simulation that steps it
+    time_step: float
+    # The number of ticks this world has been updated for, and the time, in seconds, they add up to
+    tick: int
+    time: float
+    # The genes that have an update period, in the wheel at the tick their next update is due
+    gene_wheel: TimingWheel[ScheduledGene]
+    # The current place of every gene in gene_wheel, places that are not in here were cancelled
+    scheduled_genes: dict[Gene, ScheduledGene]
+    # The urges raised by organs during a tick, dispatched together once every gene has been updated
+    urges: UrgeBus
+    # Index of the bounds of every shaped organ in the world, used to find the organ under the mouse
+    picking_index: SpatialGrid
+    # The organ the mouse is currently hovering over
+    hovered_organ: Optional[Organ]
+    # Organs whose transform was invalidated this tick, they are resolved together by resolve_transforms
+    dirty_transforms: list[Organ]
+    # The batch the shapes of all visible organs are collected into and drawn with
+    shape_batch: ShapeBatch
+    # The textures complex organisms are drawn from, so their organs are only drawn again when their look changes
+    organism_textures: OrganismTextureCache
+    # The bounds, color and size of every organism in columns, used to pick how much detail to draw them with
+    level_of_detail: LevelOfDetail
+    # The number of organs that were drawn during the last draw
+    drawn_organs: int
+    # The number of organs that were skipped during the last draw because they were out of view
+    culled_organs: int
 
-    def __init__(self):
-        self.organisms = []
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.random = random.Random(self.seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.organisms = SlotMap()
         self.organisms_add_queue = []
+        self.organisms_remove_queue = []
+        self.organs = SlotMap()
+        self.gene_stores = {}
+        self.gene_index = {}
+        self.gene_updates = {}
+        self.uninitialized_organs = []
+        self.time_step = DEFAULT_TICK_LENGTH
+        self.tick = 0
+        self.time = 0.0
+        self.gene_wheel = TimingWheel()
+        self.scheduled_genes = {}
+        self.urges = UrgeBus()
+        self.picking_index = SpatialGrid()
+        self.hovered_organ = None
+        self.dirty_transforms = []
+        self.shape_batch = ShapeBatch()
+        self.organism_textures = OrganismTextureCache()
+        self.level_of_detail = LevelOfDetail()
+        self.drawn_organs = 0
+        self.culled_organs = 0
+
+    # Update all the organisms in the world by the given amount of time, in seconds
+    def update(self, dt: float) -> None:
+        self.tick += 1
+        self.time += dt
+        self.__initialize_new_organs()
 
-    # Update all the organisms in the world
-    def update(self) -> None:
-        for organism in self.organisms:
-            organism.update()
+        # Update the genes that have something to do every tick, one class of gene at a time. Organisms that are
+        # marked for removal are skipped, they leave the world at the end of this tick. Genes of a class that first
+        # joins the world during an update are updated from the next tick
+        for genes in tuple(self.gene_updates.values()):
+            for gene in tuple(genes):
+                # An earlier update this tick can have removed the gene or marked its organism for removal
+                if gene in genes and not gene.organ.to_remove:
+                    gene.update(dt)
+
+        # Update the genes with an update period whose next update is due this tick, handing them the time that
+        # passed since their last one
+        for scheduled in self.gene_wheel.advance():
+            gene = scheduled.gene
+            if self.scheduled_genes.get(gene) is not scheduled or gene.organ.to_remove:
+                continue
+            gene.update(self.time - scheduled.last_time)
+            # The update can have removed the gene
+            if self.scheduled_genes.get(gene) is scheduled:
+                self.__schedule_gene(gene)
+
+        # Update every stored gene with one vectorized update per gene type. Stores created by an event on the way
+        # are updated from the next tick
+        for store_type, store in tuple(self.gene_stores.items()):
+            with PROFILER.scope(store_type.__name__, GENE_SCOPES):
+                store.update(dt)
+
+        # Hand the urges raised during this tick to their listeners, grouped by kind
+        self.urges.dispatch()
 
         # Remove marked organisms and add queued organisms
         self.__remove_marked_organisms()
         self.__add_queued_organisms()
 
+        # Bring the world position of everything that moved up to date
+        self.resolve_transforms()
+
+    # Resolve the world position of every organ that moved since the last call, in one pass over the moved subtrees
+    def resolve_transforms(self) -> None:
+        for organ in self.dirty_transforms:
+            organ.resolve_transform()
+        self.dirty_transforms.clear()
+
+    # Initialize the genes of every organ that joined the world since the last tick, in the order they joined
+    def __initialize_new_organs(self) -> None:
+        if not self.uninitialized_organs:
+            return
+        organs = self.uninitialized_organs
+        self.uninitialized_organs = []
+        for organ in organs:
+            if organ.world is self and not organ.initialized:
+                organ.initialize_genes()
+
     # Remove all organisms that have been marked for removal
     def __remove_marked_organisms(self) -> None:
-        self.organisms = [organism for organism in self.organisms if not organism.to_remove]
+        for organism in self.organisms_remove_queue:
+            self.level_of_detail.remove(organism, self.organisms.position(organism.organism_handle))
+            self.organisms.remove(organism.organism_handle)
+            organism.organism_handle = None
+            self.organism_textures.release(organism)
+        self.organisms_remove_queue.clear()
 
     # Add all organisms that are in the add queue
     def __add_queued_organisms(self) -> None:
-        for organism in self.organisms_add_queue:
-            self.organisms.append(organism)
+        organisms = [organism for organism in self.organisms_add_queue if not organism.to_remove]
         self.organisms_add_queue.clear()
+        self.admit(organisms)
+
+    # Add the organisms to the world right away instead of at the end of the tick, for organisms that move over from
+    # another world in between ticks. Their genes carry on from the state they are in, so they lose no time
+    def admit(self, organisms: list[Organ]) -> None:
+        handles = self.organisms.extend(organisms)
+        self.level_of_detail.extend(organisms)
+        for organism, handle in zip(organisms, handles):
+            organism.organism_handle = handle
+            organism.attach(self)
+
+    # Check if something with the given chance, between 0 and 1, happens
+    def check_chance(self, chance: float) -> bool:
+        return check_chance(chance, self.random)
+
+    # Check, for every chance in the array, if something with that chance happens, e.g. which of N organs with N
+    # chances to mutate do so this tick. Every number is drawn with one NumPy call, returns an array of booleans
+    def check_chances(self, chances: np.ndarray) -> np.ndarray:
+        return check_chances(chances, self.rng)
+
+    # Get every organ in the world that carries a gene of the given class
+    def organs_with_gene(self, gene_type: type[Gene]) -> Iterable[Organ]:
+        return self.gene_index.get(gene_type, {}).keys()
+
+    # Record that the organ carries the gene
+    def index_gene(self, organ: Organ, gene: Gene) -> None:
+        organs = self.gene_index.get(gene.__class__)
+        if organs is None:
+            organs = self.gene_index[gene.__class__] = {}
+        organs[organ] = None
+
+        if gene.overrides_update and gene.update_period is not None:
+            self.__schedule_gene(gene)
+        elif gene.overrides_update:
+            genes = self.gene_updates.get(gene.__class__)
+            if genes is None:
+                genes = self.gene_updates[gene.__class__] = {}
+            genes[gene] = None
+
+    # Record that the organ no longer carries the gene
+    def unindex_gene(self, organ: Organ, gene: Gene) -> None:
+        organs = self.gene_index.get(gene.__class__)
+        if organs is not None:
+            organs.pop(organ, None)
+
+        genes = self.gene_updates.get(gene.__class__)
+        if genes is not None:
+            genes.pop(gene, None)
+        # Its place in the wheel is skipped when it comes up
+        self.scheduled_genes.pop(gene, None)
+
+    # Put the gene in the wheel at the tick its next update is due, update_period from now
+    def __schedule_gene(self, gene: Gene) -> None:
+        scheduled = self.scheduled_genes[gene] = ScheduledGene(gene, self.time)
+        self.gene_wheel.schedule(scheduled, self.tick + max(1, round(gene.update_period / self.time_step)))
+
+    # Get the store of the given type in this world, creating it the first time a gene needs it
+    def gene_store(self, store_type: type[GeneStore]) -> GeneStore:
+        store = self.gene_stores.get(store_type)
+        if store is None:
+            store = store_type()
+            self.gene_stores[store_type] = store
+        return store
+
+    # Draw all the organisms in the world, skipping everything outside the view rectangle (min x, min y, max x,
+    # max y) if one is given. The camera zoom decides how much detail organisms are drawn with
+    def draw(self, organ_detail_ui, input_state, view: Optional[tuple[float, float, float, float]] = None, zoom: float = 1) -> None:
+        # Organs can be moved from the ui in between ticks
+        self.resolve_transforms()
+
+        # Resolve the organ under the mouse with a single query instead of testing every organ
+        hovered_organ = None if input_state.over_ui else self.pick_with_vec2(input_state.mouse_world_position)
+        self.__set_hovered_organ(hovered_organ)
+
+        # If the hovered organ is clicked, display its details
+        if hovered_organ is not None and input_state.is_button_released(0):
+            if organ_detail_ui.organ is not hovered_organ:
+                organ_detail_ui.organ = hovered_organ
+
+        self.level_of_detail.sync(self.organisms)
+
+        # Zoomed far enough out that organisms cannot be told apart, only how crowded every part of the world is shown
+        if zoom < HEATMAP_ZOOM:
+            self.level_of_detail.draw_heatmap(zoom)
+            self.drawn_organs = 0
+            self.culled_organs = 0
+            return
+
+        # Organisms too small to make out are drawn as points, all at once
+        positions, total_organs, culled_organs = self.level_of_detail.draw_points(self.shape_batch, zoom, view)
+
+        # Complex organisms are drawn as one textured quad each, the rest are batched. Organisms are drawn on top of
+        # the ones before them like they are picked, so the batch is drawn before a quad that covers any of it. Points
+        # are drawn under every organism
+        self.organism_textures.begin_frame()
+        organisms = self.organisms.items
+        batched_bounds = None if len(self.shape_batch) == 0 else (view or (-inf, -inf, inf, inf))
+        for position in positions.tolist():
+            organism = organisms[position]
+            bounds = organism.get_subtree_bounds()
+            if self.organism_textures.should_cache(organism):
+                if batched_bounds is not None and bounds is not None and rect_intersects(batched_bounds, bounds):
+                    self.shape_batch.draw()
+                    batched_bounds = None
+                culled = self.organism_textures.draw(organism, view)
+                if culled is not None:
+                    culled_organs += culled
+                    continue
+
+            # Organisms the cache does not draw are batched
+            culled_organs += organism.draw(self.shape_batch, view)
+            if bounds is not None:
+                batched_bounds = bounds if batched_bounds is None else rect_union(batched_bounds, bounds)
+        self.shape_batch.draw()
+
+        self.drawn_organs = total_organs - culled_organs
+        self.culled_organs = culled_organs
+
+    # Get the topmost organ at the given position in the world
+    def pick_with_vec2(self, position: Vector2) -> Optional[Organ]:
+        return self.pick(position.x, position.y)
+
+    # Get the topmost organ at the given x-y coordinate in the world
+    def pick(self, world_x: float, world_y: float) -> Optional[Organ]:
+        organs = self.picking_index.query_point(world_x, world_y)
+        if not organs:
+            return None
+        if len(organs) == 1:
+            return organs[0]
+        return max(organs, key=Organ.draw_order)
+
+    # Update the bounds of the organ in the picking index
+    def refresh_bounds(self, organ: Organ) -> None:
+        bounds = organ.get_bounds()
+        if bounds is None:
+            self.picking_index.remove(organ)
+        else:
+            self.picking_index.update(organ, *bounds)
+
+    # Queue a root organ to be taken out of the world at the end of the tick
+    def despawn(self, organism: Organ) -> None:
+        self.organisms_remove_queue.append(organism)
+
+    # Get the organ a handle refers to, None if the organ has left the world since
+    def get_organ(self, handle: Optional[Handle]) -> Optional[Organ]:
+        if handle is None:
+            return None
+        return self.organs.get(handle)
+
+    # Drop every reference the world holds to an organ that is leaving it
+    def forget(self, organ: Organ) -> None:
+        self.organs.remove(organ.handle)
+        self.picking_index.remove(organ)
+        if self.hovered_organ is organ:
+            self.hovered_organ = None
 
-    # Draw all the organisms in the world
-    def draw(self, organ_detail_ui) -> None:
-        for organism in self.organisms:
-            organism.draw(organ_detail_ui)
+    def __set_hovered_organ(self, organ: Optional[Organ]) -> None:
+        if organ is self.hovered_organ:
+            return
+        if self.hovered_organ is not None:
+            self.hovered_organ.set_hovered(False)
+        if organ is not None:
+            organ.set_hovered(True)
+        self.hovered_organ = organ
 
     # Spawn an organism at the given position in the world
     def spawn_with_vec2(self, organ: Organ, position: Vector2):
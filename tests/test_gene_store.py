@@ -0,0 +1,94 @@
+from genesis.organisms.gene_store import ANCHOR_TIME
+from genesis.organisms.genes import EnergyGene, EnergyGeneStore, MaturityGene, MaturityGeneStore
+from genesis.organisms.organ import Organ
+from genesis.simulation import Simulation
+from genesis.world import World, DEFAULT_TICK_LENGTH
+
+
+# Stands in for a gene in a store, recording the times its callbacks were called at
+class Recorder:
+    def __init__(self, store):
+        self.store = store
+        self.organ = None
+        self.fired = []
+        self.on_mature = self.on_starve = lambda organ: self.fired.append(self.store.time)
+
+
+def test_linear_columns_are_worked_out_when_read():
+    store = MaturityGeneStore()
+    slot = store.allocate(Recorder(store), {"max_maturity": 10, "current_maturity": 0, "maturity_rate": 2})
+    for _ in range(3):
+        store.update(0.5)
+
+    # The column still holds the value at the anchor time, nothing was written to it
+    assert store.columns["current_maturity"][slot] == 0
+    assert store.get("current_maturity", slot) == 3
+    assert store.current("current_maturity").tolist() == [3]
+
+
+def test_setting_a_rate_anchors_the_linear_columns_again():
+    store = MaturityGeneStore()
+    gene = Recorder(store)
+    slot = store.allocate(gene, {"max_maturity": 10, "current_maturity": 0, "maturity_rate": 2})
+    store.update(2)
+    store.set("maturity_rate", slot, 1)
+    assert store.columns["current_maturity"][slot] == 4
+    assert store.columns[ANCHOR_TIME][slot] == 2
+
+    # The event predicted for the old rate, at 5 seconds, is out of date
+    store.update(3)
+    assert gene.fired == []
+    assert store.get("current_maturity", slot) == 7
+    store.update(3)
+    assert gene.fired == [8]
+    assert store.columns["reached_max_maturity"][slot]
+
+
+def test_starvation_fires_at_its_predicted_tick():
+    store = EnergyGeneStore()
+    gene = Recorder(store)
+    slot = store.allocate(gene, {"energy_level": 2, "energy_depletion_rate": 1})
+    for tick in range(1, 121):
+        store.update(DEFAULT_TICK_LENGTH)
+        # Time added up one tick at a time falls a rounding error short of 2 seconds
+        assert len(gene.fired) == (tick >= 120)
+    # Values stop at their limit
+    store.update(1)
+    assert store.get("energy_level", slot) == 0
+    assert store.current("energy_level").tolist() == [0]
+
+    # Released slots drop their events
+    slot = store.allocate(gene, {"energy_level": 1, "energy_depletion_rate": 1})
+    store.release(slot)
+    store.update(5)
+    assert len(gene.fired) == 1
+
+
+def test_stored_genes_fire_their_callbacks_in_a_world():
+    events = []
+    simulation = Simulation(World(1))
+    organ = Organ([
+        lambda organ: MaturityGene(organ, max_maturity=1, maturity_rate=1, on_mature=lambda organ: events.append(("mature", simulation.tick))),
+        lambda organ: EnergyGene(organ, max_energy_level=2, on_starve=lambda organ: events.append(("starve", simulation.tick)))
+    ])
+    simulation.world.spawn(organ, 0, 0)
+    simulation.run(200)
+    # The genes are initialized at the start of the first tick and stored from then on
+    assert events == [("mature", 60), ("starve", 120)]
+    assert organ.get_gene(MaturityGene).reached_max_maturity
+    assert organ.get_gene(EnergyGene).energy_level == 0
+
+
+def test_events_can_add_genes_of_a_store_not_yet_in_the_world():
+    simulation = Simulation(World(1))
+
+    # Give the organism that matured a child with an EnergyGene, the first one in the world
+    def sprout(organ: Organ) -> None:
+        organ.add_child_organ(Organ([lambda child: EnergyGene(child, max_energy_level=1)]))
+    organ = Organ([lambda organ: MaturityGene(organ, max_maturity=1, on_mature=sprout)])
+    simulation.world.spawn(organ, 0, 0)
+    simulation.run(90)
+
+    energy = organ.children_organs[0].get_gene(EnergyGene)
+    assert EnergyGeneStore in simulation.world.gene_stores
+    assert 0 < energy.energy_level < 1
@@ -0,0 +1,20 @@
+from genesis.organisms.organ import Organ
+from genesis.simulation import Simulation
+from genesis.world import World
+
+
+def test_headless_world_does_not_keep_removed_organisms():
+    simulation = Simulation(World(1))
+    for tick in range(50):
+        for index in range(10):
+            simulation.world.spawn(Organ.blank_organ(), tick, index)
+        simulation.step()
+        for organism in list(simulation.world.organisms)[:10]:
+            organism.remove()
+        simulation.step()
+
+    level_of_detail = simulation.world.level_of_detail
+    # The world is never drawn, so rows are never synced, only organisms still in the world can be waiting for it
+    assert len(level_of_detail.changed) <= len(simulation.world.organisms)
+    assert all(organism.world is simulation.world for organism in level_of_detail.changed)
+    assert level_of_detail.count == len(simulation.world.organisms)
@@ -0,0 +1,60 @@
+import sys
+
+from genesis.organisms.organ import Organ
+from genesis.simulation import Simulation
+from genesis.utils.shape_batch import ShapeBatch
+from genesis.world import World
+
+
+# Build an organism that is a chain of organs, each organ the only child of the previous one, and spawn it
+def spawn_chain(world: World, length: int) -> list[Organ]:
+    organs = [Organ.blank_organ()]
+    for _ in range(length - 1):
+        child = Organ.blank_organ()
+        child.move_pos_local_space(12, 0)
+        organs[-1].add_child_organ(child)
+        organs.append(child)
+    world.spawn(organs[0], 0, 0)
+    return organs
+
+
+def test_chains_deeper_than_the_recursion_limit():
+    length = sys.getrecursionlimit() * 3
+    simulation = Simulation(World(1))
+    organs = spawn_chain(simulation.world, length)
+    simulation.run(2)
+    assert len(simulation.world.organs) == length
+
+    root = organs[0]
+    assert root.get_subtree_size() == length
+    assert root.get_subtree_bounds() == (-5, -5, 12 * (length - 1) + 5, 5)
+
+    batch = ShapeBatch()
+    assert root.draw(batch) == 0
+    assert len(batch.rectangles) == length
+    # Only the organs at x 0 to 96 are in view, the subtree of the organ at 108 is culled as a whole
+    assert root.draw(batch, (-10, -10, 100, 10)) == length - 9
+
+    organs[1].remove()
+    simulation.step()
+    assert len(simulation.world.organs) == 1
+    assert all(organ.world is None for organ in organs[1:])
+
+
+def test_children_are_drawn_before_their_parent():
+    root = Organ.blank_organ()
+    children = [Organ.blank_organ() for _ in range(3)]
+    for index, child in enumerate(children):
+        child.move_pos_local_space(20 * (index + 1), 0)
+        root.add_child_organ(child)
+    grandchild = Organ.blank_organ()
+    grandchild.move_pos_local_space(0, 20)
+    children[0].add_child_organ(grandchild)
+
+    simulation = Simulation(World(1))
+    simulation.world.spawn(root, 0, 0)
+    simulation.run(2)
+
+    batch = ShapeBatch()
+    root.draw(batch)
+    assert [rectangle[:2] for rectangle in batch.rectangles] == [(20, 20), (20, 0), (40, 0), (60, 0), (0, 0)]
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pyray
+
+from genesis.organisms.organ import Organ
+from genesis.recording import InputRecorder
+from genesis.simulation import Simulation
+from genesis.ui import expandable_list, list_view_ui, organ_detail_ui
+from genesis.ui.organ_detail_ui import OrganDetailsUI
+from genesis.world import World
+
+
+# Replace every raylib drawing function the detail panel uses with one that draws nothing. Buttons report a click
+# only for the given number of the button with the given text
+def stub_gui(monkeypatch, clicked_text: str, clicked_number: int) -> None:
+    for module in (organ_detail_ui, expandable_list, list_view_ui):
+        for name, value in vars(module).items():
+            if callable(value) and getattr(pyray, name, None) is value and name[0].islower():
+                monkeypatch.setattr(module, name, lambda *args, **kwargs: 0)
+        monkeypatch.setattr(module, "gui_icon_text", lambda *args: "", raising=False)
+
+    buttons = []
+
+    def gui_button(rect, text: str) -> bool:
+        buttons.append(text)
+        return text == clicked_text and buttons.count(text) == clicked_number
+    for module in (organ_detail_ui, expandable_list):
+        monkeypatch.setattr(module, "gui_button", gui_button)
+
+
+# An organ class of its own, so its button can be told apart from its siblings'
+class First(Organ):
+    pass
+
+
+def test_clicking_a_child_organ_before_its_siblings_are_drawn(monkeypatch):
+    simulation = Simulation(World(1))
+    root = Organ([])
+    first = First([])
+    root.add_child_organ(first)
+    for _ in range(3):
+        root.add_child_organ(Organ([]))
+    simulation.world.spawn(root, 0, 0)
+    simulation.step()
+
+    ui = OrganDetailsUI(simulation.world, InputRecorder(simulation))
+    ui.organ = root
+    ui.children_organ.expanded = True
+    stub_gui(monkeypatch, "First", 1)
+    input_state = SimpleNamespace(is_key_pressed=lambda key: False, mouse_wheel=0)
+    ui.render(input_state)
+    assert ui.organ is first
+    assert not ui.children_organ.expanded
+
+    # The next frame draws the child that was clicked, which has no children of its own
+    ui.render(input_state)
+    assert ui.organ is first
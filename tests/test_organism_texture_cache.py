@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from genesis.organisms.organ import Organ
+from genesis.simulation import Simulation
+from genesis.utils import organism_texture_cache
+from genesis.utils.organism_texture_cache import OrganismTextureCache
+from genesis.world import World
+
+
+# Replace the raylib functions the cache uses with ones that need no window, textures remember their size and are
+# counted while they are loaded
+def stub_textures(monkeypatch, zoom: float = 1) -> list:
+    loaded = []
+
+    def load_render_texture(width: int, height: int):
+        texture = SimpleNamespace(texture=None, width=width, height=height)
+        loaded.append(texture)
+        return texture
+    monkeypatch.setattr(organism_texture_cache, "load_render_texture", load_render_texture)
+    monkeypatch.setattr(organism_texture_cache, "unload_render_texture", loaded.remove)
+    monkeypatch.setattr(organism_texture_cache, "rl_get_matrix_modelview", lambda: SimpleNamespace(m0=zoom))
+    for name in ("set_texture_filter", "begin_texture_mode", "end_texture_mode", "clear_background", "rl_set_matrix_modelview", "draw_texture_pro"):
+        monkeypatch.setattr(organism_texture_cache, name, lambda *args: None)
+    monkeypatch.setattr(organism_texture_cache.ShapeBatch, "draw", lambda batch: batch.clear())
+    return loaded
+
+
+# Spawn an organism that is a row of organs 12 units apart, each the child of the previous one, at the given x
+def spawn_row(world: World, length: int, x: float) -> Organ:
+    root = previous = Organ.blank_organ()
+    for _ in range(length - 1):
+        organ = Organ.blank_organ()
+        organ.move_pos_local_space(12, 0)
+        previous.add_child_organ(organ)
+        previous = organ
+    world.spawn(root, x, 0)
+    return root
+
+
+def test_organisms_too_big_for_a_texture_are_not_cached(monkeypatch):
+    loaded = stub_textures(monkeypatch, zoom=4)
+    simulation = Simulation(World(1))
+    small = spawn_row(simulation.world, 3, 0)
+    # 12 units per organ at 4 pixels per unit is far wider than MAX_TEXTURE_SIZE
+    long = spawn_row(simulation.world, 2000, 100)
+    simulation.run(2)
+
+    cache = OrganismTextureCache()
+    cache.begin_frame()
+    assert cache.draw(small) == 0
+    assert cache.draw(long) is None
+    assert [(texture.width, texture.height) for texture in loaded] == [((24 + 10 + 4) * 4, (10 + 4) * 4)]
+    assert cache.pixels == loaded[0].width * loaded[0].height
+
+
+def test_least_recently_drawn_textures_make_room_for_new_ones(monkeypatch):
+    loaded = stub_textures(monkeypatch)
+    simulation = Simulation(World(1))
+    organisms = [spawn_row(simulation.world, 3, index * 100) for index in range(3)]
+    simulation.run(2)
+    # Room for the textures of two of the organisms
+    pixels = (24 + 10 + 4) * (10 + 4)
+    monkeypatch.setattr(organism_texture_cache, "MAX_CACHED_PIXELS", pixels * 2)
+
+    cache = OrganismTextureCache()
+    cache.begin_frame()
+    assert cache.draw(organisms[0]) == 0
+    assert cache.draw(organisms[1]) == 0
+    # Both textures are in use this frame, so the third organism has to be drawn organ by organ
+    assert cache.draw(organisms[2]) is None
+    assert len(loaded) == 2
+
+    cache.begin_frame()
+    assert cache.draw(organisms[1]) == 0
+    assert cache.draw(organisms[2]) == 0
+    assert set(cache.entries) == {organisms[1], organisms[2]}
+    assert len(loaded) == 2
+    assert cache.pixels == pixels * 2
@@ -0,0 +1,57 @@
+import pytest
+from pyray import Color
+
+from genesis.organisms.genes import ColorGene, MaturityGene, ShapeGene
+from genesis.recording import InputRecorder, Recording, replay, world_digest
+from genesis.simulation import Simulation
+from genesis.utils.shape import PolygonShape
+from genesis.world import World
+
+
+# Record a session that spawns an organism, gives it genes and edits them the way the OrganDetailsUI does
+def record_session(path: str) -> Simulation:
+    simulation = Simulation(World(7))
+    recorder = InputRecorder(simulation)
+    recorder.spawn_blank_organ(40, 40)
+    simulation.run(2)
+
+    organism = simulation.world.organisms.items[0]
+    recorder.add_gene(organism, MaturityGene)
+    recorder.add_gene(organism, ColorGene)
+    recorder.add_blank_child_organ(organism)
+    simulation.run(10)
+
+    recorder.set_gene_field(organism, MaturityGene, "maturity_rate", 2.5)
+    recorder.set_gene_field(organism, ColorGene, "color", Color(10, 20, 30, 255))
+    recorder.set_gene_field(organism, ShapeGene, "shape", PolygonShape(6, 8))
+    simulation.run(30)
+    recorder.set_gene_field(organism, MaturityGene, "current_maturity", 12.0)
+    simulation.run(30)
+
+    recorder.finish().save(path)
+    return simulation
+
+
+def test_replay_reaches_the_recorded_digest(tmp_path):
+    path = str(tmp_path / "session.json")
+    recorded = record_session(path)
+
+    recording = Recording.load(path)
+    replayed = replay(recording)
+    assert replayed.tick == recorded.tick
+    assert world_digest(replayed.world) == recording.digest == world_digest(recorded.world)
+
+
+def test_replay_applies_gene_detail_edits(tmp_path):
+    path = str(tmp_path / "session.json")
+    record_session(path)
+    organism = replay(Recording.load(path)).world.organisms.items[0]
+
+    maturity = organism.get_gene(MaturityGene)
+    assert maturity.maturity_rate == 2.5
+    assert maturity.current_maturity == pytest.approx(12.0 + 2.5 * 30 / 60)
+    color = organism.get_gene(ColorGene).color
+    assert (color.r, color.g, color.b, color.a) == (10, 20, 30, 255)
+    assert isinstance(organism.shape, PolygonShape)
+    assert organism.shape.side_count == 6
+    assert organism.shape.color.r == 10
@@ -0,0 +1,23 @@
+import numpy as np
+from pyray import Color
+
+from genesis.utils.shape_batch import CIRCLE_SEGMENTS, ShapeBatch
+
+
+def test_shapes_are_drawn_in_the_order_they_were_added():
+    red = Color(255, 0, 0, 255)
+    green = Color(0, 255, 0, 255)
+    blue = Color(0, 0, 255, 255)
+    batch = ShapeBatch()
+    batch.add_rectangle(0, 0, 10, 10, 5, 5, 0, red)
+    batch.add_circle(100, 0, 5, green)
+    batch.add_rectangle(200, 0, 10, 10, 5, 5, 0, blue)
+    batch.add_rectangle(300, 0, 10, 10, 5, 5, 0, blue)
+    batch.add_rectangles(np.array([[400, 0, 10, 10, 5, 5, 0]]), np.array([[255, 0, 0, 255]]))
+    batch.add_circle(500, 0, 5, green)
+
+    meshes = batch.build()
+    # Rectangles added after the circle are drawn after it, consecutive shapes of the same type share a mesh
+    assert [len(positions) for positions, _ in meshes] == [6, CIRCLE_SEGMENTS * 3, 12, 6, CIRCLE_SEGMENTS * 3]
+    assert [int(positions[:, 0].mean() // 100) for positions, _ in meshes] == [0, 1, 2, 4, 5]
+    assert [tuple(colors[0]) for _, colors in meshes] == [(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255), (255, 0, 0, 255), (0, 255, 0, 255)]
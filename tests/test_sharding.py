@@ -0,0 +1,121 @@
+import pytest
+
+from genesis.organisms.genes import MaturityGene
+from genesis.organisms.organ import Organ, Gene
+from genesis.recording import world_digest
+from genesis.sharding import RegionGrid, ShardedSimulation
+from genesis.simulation import Simulation
+from genesis.world import World
+
+# The maturity rates of the organisms of the test worlds, an int first so a truncating snapshot would show
+RATES: list[float] = [1, 0.5, 2.75, 0.5]
+# The position of every organism in a 2x2 grid of regions 100 units wide, in the order regions are processed in. The
+# first two share a region
+POSITIONS: list[tuple[float, float]] = [(10, 10), (20, 10), (150, 10), (10, 150)]
+
+
+def maturing_organism(rate: float) -> Organ:
+    return Organ([lambda organ: MaturityGene(organ, maturity_rate=rate)])
+
+
+def test_sharded_spawn_matures_like_unsharded():
+    simulation = Simulation(World(3))
+    for rate, (x, y) in zip(RATES, POSITIONS):
+        simulation.world.spawn(maturing_organism(rate), x, y)
+    simulation.run(90)
+    expected = [organism.get_gene(MaturityGene).current_maturity for organism in simulation.world.organisms]
+
+    with ShardedSimulation(RegionGrid(2, 2, 100), seed=3, processes=0) as sharded:
+        sharded.spawn([(maturing_organism(rate), x, y) for rate, (x, y) in zip(RATES, POSITIONS)])
+        sharded.run(90)
+        group = sharded.groups[0].group
+        maturities = [
+            organism.get_gene(MaturityGene).current_maturity
+            for region in sharded.grid.regions()
+            for organism in group.simulations[region].world.organisms
+        ]
+    assert maturities == expected
+
+
+# The speed, in world units per second, drifting organisms move right at
+DRIFT_SPEED: float = 60
+# The organ classes of the organisms that reached their max maturity, in this process
+MATURED: list[type[Organ]] = []
+
+
+# Drift moves its organ right at DRIFT_SPEED, so organisms cross into other regions
+class Drift(Gene):
+    def __init__(self, organ: Organ):
+        super().__init__(organ, True)
+
+    def update(self, dt: float) -> None:
+        self.organ.move_pos_local_space(self.organ.local_x + DRIFT_SPEED * dt, self.organ.local_y)
+
+
+# An organ class of its own, to tell if organisms keep their class when they cross into another region
+class TaggedOrgan(Organ):
+    pass
+
+
+def matured(organ: Organ) -> None:
+    MATURED.append(organ.__class__)
+
+
+def drifting_organism(max_maturity: float = 100) -> Organ:
+    return TaggedOrgan([
+        Drift,
+        lambda organ: MaturityGene(organ, max_maturity, matured, 0.5)
+    ])
+
+
+# Run a sharded world of drifting organisms and get it, still open, with the digests of its regions
+def run_drifting(grid: RegionGrid, processes: int, ticks: int) -> dict:
+    with ShardedSimulation(grid, seed=5, processes=processes) as sharded:
+        sharded.spawn([(drifting_organism(), 10 + 37 * index, 20 + 50 * (index % 3)) for index in range(8)])
+        sharded.run(ticks)
+        return sharded.digests()
+
+
+def test_migration_loses_no_gene_time():
+    simulation = Simulation(World(5))
+    simulation.world.spawn(drifting_organism(), 90, 10)
+    simulation.run(60)
+    expected = simulation.world.organisms.items[0]
+
+    with ShardedSimulation(RegionGrid(2, 1, 100), seed=5, processes=0) as sharded:
+        sharded.spawn([(drifting_organism(), 90, 10)])
+        sharded.run(60)
+        group = sharded.groups[0].group
+        assert sharded.populations() == {(0, 0): 0, (1, 0): 1}
+        organism = group.simulations[(1, 0)].world.organisms.items[0]
+
+    assert organism.world_x == pytest.approx(expected.world_x)
+    assert organism.get_gene(MaturityGene).current_maturity == pytest.approx(expected.get_gene(MaturityGene).current_maturity)
+
+
+def test_migration_keeps_classes_and_callbacks():
+    MATURED.clear()
+    with ShardedSimulation(RegionGrid(2, 1, 100), seed=5, processes=0) as sharded:
+        # The organism crosses over after a sixth of a second and matures after a second and a half
+        sharded.spawn([(drifting_organism(max_maturity=0.75), 90, 10)])
+        sharded.run(120)
+        organism = sharded.groups[0].group.simulations[(1, 0)].world.organisms.items[0]
+
+    assert isinstance(organism, TaggedOrgan)
+    assert organism.get_gene(MaturityGene).on_mature is matured
+    assert organism.get_gene(MaturityGene).reached_max_maturity
+    assert MATURED == [TaggedOrgan]
+
+
+def test_result_does_not_depend_on_process_count():
+    grid = RegionGrid(2, 2, 100)
+    assert run_drifting(grid, 0, 90) == run_drifting(grid, 2, 90)
+
+
+def test_single_region_is_an_unsharded_world():
+    simulation = Simulation(World(5))
+    for index in range(8):
+        simulation.world.spawn(drifting_organism(), 10 + 37 * index, 20 + 50 * (index % 3))
+    simulation.run(90)
+
+    assert run_drifting(RegionGrid(1, 1, 100), 0, 90) == {(0, 0): world_digest(simulation.world)}
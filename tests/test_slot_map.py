@@ -0,0 +1,54 @@
+import pytest
+
+from genesis.utils.slot_map import Handle, SlotMap
+
+
+def test_removed_slots_are_reused_with_a_new_generation():
+    slot_map = SlotMap()
+    a, b, c = slot_map.insert("a"), slot_map.insert("b"), slot_map.insert("c")
+    assert [a, b, c] == [Handle(0, 0), Handle(1, 0), Handle(2, 0)]
+
+    assert slot_map.remove(a) == "a"
+    assert a not in slot_map
+    assert slot_map.get(a) is None
+    with pytest.raises(KeyError):
+        slot_map.position(a)
+
+    # The last item moved into the hole, its handle still refers to it
+    assert list(slot_map) == ["c", "b"]
+    assert slot_map.get(c) == "c"
+    assert slot_map.position(c) == 0
+
+    d = slot_map.insert("d")
+    assert d == Handle(0, 1)
+    assert a not in slot_map
+    assert slot_map.get(d) == "d"
+    assert slot_map.position(d) == 2
+
+
+def test_extend_reuses_free_slots_before_adding_new_ones():
+    slot_map = SlotMap()
+    handles = slot_map.extend(["a", "b", "c"])
+    slot_map.remove(handles[0])
+    slot_map.remove(handles[2])
+
+    added = slot_map.extend(["d", "e", "f"])
+    assert sorted(handle.index for handle in added) == [0, 2, 3]
+    assert all(handle.generation == (0 if handle.index == 3 else 1) for handle in added)
+    assert [slot_map.get(handle) for handle in added] == ["d", "e", "f"]
+    assert [slot_map.position(handle) for handle in added] == [1, 2, 3]
+    assert handles[0] not in slot_map and handles[2] not in slot_map
+    assert slot_map.get(handles[1]) == "b"
+
+
+def test_handles_from_before_many_removals_stay_stale():
+    slot_map = SlotMap()
+    first = slot_map.insert(0)
+    slot_map.remove(first)
+    for value in range(1, 5):
+        slot_map.remove(slot_map.insert(value))
+    handle = slot_map.insert(5)
+    assert handle == Handle(0, 5)
+    assert first not in slot_map
+    assert slot_map.get(Handle(7, 0)) is None
+    assert len(slot_map) == 1
@@ -0,0 +1,106 @@
+from pyray import Color
+
+from genesis.organisms.genes import ColorGene, EnergyGene, MaturityGene, ShapeGene
+from genesis.organisms.organ import Organ
+from genesis.simulation import Simulation
+from genesis.snapshot import save_world, WorldSnapshot
+from genesis.utils.shape import CircleShape, RectangleShape, Shape
+from genesis.world import World
+
+
+# Spawn one organism with a MaturityGene for every maturity rate, in the order given
+def spawn_maturing(world: World, rates: list[float]) -> None:
+    for index, rate in enumerate(rates):
+        world.spawn(Organ([lambda organ, rate=rate: MaturityGene(organ, maturity_rate=rate)]), index * 20, 0)
+
+
+def test_column_kind_comes_from_every_row(tmp_path):
+    world = World(1)
+    # The first organism has an int rate, the ones after it must not be truncated to match it
+    spawn_maturing(world, [1, 0.5, 2.75])
+    path = str(tmp_path / "world.snapshot")
+    save_world(world, path)
+
+    snapshot = WorldSnapshot.open(path)
+    rates = [
+        snapshot.materialize_organism(int(root))[0].get_gene(MaturityGene).maturity_rate
+        for root in snapshot.root_indices()
+    ]
+    assert rates == [1, 0.5, 2.75]
+
+
+def test_saved_world_matures_like_the_original(tmp_path):
+    original = Simulation(World(1))
+    spawn_maturing(original.world, [1, 0.5, 2.75])
+    path = str(tmp_path / "world.snapshot")
+    save_world(original.world, path)
+
+    loaded = Simulation(World(1))
+    WorldSnapshot.open(path).load_into(loaded.world)
+    original.run(120)
+    loaded.run(120)
+
+    def maturities(world: World) -> list[float]:
+        return [organism.get_gene(MaturityGene).current_maturity for organism in world.organisms]
+    assert maturities(loaded.world) == maturities(original.world)
+
+
+# Get everything about an organ a snapshot keeps, with colors and shapes as plain values so they can be compared
+def describe_organ(organ: Organ) -> tuple:
+    def plain(value):
+        if isinstance(value, Shape):
+            return type(value).__name__, value.get_snapshot_params(), value.rotation, plain(value.color)
+        if hasattr(value, "r"):
+            return value.r, value.g, value.b, value.a
+        return value
+    genes = {
+        gene_type.__name__: {name: plain(value) for name, value in gene.get_snapshot_state().items()}
+        for gene_type, gene in organ.genes.items()
+    }
+    return type(organ).__name__, organ.local_x, organ.local_y, organ.world_x, organ.world_y, plain(organ.shape), genes
+
+
+def test_materialized_organisms_equal_the_saved_ones(tmp_path):
+    simulation = Simulation(World(1))
+    root = Organ([
+        lambda organ: ShapeGene(organ, CircleShape(8)),
+        lambda organ: ColorGene(organ, Color(200, 40, 10, 255)),
+        lambda organ: EnergyGene(organ, max_energy_level=50, energy_depletion_rate=0.25)
+    ])
+    for offset in (-20, 20):
+        child = Organ([
+            lambda organ: ShapeGene(organ, RectangleShape(6, 12)),
+            lambda organ: MaturityGene(organ, max_maturity=3, maturity_rate=0.5)
+        ])
+        child.move_pos_local_space(offset, 0)
+        root.add_child_organ(child)
+        grandchild = Organ.blank_organ()
+        grandchild.move_pos_local_space(0, 8)
+        child.add_child_organ(grandchild)
+    simulation.world.spawn(root, 100, 50)
+    simulation.world.spawn(Organ.blank_organ(), -100, 0)
+    simulation.run(30)
+
+    path = str(tmp_path / "world.snapshot")
+    save_world(simulation.world, path)
+    snapshot = WorldSnapshot.open(path)
+    assert len(snapshot) == 6
+    assert len(snapshot.root_indices()) == 2
+
+    originals = []
+    for organism in simulation.world.organisms:
+        stack = [organism]
+        while stack:
+            organ = stack.pop()
+            originals.append(organ)
+            stack.extend(reversed(organ.children_organs))
+    materialized = [organ for root_index in snapshot.root_indices() for organ in snapshot.materialize_organism(int(root_index))]
+    assert [describe_organ(organ) for organ in materialized] == [describe_organ(organ) for organ in originals]
+
+    # The snapshot picks the organ the world picks, the topmost one where organs overlap
+    for x, y in [(100, 50), (80, 50), (80, 55), (80, 60), (120, 61), (-100, 0), (0, 0)]:
+        picked = simulation.world.pick(x, y)
+        index = snapshot.find_organ_at(x, y)
+        assert (index is None) == (picked is None)
+        if picked is not None:
+            assert snapshot.materialize_organ(index) is materialized[originals.index(picked)]
@@ -0,0 +1,34 @@
+from genesis.utils.spatial_grid import SpatialGrid
+
+
+def test_items_are_found_in_every_cell_they_overlap():
+    grid = SpatialGrid(10)
+    grid.update("wide", -15, 5, 40, 2)
+    grid.update("small", 1, 1, 3, 3)
+    assert grid.query_point(-14, 6) == ["wide"]
+    assert grid.query_point(24, 6) == ["wide"]
+    assert grid.query_point(2, 2) == ["small"]
+    # Points on the edge of an item are outside of it
+    assert grid.query_point(1, 2) == []
+    assert grid.query_point(25, 6) == []
+    assert len(grid) == 2
+
+
+def test_moved_and_removed_items_leave_their_cells():
+    grid = SpatialGrid(10)
+    grid.update("item", 0, 0, 5, 5)
+    grid.update("item", 100, 100, 5, 5)
+    assert grid.query_point(2, 2) == []
+    assert grid.query_point(102, 102) == ["item"]
+    assert set(grid.cells) == {(10, 10)}
+
+    # Moving within its cells only changes its bounds
+    grid.update("item", 101, 101, 5, 5)
+    assert grid.query_point(101.5, 101.5) == ["item"]
+    assert grid.query_point(100.5, 100.5) == []
+
+    grid.remove("item")
+    grid.remove("item")
+    assert "item" not in grid
+    assert grid.cells == {}
+    assert grid.query_point(102, 102) == []
@@ -0,0 +1,56 @@
+from genesis.utils.timing_wheel import SLOT_COUNT, TimingWheel
+
+
+# Advance the wheel until it is empty and get the tick every item was handed out at
+def run_until_empty(wheel: TimingWheel[int]) -> dict[int, int]:
+    handed_out = {}
+    while len(wheel):
+        for item in wheel.advance():
+            handed_out[item] = wheel.tick
+    return handed_out
+
+
+def test_items_are_handed_out_at_their_due_tick_on_every_level():
+    # Ticks on both sides of where every level starts, 64, 4096 and 262144 ticks ahead
+    due_ticks = [1, 2, 63, 64, 65, 127, 128, 4095, 4096, 4097, 8192, 262143, 262144, 262145, 300000]
+    wheel = TimingWheel()
+    for due_tick in due_ticks:
+        wheel.schedule(due_tick, due_tick)
+    assert len(wheel) == len(due_ticks)
+    assert run_until_empty(wheel) == {due_tick: due_tick for due_tick in due_ticks}
+
+
+def test_items_scheduled_later_are_handed_out_at_their_due_tick():
+    wheel = TimingWheel()
+    for _ in range(SLOT_COUNT * 3 + 5):
+        wheel.advance()
+    start = wheel.tick
+    due_ticks = [start + delta for delta in (1, 59, 60, 64, 4096, 4097, 262144)]
+    for due_tick in due_ticks:
+        wheel.schedule(due_tick, due_tick)
+    assert run_until_empty(wheel) == {due_tick: due_tick for due_tick in due_ticks}
+
+
+def test_items_due_at_the_same_tick_keep_their_order():
+    wheel = TimingWheel()
+    wheel.schedule(1, 4096)
+    wheel.schedule(2, 4096)
+    for _ in range(4000):
+        wheel.advance()
+    # Scheduled after the first two have cascaded down to a lower level
+    wheel.schedule(3, 4096)
+    handed_out = []
+    while len(wheel):
+        handed_out.extend(wheel.advance())
+    assert handed_out == [1, 2, 3]
+    assert wheel.tick == 4096
+
+
+def test_items_due_in_the_past_are_handed_out_on_the_next_tick():
+    wheel = TimingWheel()
+    for _ in range(10):
+        wheel.advance()
+    wheel.schedule(1, 3)
+    wheel.schedule(2, 10)
+    assert wheel.advance() == [1, 2]
+    assert len(wheel) == 0
@@ -0,0 +1,65 @@
+from genesis.organisms.organ import Organ, Gene
+from genesis.simulation import Simulation
+from genesis.world import World, DEFAULT_TICK_LENGTH
+
+
+# Remover removes the organism it is given on its first update
+class Remover(Gene):
+    def __init__(self, organ: Organ, target: Organ):
+        super().__init__(organ, True)
+        self.target = target
+
+    def update(self, dt: float) -> None:
+        self.target.remove()
+
+
+# Counter counts its updates, every tick
+class Counter(Gene):
+    def __init__(self, organ: Organ):
+        super().__init__(organ, True)
+        self.updates = 0
+
+    def update(self, dt: float) -> None:
+        self.updates += 1
+
+
+# PeriodicCounter counts its updates, which come from the world's timing wheel
+class PeriodicCounter(Counter):
+    update_period = DEFAULT_TICK_LENGTH
+
+
+def test_organisms_marked_for_removal_are_not_updated():
+    simulation = Simulation(World(1))
+    target = Organ([Counter, PeriodicCounter])
+    simulation.world.spawn(Organ([lambda organ: Remover(organ, target)]), 0, 0)
+    simulation.world.spawn(target, 50, 0)
+    # The genes of both organisms are initialized at the start of the first tick and updated from the second
+    simulation.run(1)
+    assert target.world is simulation.world
+
+    simulation.run(3)
+    assert target.to_remove
+    assert target.get_gene(Counter).updates == 0
+    assert target.get_gene(PeriodicCounter).updates == 0
+    assert len(simulation.world.organisms) == 1
+
+
+# Sprout gives its organ a child with a Counter on its first update
+class Sprout(Gene):
+    def __init__(self, organ: Organ):
+        super().__init__(organ, True)
+        self.child = None
+
+    def update(self, dt: float) -> None:
+        if self.child is None:
+            self.child = Organ([Counter])
+            self.organ.add_child_organ(self.child)
+
+
+def test_updates_can_add_genes_of_a_new_class():
+    simulation = Simulation(World(1))
+    organism = Organ([Sprout])
+    simulation.world.spawn(organism, 0, 0)
+    simulation.run(5)
+    # The child joined during the second tick, its genes were initialized and first updated on the third
+    assert organism.get_gene(Sprout).child.get_gene(Counter).updates == 3